@@ -18,7 +18,14 @@ from .core import (
     L
 )
 
-from .ui import MainWindow, run_app
+
+def __getattr__(name):
+    # GUI 部分按需导入，仅使用 core 时（测试、进程池工作进程）无需 PyQt6
+    if name in ('MainWindow', 'run_app'):
+        from . import ui
+        return getattr(ui, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'ConfigManager',
@@ -3,13 +3,27 @@ Photo-Timestamper Core Module&照片时间戳核心模块
 """
 
 import os
+import atexit
+import hashlib
+import itertools
 import logging
+import multiprocessing
+import queue
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-from typing import Callable, Tuple, Optional
+from typing import Callable, Iterator, Tuple, Optional
 
 import yaml
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, JpegImagePlugin, UnidentifiedImageError
 import piexif
 import simpsave as ss
 
@@ -96,6 +110,9 @@ logger = logging.getLogger(__name__)
 
 SS_CONFIG_FILE = './simpsave/photo_timestamper_config.json'
 SS_SESSION_FILE = './simpsave/photo_timestamper_session.json'
+SS_METADATA_FILE = './simpsave/photo_timestamper_metadata.db'
+SS_FONT_INDEX_FILE = './simpsave/photo_timestamper_fonts.json'
+SS_THUMBNAIL_DIR = './simpsave/thumbs'
 
 
 def get_base_path() -> Path:
@@ -122,9 +139,25 @@ class ConfigManager:
             "custom_directory": "",
             "filename_pattern": "{original}_stamped",
             "jpeg_quality": 95,
+            "encode_profile": "balanced",  # fast, balanced, smallest, match_source, lossless
+            "chroma_subsampling": "",  # "" = profile default, 4:4:4, 4:2:2, 4:2:0
             "preserve_exif": True,
+            "exif_passthrough": True,  # Copy source APP1/ICC segments verbatim instead of piexif round trip
+            "exif_strip_thumbnail": False,
+            "exif_software": "",
             "overwrite_existing": False
         },
+        "processing": {
+            "mode": "sequential",  # sequential, parallel, pipeline
+            "workers": 0,  # 0 = CPU count
+            "queue_size": 4  # Bounded queue length between pipeline stages
+        },
+        "cache": {
+            "metadata_enabled": True,
+            "metadata_max_entries": 200000,
+            "thumbnail_enabled": True,
+            "thumbnail_max_mb": 256
+        },
         "ui": {
             "last_style": "CANON&佳能",
             "preview_enabled": True,
@@ -259,11 +292,25 @@ class StyleManager:
         "Noto-Sans-SC-Bold.ttf": "Noto_Sans_SC/static/NotoSansSC-Bold.ttf",
     }
 
+    # Font style words to numeric weights&字体样式词到数值字重的映射
+    FONT_WEIGHTS = {
+        "thin": 100, "hairline": 100,
+        "extralight": 200, "ultralight": 200,
+        "light": 300,
+        "normal": 400, "regular": 400, "book": 400, "": 400,
+        "medium": 500,
+        "semibold": 600, "demibold": 600,
+        "bold": 700,
+        "extrabold": 800, "ultrabold": 800,
+        "black": 900, "heavy": 900,
+    }
+
     def __init__(self, styles_dir: str | None = None, fonts_dir: str | None = None):
         base_path = get_base_path()
         self.styles_dir = Path(styles_dir) if styles_dir else base_path / "styles"
         self.fonts_dir = Path(fonts_dir) if fonts_dir else base_path / "fonts"
         self._styles_cache: dict = {}
+        self._font_index: dict | None = None
 
     def list_styles(self) -> list[str]:
         """Get all available style names&获取所有可用样式名称列表"""
@@ -327,30 +374,1719 @@ class StyleManager:
         if direct_path.exists():
             return direct_path
 
-        for path in self.fonts_dir.rglob(f"*{Path(font_file).stem}*"):
-            if path.suffix.lower() in ['.ttf', '.otf']:
-                return path
+        index = self._get_font_index()
+        stem = Path(font_file).stem.lower()
+        path = index['stems'].get(stem)
+        if path is None:
+            path = next((p for s, p in index['ordered'] if stem in s), None)
+        if path is not None:
+            return path
 
         logger.warning(f"Font file not found, using system default&字体文件未找到，将使用系统默认字体: {font_file}")
         return None
 
+    def find_font(self, family: str, weight: str | int | None = None, italic: bool = False) -> Path | None:
+        """Find closest font by family, weight and italic&按字体族、字重和斜体查找最接近的字体"""
+        candidates = self._get_font_index()['families'].get(self._normalize_font_name(family))
+        if not candidates:
+            return None
+        target = self._parse_weight(weight)
+        _, _, path = min(
+            candidates,
+            key=lambda c: (c[1] != bool(italic), abs(c[0] - target), c[0] < target)
+        )
+        return path
+
+    def resolve_font(self, font: dict) -> Path | None:
+        """Resolve style font section: family+weight+italic first, then file (weight/italic applied within its family)&解析样式字体配置：先按字体族+字重+斜体，再按文件名（在其字体族内应用字重/斜体）"""
+        family = font.get('family')
+        if family:
+            path = self.find_font(family, font.get('weight'), font.get('italic', False))
+            if path is not None:
+                return path
+            logger.warning(f"Font family not found, falling back to file&字体族未找到，回退到字体文件: {family}")
+        path = self.get_font_path(font.get('file', 'Courier-Prime.ttf'))
+        if path is None or ('weight' not in font and 'italic' not in font):
+            return path
+        # Apply weight/italic within the file's own family&在字体文件所属字体族内应用字重/斜体
+        file_family = self._get_font_index()['path_families'].get(path)
+        if file_family is None:
+            return path
+        return self.find_font(file_family, font.get('weight'), font.get('italic', False)) or path
+
+    @staticmethod
+    def _normalize_font_name(name: str) -> str:
+        """Normalize family or style name for matching&规范化字体族或样式名称用于匹配"""
+        return ''.join(ch for ch in str(name).lower() if ch not in ' -_')
+
+    @classmethod
+    def _parse_weight(cls, weight: str | int | None) -> int:
+        """Convert weight keyword or number to numeric weight&将字重关键字或数字转为数值字重"""
+        if isinstance(weight, (int, float)):
+            return int(weight)
+        if weight is None:
+            return 400
+        return cls.FONT_WEIGHTS.get(cls._normalize_font_name(weight), 400)
+
+    @classmethod
+    def _parse_font_style(cls, style: str) -> Tuple[int, bool]:
+        """Parse font style name like 'ExtraBold Italic' to (weight, italic)&解析字体样式名称为（字重, 斜体）"""
+        name = cls._normalize_font_name(style)
+        italic = 'italic' in name or 'oblique' in name
+        name = name.replace('italic', '').replace('oblique', '')
+        return cls.FONT_WEIGHTS.get(name, 400), italic
+
+    def _font_dirs_signature(self) -> str:
+        """Signature of font tree from directory mtimes&由各目录修改时间生成的字体目录签名"""
+        parts = []
+        for root, dirs, _ in os.walk(self.fonts_dir):
+            dirs.sort()
+            parts.append(f"{os.path.relpath(root, self.fonts_dir)}:{os.stat(root).st_mtime_ns}")
+        return '|'.join(parts)
+
+    def _scan_fonts(self) -> dict:
+        """Scan font files as {relative path: [family, style]}&扫描字体文件，返回{相对路径: [字体族, 样式]}"""
+        fonts = {}
+        for root, dirs, files in os.walk(self.fonts_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() not in ('.ttf', '.otf'):
+                    continue
+                path = Path(root) / name
+                try:
+                    family, style = ImageFont.truetype(str(path), 10).getname()
+                except Exception as e:
+                    logger.debug(f"Skipping unreadable font&跳过无法读取的字体 {path}: {e}")
+                    family, style = None, None
+                fonts[path.relative_to(self.fonts_dir).as_posix()] = [family or '', style or '']
+        return fonts
+
+    def _get_font_index(self) -> dict:
+        """Load font index from simpsave, rebuilding when font dirs changed&从simpsave加载字体索引，目录变化时重建"""
+        if self._font_index is not None:
+            return self._font_index
+
+        fonts = None
+        signature = self._font_dirs_signature() if self.fonts_dir.exists() else ''
+        index_key = str(self.fonts_dir.resolve())
+        stored_indexes = {}
+        try:
+            if ss.has('font_index', file=SS_FONT_INDEX_FILE):
+                stored_indexes = ss.read('font_index', file=SS_FONT_INDEX_FILE) or {}
+                stored = stored_indexes.get(index_key)
+                if stored and stored.get('signature') == signature:
+                    fonts = stored.get('fonts')
+        except Exception as e:
+            logger.debug(f"Cannot read font index&无法读取字体索引: {e}")
+
+        if fonts is None:
+            fonts = self._scan_fonts() if signature else {}
+            stored_indexes[index_key] = {'signature': signature, 'fonts': fonts}
+            try:
+                ss.write('font_index', stored_indexes, file=SS_FONT_INDEX_FILE)
+            except Exception as e:
+                logger.debug(f"Cannot save font index&无法保存字体索引: {e}")
+            logger.info(f"Font index built with {len(fonts)} fonts&字体索引已建立，共 {len(fonts)} 个字体")
+
+        stems = {}
+        ordered = []
+        families: dict = {}
+        path_families = {}
+        # Static instances take precedence over variable fonts&静态字体优先于可变字体
+        for rel_path in sorted(fonts, key=lambda r: ('variablefont' in r.lower(), r)):
+            family, style = fonts[rel_path]
+            path = self.fonts_dir / rel_path
+            stem = path.stem.lower()
+            stems.setdefault(stem, path)
+            ordered.append((stem, path))
+            if family:
+                path_families[path] = family
+                weight, italic = self._parse_font_style(style)
+                variants = families.setdefault(self._normalize_font_name(family), [])
+                if not any(w == weight and i == italic for w, i, _ in variants):
+                    variants.append((weight, italic, path))
+
+        ordered.sort(key=lambda item: str(item[1]))
+        self._font_index = {'stems': stems, 'ordered': ordered, 'families': families,
+                            'path_families': path_families}
+        return self._font_index
+
+
+# ==================== Fast EXIF Reader&快速EXIF读取 ====================
+
+JPEG_SOI = b'\xff\xd8'
+EXIF_APP1_HEADER = b'Exif\x00\x00'
+
+# TIFF field type sizes in bytes&TIFF字段类型字节长度
+_TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+# (date tag, subsec tag, IFD) in priority order&按优先级排列的（日期标签, 亚秒标签, IFD）
+_EXIF_DATE_TAGS = (
+    (0x9003, 0x9291, 'exif'),  # DateTimeOriginal, SubSecTimeOriginal
+    (0x9004, 0x9292, 'exif'),  # DateTimeDigitized, SubSecTimeDigitized
+    (0x0132, 0x9290, 'ifd0'),  # DateTime, SubSecTime
+)
+
+
+def iter_jpeg_segments(fp) -> Iterator[Tuple[int, int, int]]:
+    """
+    Walk JPEG header segments up to and including SOS&遍历JPEG头部段直到SOS（含）
+    Yields (marker, payload offset, payload length) with fp positioned at payload start
+    """
+    if fp.read(2) != JPEG_SOI:
+        return
+
+    while True:
+        if fp.read(1) != b'\xff':
+            return
+        marker_byte = fp.read(1)
+        while marker_byte == b'\xff':
+            marker_byte = fp.read(1)
+        if not marker_byte:
+            return
+
+        marker = marker_byte[0]
+        if marker == 0xD9:
+            return
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+
+        size_bytes = fp.read(2)
+        if len(size_bytes) < 2:
+            return
+        length = int.from_bytes(size_bytes, 'big') - 2
+        start = fp.tell()
+
+        yield marker, start, length
+
+        if marker == 0xDA:
+            return
+        fp.seek(start + length)
+
+
+def read_exif_block(source: str | Path | bytes) -> bytes | None:
+    """Read TIFF payload of APP1 Exif segment from file header or bytes&从文件头或字节读取APP1 Exif段的TIFF数据"""
+    return read_jpeg_header(source, want_size=False)[0]
+
+
+def read_jpeg_header(source: str | Path | bytes,
+                     want_size: bool = True) -> Tuple[bytes | None, Tuple[int, int] | None]:
+    """Read APP1 Exif payload and frame size from JPEG header&从JPEG头部读取APP1 Exif数据和画幅尺寸"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _scan_jpeg_header(BytesIO(source), want_size)
+    with open(source, 'rb') as fp:
+        return _scan_jpeg_header(fp, want_size)
+
+
+# Start-of-frame markers carrying image dimensions&携带图像尺寸的帧起始标记
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _scan_jpeg_header(fp, want_size: bool) -> Tuple[bytes | None, Tuple[int, int] | None]:
+    """Scan header segments for APP1 Exif payload and SOF size&在头部段中查找APP1 Exif数据和SOF尺寸"""
+    head = fp.read(2)
+    if head != JPEG_SOI:
+        raise ValueError("Not a JPEG stream&不是JPEG数据流")
+    fp.seek(0)
+
+    tiff = None
+    size = None
+    for marker, _, length in iter_jpeg_segments(fp):
+        if tiff is None and marker == 0xE1 and length > len(EXIF_APP1_HEADER):
+            payload = fp.read(length)
+            if payload.startswith(EXIF_APP1_HEADER):
+                tiff = payload[len(EXIF_APP1_HEADER):]
+                if not want_size:
+                    break
+        elif marker in _SOF_MARKERS and length >= 5:
+            frame = fp.read(5)
+            size = (int.from_bytes(frame[3:5], 'big'), int.from_bytes(frame[1:3], 'big'))
+            break
+    return tiff, size
+
+
+def read_image_metadata(source: str | Path | bytes) -> dict:
+    """Read capture time, orientation and frame size from JPEG header&从JPEG头部读取拍摄时间、方向和画幅尺寸"""
+    tiff, size = read_jpeg_header(source)
+    header = ExifHeader(tiff) if tiff else None
+    metadata = {
+        'capture_time': header.get_datetime() if header else None,
+        'orientation': header.get_orientation() if header else None,
+    }
+    if size:
+        metadata['width'], metadata['height'] = size
+    return metadata
+
+
+class ExifHeader:
+    """Minimal IFD0/Exif/IFD1 reader over raw TIFF bytes&基于原始TIFF字节的最小化IFD0/Exif/IFD1读取器"""
+
+    EXIF_POINTER = 0x8769
+
+    def __init__(self, tiff: bytes):
+        if tiff[:2] == b'II':
+            self.endian = '<'
+        elif tiff[:2] == b'MM':
+            self.endian = '>'
+        else:
+            raise ValueError("Invalid TIFF byte order&无效的TIFF字节序")
+        self.tiff = tiff
+        if self._unpack('H', 2) != 42:
+            raise ValueError("Invalid TIFF magic&无效的TIFF标识")
+
+        self.ifd0, ifd1_offset = self._read_ifd(self._unpack('I', 4))
+        self.ifd1 = self._read_ifd(ifd1_offset)[0] if ifd1_offset else {}
+        exif_offset = self.get_value(self.ifd0, self.EXIF_POINTER)
+        self.exif = self._read_ifd(exif_offset)[0] if isinstance(exif_offset, int) else {}
+
+    @classmethod
+    def from_source(cls, source: str | Path | bytes) -> 'ExifHeader | None':
+        """Build reader from file or bytes, None if no EXIF segment&从文件或字节构建读取器，无EXIF段时返回None"""
+        tiff = read_exif_block(source)
+        return cls(tiff) if tiff else None
+
+    def _unpack(self, fmt: str, offset: int):
+        """Unpack single value at offset&在偏移处解包单个值"""
+        return struct.unpack_from(self.endian + fmt, self.tiff, offset)[0]
+
+    def _read_ifd(self, offset: int) -> Tuple[dict, int]:
+        """Read IFD entries as {tag: (type, count, value offset, entry offset)}&读取IFD条目"""
+        if offset <= 0 or offset + 2 > len(self.tiff):
+            raise ValueError(f"IFD offset out of range&IFD偏移越界: {offset}")
+        count = self._unpack('H', offset)
+        entries = {}
+        pos = offset + 2
+        for _ in range(count):
+            if pos + 12 > len(self.tiff):
+                raise ValueError("Truncated IFD&IFD数据截断")
+            tag, type_, n = struct.unpack_from(self.endian + 'HHI', self.tiff, pos)
+            size = _TIFF_TYPE_SIZES.get(type_, 1) * n
+            value_offset = pos + 8 if size <= 4 else self._unpack('I', pos + 8)
+            entries[tag] = (type_, n, value_offset, pos)
+            pos += 12
+        next_offset = self._unpack('I', pos) if pos + 4 <= len(self.tiff) else 0
+        return entries, next_offset
+
+    def get_value(self, ifd: dict, tag: int):
+        """Decode ASCII/SHORT/LONG value of tag, raw bytes otherwise&解码标签的ASCII/SHORT/LONG值，其余返回原始字节"""
+        entry = ifd.get(tag)
+        if entry is None:
+            return None
+        type_, count, offset, _ = entry
+        size = _TIFF_TYPE_SIZES.get(type_, 1) * count
+        if offset + size > len(self.tiff):
+            raise ValueError(f"Tag value out of range&标签值越界: {tag:#06x}")
+        if type_ == 2:
+            return self.tiff[offset:offset + size].split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+        if type_ in (3, 4):
+            fmt = 'H' if type_ == 3 else 'I'
+            values = struct.unpack_from(f"{self.endian}{count}{fmt}", self.tiff, offset)
+            return values[0] if count == 1 else values
+        return self.tiff[offset:offset + size]
+
+    def get_orientation(self) -> int | None:
+        """Get IFD0 orientation tag&获取IFD0方向标签"""
+        orientation = self.get_value(self.ifd0, 0x0112)
+        return orientation if isinstance(orientation, int) else None
+
+    def get_thumbnail(self) -> bytes | None:
+        """Get IFD1 embedded JPEG thumbnail bytes&获取IFD1内嵌的JPEG缩略图数据"""
+        offset = self.get_value(self.ifd1, 0x0201)
+        length = self.get_value(self.ifd1, 0x0202)
+        if not isinstance(offset, int) or not isinstance(length, int) or length <= 0:
+            return None
+        data = self.tiff[offset:offset + length]
+        return data if len(data) == length and data.startswith(JPEG_SOI) else None
+
+    def get_datetime(self) -> datetime | None:
+        """Get capture time with sub-second precision&获取含亚秒精度的拍摄时间"""
+        ifds = {'exif': self.exif, 'ifd0': self.ifd0}
+        for date_tag, subsec_tag, ifd_name in _EXIF_DATE_TAGS:
+            ifd = ifds[ifd_name]
+            dt_str = self.get_value(ifd, date_tag)
+            if not dt_str:
+                continue
+            try:
+                dt = datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
+            except ValueError:
+                continue
+            subsec = self.get_value(self.exif, subsec_tag)
+            return _apply_subsec(dt, subsec)
+        return None
+
+
+def _apply_subsec(dt: datetime, subsec) -> datetime:
+    """Apply EXIF SubSecTime digits to datetime&将EXIF亚秒数字应用到时间"""
+    if isinstance(subsec, bytes):
+        subsec = subsec.decode('ascii', 'replace')
+    if isinstance(subsec, str):
+        digits = subsec.strip().split('\x00', 1)[0].strip()
+        if digits.isdigit():
+            return dt.replace(microsecond=int(digits[:6].ljust(6, '0')))
+    return dt
+
+
+# ==================== JPEG Metadata Passthrough&JPEG元数据透传 ====================
+
+XMP_APP1_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+ICC_APP2_HEADER = b'ICC_PROFILE\x00'
+
+
+def read_metadata_segments(data: bytes) -> list[bytes]:
+    """
+    Collect raw Exif/XMP APP1 and ICC APP2 segments from JPEG bytes&从JPEG字节中收集原始Exif/XMP APP1和ICC APP2段
+    Each item includes marker and length so it can be spliced verbatim
+    """
+    if not data.startswith(JPEG_SOI):
+        return []
+    segments = []
+    fp = BytesIO(data)
+    for marker, start, length in iter_jpeg_segments(fp):
+        if marker == 0xE1:
+            headers = (EXIF_APP1_HEADER, XMP_APP1_HEADER)
+        elif marker == 0xE2:
+            headers = (ICC_APP2_HEADER,)
+        else:
+            continue
+        if data.startswith(headers, start) and start + length <= len(data):
+            segments.append(data[start - 4:start + length])
+    return segments
+
+
+def splice_metadata_segments(encoded: bytes, segments: list[bytes]) -> bytes:
+    """Insert raw segments after SOI and leading APP0 segments&在SOI和开头的APP0段之后插入原始段"""
+    pos = len(JPEG_SOI)
+    while encoded[pos:pos + 2] == b'\xff\xe0':
+        pos += 2 + int.from_bytes(encoded[pos + 2:pos + 4], 'big')
+    return encoded[:pos] + b''.join(segments) + encoded[pos:]
+
+
+def patch_exif_segment(segment: bytes, drop_thumbnail: bool = False,
+                       software: str | None = None) -> bytes:
+    """
+    Apply byte-level patches to a raw Exif APP1 segment&对原始Exif APP1段进行字节级修补
+    drop_thumbnail unlinks IFD1; software overwrites the Software tag if the new value fits in place
+    """
+    base = 4 + len(EXIF_APP1_HEADER)
+    if not segment.startswith(EXIF_APP1_HEADER, 4):
+        return segment
+    header = ExifHeader(segment[base:])
+    patched = bytearray(segment)
+
+    if drop_thumbnail and header.ifd1:
+        ifd0_offset = header._unpack('I', 4)
+        next_pointer = base + ifd0_offset + 2 + 12 * header._unpack('H', ifd0_offset)
+        patched[next_pointer:next_pointer + 4] = b'\x00\x00\x00\x00'
+
+    if software:
+        entry = header.ifd0.get(0x0131)
+        value = software.encode('ascii', 'replace') + b'\x00'
+        if entry is None or entry[0] != 2 or len(value) > entry[1]:
+            logger.debug(f"Software tag cannot be patched in place&无法原地修改Software标签: {software}")
+        else:
+            _, count, value_offset, entry_offset = entry
+            count_pos = base + entry_offset + 4
+            patched[count_pos:count_pos + 4] = struct.pack(header.endian + 'I', len(value))
+            if len(value) <= 4:
+                # Values of up to 4 bytes live inside the entry itself&不超过4字节的值存放在条目内
+                patched[count_pos + 4:count_pos + 8] = value.ljust(4, b'\x00')
+            else:
+                offset = base + value_offset
+                patched[offset:offset + count] = value.ljust(count, b'\x00')
+
+    return bytes(patched)
+
+
+# ==================== Lossless JPEG Stamping&无损JPEG盖印 ====================
+
+# Natural (row-major) index of each zigzag position&各之字形位置对应的自然顺序索引
+JPEG_ZIGZAG = (
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63,
+)
+
+# Pillow subsampling option per luma (h, v) factors with 1x1 chroma&亮度采样因子（色度1x1）对应的Pillow色度采样参数
+_SUBSAMPLING_BY_FACTORS = {(1, 1): 0, (2, 1): 1, (2, 2): 2}
+
+# Marker inside entropy-coded data, fill bytes before it are stripped by the caller&熵编码数据中的标记，其前的填充字节由调用方去除
+_SCAN_MARKER_RE = re.compile(rb'\xff([^\x00\xff])')
+
+
+class JpegHuffmanTable:
+    """Canonical Huffman table with 16-bit decode lookup&带16位解码查找表的规范哈夫曼表"""
+
+    def __init__(self, counts: bytes, symbols: bytes):
+        self.counts = bytes(counts)
+        self.symbols = bytes(symbols)
+        self.lookup: list = [None] * 65536
+        self.codes: dict = {}
+
+        code = 0
+        k = 0
+        for length in range(1, 17):
+            for _ in range(counts[length - 1]):
+                if k >= len(symbols) or code >= 1 << length:
+                    raise ValueError("Invalid Huffman table&无效的哈夫曼表")
+                shift = 16 - length
+                self.lookup[code << shift:(code + 1) << shift] = [(symbols[k], length)] * (1 << shift)
+                self.codes[symbols[k]] = (code, length)
+                code += 1
+                k += 1
+            code <<= 1
+
+    def segment(self, table_class: int, table_id: int) -> bytes:
+        """Serialize as DHT segment&序列化为DHT段"""
+        payload = bytes([table_class << 4 | table_id]) + self.counts + self.symbols
+        return b'\xff\xc4' + (len(payload) + 2).to_bytes(2, 'big') + payload
+
+
+class BaselineJpeg:
+    """Parsed single-scan baseline JPEG with restart interval layout&已解析的单扫描基线JPEG及其重启间隔布局"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.segments: list = []
+        self.qtables: dict = {}
+        self.huffman: dict = {}
+        self.restart_interval = 0
+        self.components: list = []
+        self.scan_tables: list = []
+        self.scan_start = 0
+        self._parse_header()
+        self._init_layout()
+        self._locate_intervals()
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def _parse_header(self) -> None:
+        """Parse tables, frame and scan header&解析量化表、哈夫曼表、帧头和扫描头"""
+        if not self.data.startswith(JPEG_SOI):
+            raise ValueError("Not a JPEG stream&不是JPEG数据流")
+
+        frame_seen = False
+        for marker, start, length in iter_jpeg_segments(BytesIO(self.data)):
+            payload = self.data[start:start + length]
+            if len(payload) != length:
+                raise ValueError("Truncated JPEG header&JPEG头部截断")
+            self.segments.append((marker, start, length))
+
+            if marker == 0xDB:
+                self._parse_dqt(payload)
+            elif marker == 0xC4:
+                self._parse_dht(payload)
+            elif marker == 0xDD:
+                self.restart_interval = int.from_bytes(payload[:2], 'big')
+            elif marker == 0xEE:
+                raise ValueError("Adobe color transform not supported&不支持Adobe颜色变换")
+            elif marker in _SOF_MARKERS:
+                if marker not in (0xC0, 0xC1):
+                    raise ValueError("Only baseline sequential JPEG is supported&仅支持基线顺序JPEG")
+                self._parse_sof(payload)
+                frame_seen = True
+            elif marker == 0xDA:
+                if not frame_seen:
+                    raise ValueError("Scan before frame header&帧头之前出现扫描")
+                self._parse_sos(payload)
+                self.scan_start = start + length
+
+        if not self.scan_start:
+            raise ValueError("Missing scan header&缺少扫描头")
+
+    def _parse_dqt(self, payload: bytes) -> None:
+        pos = 0
+        while pos < len(payload):
+            precision, table_id = payload[pos] >> 4, payload[pos] & 15
+            if precision:
+                raise ValueError("16-bit quantization tables not supported&不支持16位量化表")
+            self.qtables[table_id] = list(payload[pos + 1:pos + 65])
+            pos += 65
+
+    def _parse_dht(self, payload: bytes) -> None:
+        pos = 0
+        while pos < len(payload):
+            table_class, table_id = payload[pos] >> 4, payload[pos] & 15
+            counts = payload[pos + 1:pos + 17]
+            total = sum(counts)
+            self.huffman[(table_class, table_id)] = JpegHuffmanTable(counts, payload[pos + 17:pos + 17 + total])
+            pos += 17 + total
+
+    def _parse_sof(self, payload: bytes) -> None:
+        if payload[0] != 8:
+            raise ValueError("Only 8-bit JPEG is supported&仅支持8位JPEG")
+        self.height = int.from_bytes(payload[1:3], 'big')
+        self.width = int.from_bytes(payload[3:5], 'big')
+        if not self.width or not self.height:
+            raise ValueError("Invalid frame size&无效的帧尺寸")
+        self.components = [
+            (payload[6 + i * 3], payload[7 + i * 3] >> 4, payload[7 + i * 3] & 15, payload[8 + i * 3])
+            for i in range(payload[5])
+        ]
+
+    def _parse_sos(self, payload: bytes) -> None:
+        count = payload[0]
+        ids = [payload[1 + i * 2] for i in range(count)]
+        if ids != [c[0] for c in self.components]:
+            raise ValueError("Scan must cover all components in frame order&扫描必须按帧顺序包含全部分量")
+        if payload[1 + count * 2:4 + count * 2] != b'\x00\x3f\x00':
+            raise ValueError("Only sequential full-spectrum scans are supported&仅支持顺序全频谱扫描")
+        self.scan_tables = [(payload[2 + i * 2] >> 4, payload[2 + i * 2] & 15) for i in range(count)]
+
+    def _init_layout(self) -> None:
+        """Derive MCU geometry and per-block component order&推导MCU几何结构和块分量顺序"""
+        if len(self.components) == 1:
+            # Single-component scans are non-interleaved: one block per MCU&单分量扫描不交错：每个MCU一个块
+            self.block_components = [0]
+            self.subsampling = None
+            self.mcu_size = (8, 8)
+        elif len(self.components) == 3:
+            factors = tuple(c[1:3] for c in self.components)
+            if factors[1] != (1, 1) or factors[2] != (1, 1) or factors[0] not in _SUBSAMPLING_BY_FACTORS:
+                raise ValueError("Unsupported chroma subsampling&不支持的色度采样")
+            h, v = factors[0]
+            self.block_components = [0] * (h * v) + [1, 2]
+            self.subsampling = _SUBSAMPLING_BY_FACTORS[factors[0]]
+            self.mcu_size = (8 * h, 8 * v)
+        else:
+            raise ValueError("Only grayscale or YCbCr JPEG is supported&仅支持灰度或YCbCr JPEG")
+
+        self.mcus_x = -(-self.width // self.mcu_size[0])
+        self.mcus_y = -(-self.height // self.mcu_size[1])
+        self.mcu_count = self.mcus_x * self.mcus_y
+
+        try:
+            self.decode_blocks = [
+                (c, self.huffman[(0, self.scan_tables[c][0])].lookup, self.huffman[(1, self.scan_tables[c][1])].lookup)
+                for c in self.block_components
+            ]
+            self.encode_blocks = [
+                (c, self.huffman[(0, self.scan_tables[c][0])].codes, self.huffman[(1, self.scan_tables[c][1])].codes)
+                for c in self.block_components
+            ]
+        except KeyError:
+            raise ValueError("Scan references undefined Huffman table&扫描引用了未定义的哈夫曼表")
+
+    def _locate_intervals(self) -> None:
+        """Find byte ranges of restart intervals up to EOI&定位各重启间隔的字节范围直到EOI"""
+        self.intervals = []
+        pos = self.scan_start
+        for match in _SCAN_MARKER_RE.finditer(self.data, self.scan_start):
+            marker = match.group(1)[0]
+            end = match.start()
+            # Stuffed data is always 0xFF00, so any 0xFF right before a marker is fill&数据中的0xFF总是被填充为0xFF00，因此标记前紧邻的0xFF都是填充字节
+            while end > pos and self.data[end - 1] == 0xFF:
+                end -= 1
+            self.intervals.append((pos, end))
+            if marker == 0xD9:
+                self.end = match.end()
+                break
+            if not 0xD0 <= marker <= 0xD7:
+                raise ValueError("Multi-scan or unexpected marker in scan&多扫描或扫描中出现意外标记")
+            pos = match.end()
+        else:
+            raise ValueError("Missing EOI marker&缺少EOI标记")
+
+        interval = self.restart_interval or self.mcu_count
+        if len(self.intervals) != -(-self.mcu_count // interval):
+            raise ValueError("Restart markers do not match frame layout&重启标记与帧布局不符")
+
+    def interval_mcus(self, index: int) -> int:
+        """Get number of MCUs in restart interval&获取重启间隔中的MCU数量"""
+        interval = self.restart_interval or self.mcu_count
+        return min(interval, self.mcu_count - index * interval)
+
+    def decode_interval(self, index: int, start: int = 0,
+                        stop: int | None = None) -> Tuple[list, list, bytes]:
+        """
+        Decode restart interval into (MCU coefficients, MCU bit positions, unstuffed bytes)&将重启间隔解码为（MCU系数, MCU比特位置, 去填充字节）
+        Only MCUs in [start, stop) keep coefficients and positions, earlier ones are skipped and later ones
+        are not read at all; missing entries are None
+        """
+        begin, end = self.intervals[index]
+        raw = self.data[begin:end].replace(b'\xff\x00', b'\xff')
+        count = self.interval_mcus(index)
+        stop = count if stop is None else min(stop, count)
+        preds: dict = {}
+        pos = _skip_mcus(raw, start, self.decode_blocks, 0, preds)
+        mcus, positions = _decode_mcus(raw, stop - start, self.decode_blocks, pos, preds)
+        return [None] * start + mcus, [None] * start + positions, raw
+
+
+def _skip_mcus(raw: bytes, count: int, blocks: list, pos: int = 0, preds: dict | None = None) -> int:
+    """Advance over MCUs without keeping coefficients, returns end bit position&跳过MCU而不保留系数，返回结束比特位置"""
+    buf = raw + b'\x00' * 5
+    from_bytes = int.from_bytes
+
+    try:
+        for _ in range(count):
+            for comp, dc_lookup, ac_lookup in blocks:
+                byte, bit = pos >> 3, pos & 7
+                window = from_bytes(buf[byte:byte + 5], 'big')
+                size, length = dc_lookup[(window >> (24 - bit)) & 0xFFFF]
+                if size and preds is not None:
+                    # Only DC predictors matter to the MCUs decoded afterwards&只有DC预测值对之后解码的MCU有意义
+                    diff = (window >> (40 - bit - length - size)) & ((1 << size) - 1)
+                    if diff < 1 << (size - 1):
+                        diff -= (1 << size) - 1
+                    preds[comp] = preds.get(comp, 0) + diff
+                pos += length + size
+
+                k = 1
+                while k < 64:
+                    byte, bit = pos >> 3, pos & 7
+                    symbol, length = ac_lookup[(from_bytes(buf[byte:byte + 3], 'big') >> (8 - bit)) & 0xFFFF]
+                    pos += length + (symbol & 15)
+                    if symbol & 15:
+                        k += (symbol >> 4) + 1
+                        if k > 64:
+                            raise ValueError("Coefficient index out of range&系数索引越界")
+                    elif symbol == 0xF0:
+                        k += 16
+                    else:
+                        break
+    except TypeError:
+        raise ValueError("Invalid Huffman code in scan&扫描数据中存在无效哈夫曼码")
+
+    if pos > len(raw) * 8:
+        raise ValueError("Truncated scan data&扫描数据截断")
+    return pos
+
+
+def _decode_mcus(raw: bytes, count: int, blocks: list, pos: int = 0,
+                 preds: dict | None = None) -> Tuple[list, list]:
+    """Huffman decode MCUs into zigzag-ordered coefficient lists&将MCU哈夫曼解码为之字形顺序系数列表"""
+    buf = raw + b'\x00' * 5
+    from_bytes = int.from_bytes
+    preds = {} if preds is None else preds
+    mcus = []
+    positions = []
+
+    try:
+        for _ in range(count):
+            positions.append(pos)
+            mcu = []
+            for comp, dc_lookup, ac_lookup in blocks:
+                # 40-bit window covers code (<=16) plus value (<=11) at any bit phase&40位窗口可覆盖任意位相位的码字和数值
+                byte, bit = pos >> 3, pos & 7
+                window = from_bytes(buf[byte:byte + 5], 'big')
+                size, length = dc_lookup[(window >> (24 - bit)) & 0xFFFF]
+                diff = 0
+                if size:
+                    diff = (window >> (40 - bit - length - size)) & ((1 << size) - 1)
+                    if diff < 1 << (size - 1):
+                        diff -= (1 << size) - 1
+                pos += length + size
+
+                dc = preds.get(comp, 0) + diff
+                preds[comp] = dc
+                coefs = [0] * 64
+                coefs[0] = dc
+
+                k = 1
+                while k < 64:
+                    byte, bit = pos >> 3, pos & 7
+                    window = from_bytes(buf[byte:byte + 5], 'big')
+                    symbol, length = ac_lookup[(window >> (24 - bit)) & 0xFFFF]
+                    size = symbol & 15
+                    if not size:
+                        pos += length
+                        if symbol != 0xF0:
+                            break
+                        k += 16
+                        continue
+                    k += symbol >> 4
+                    if k > 63:
+                        raise ValueError("Coefficient index out of range&系数索引越界")
+                    value = (window >> (40 - bit - length - size)) & ((1 << size) - 1)
+                    if value < 1 << (size - 1):
+                        value -= (1 << size) - 1
+                    coefs[k] = value
+                    pos += length + size
+                    k += 1
+                mcu.append(coefs)
+            mcus.append(mcu)
+    except TypeError:
+        raise ValueError("Invalid Huffman code in scan&扫描数据中存在无效哈夫曼码")
+
+    if pos > len(raw) * 8:
+        raise ValueError("Truncated scan data&扫描数据截断")
+    positions.append(pos)
+    return mcus, positions
+
+
+def _encode_mcus(mcus: list, preds: dict, blocks: list) -> Tuple[int, int]:
+    """Huffman encode MCUs, returns (bits as int, bit count)&哈夫曼编码MCU，返回（比特整数, 比特数）"""
+    out = bytearray()
+    acc = 0
+    nbits = 0
+    preds = dict(preds)
+
+    try:
+        for mcu in mcus:
+            for coefs, (comp, dc_codes, ac_codes) in zip(mcu, blocks):
+                diff = coefs[0] - preds.get(comp, 0)
+                preds[comp] = coefs[0]
+                size = abs(diff).bit_length()
+                code, length = dc_codes[size]
+                acc = (acc << length) | code
+                nbits += length
+                if size:
+                    acc = (acc << size) | (diff if diff > 0 else diff + (1 << size) - 1)
+                    nbits += size
+
+                run = 0
+                for k in range(1, 64):
+                    value = coefs[k]
+                    if not value:
+                        run += 1
+                        continue
+                    while run > 15:
+                        code, length = ac_codes[0xF0]
+                        acc = (acc << length) | code
+                        nbits += length
+                        run -= 16
+                    size = abs(value).bit_length()
+                    code, length = ac_codes[(run << 4) | size]
+                    acc = (((acc << length) | code) << size) | (value if value > 0 else value + (1 << size) - 1)
+                    nbits += length + size
+                    run = 0
+                if run:
+                    code, length = ac_codes[0x00]
+                    acc = (acc << length) | code
+                    nbits += length
+
+                keep = nbits & 7
+                out += (acc >> keep).to_bytes(nbits >> 3, 'big')
+                acc &= (1 << keep) - 1
+                nbits = keep
+    except KeyError as e:
+        raise ValueError(f"Huffman table lacks symbol&哈夫曼表缺少符号: {e}")
+
+    return (int.from_bytes(out, 'big') << nbits) | acc, len(out) * 8 + nbits
+
+
+def _pack_entropy_bits(value: int, nbits: int) -> bytes:
+    """Pad bit string with 1s to byte boundary and byte-stuff&用1填充比特串至字节边界并进行字节填充"""
+    pad = -nbits % 8
+    value = (value << pad) | ((1 << pad) - 1)
+    return value.to_bytes((nbits + pad) // 8, 'big').replace(b'\xff', b'\xff\x00')
+
+
+class LosslessJpegStamper(BaselineJpeg):
+    """
+    Stamp baseline JPEGs with restart markers in the DCT domain&在DCT域为带重启标记的基线JPEG盖印
+    Only restart intervals under the watermark are Huffman decoded; only MCUs with ink are re-quantized,
+    every other byte of the scan is copied unchanged
+    """
+
+    _standard_huffman: dict | None = None
+    # Beyond this share of the scan, Huffman decoding in Python is slower than a full re-encode&超过扫描数据的此比例时，Python哈夫曼解码比完整重新编码更慢
+    MAX_SCAN_FRACTION = 0.5
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        if not self.restart_interval:
+            raise ValueError("No restart markers&没有重启标记")
+
+    @classmethod
+    def probe(cls, data: bytes) -> 'LosslessJpegStamper | None':
+        """Parse JPEG for lossless stamping, None if not eligible&解析JPEG用于无损盖印，不符合条件时返回None"""
+        try:
+            return cls(data)
+        except (ValueError, IndexError) as e:
+            logger.debug(f"Lossless stamping not applicable&无法使用无损盖印: {e}")
+            return None
+
+    def stamp(self, overlay: Image.Image, position: Tuple[int, int],
+              filter_segment: Callable[[int, bytes], bytes | None] | None = None) -> bytes:
+        """Composite RGBA overlay at position and return new JPEG bytes&在指定位置合成RGBA叠加层并返回新JPEG字节"""
+        affected = self._affected_mcus(overlay, position)
+        if not affected:
+            return self._assemble({}, filter_segment)
+
+        mcu_w, mcu_h = self.mcu_size
+        xs = [m % self.mcus_x for m in affected]
+        ys = [m // self.mcus_x for m in affected]
+        # One MCU of context keeps chroma upsampling at patch edges faithful&保留一个MCU的上下文以保证补丁边缘的色度上采样准确
+        rx0, ry0 = max(min(xs) - 1, 0), max(min(ys) - 1, 0)
+        rx1, ry1 = min(max(xs) + 2, self.mcus_x), min(max(ys) + 2, self.mcus_y)
+
+        interval = self.restart_interval
+        patch_indices = [my * self.mcus_x + mx for my in range(ry0, ry1) for mx in range(rx0, rx1)]
+        modified: dict = {}
+        for mcu in affected:
+            modified.setdefault(mcu // interval, []).append(mcu % interval)
+
+        # Decode from one MCU before the patch (DC predictor of re-encoded MCUs) to one after the
+        # last modified MCU (its DC difference changes); the rest of each interval is copied as is
+        # 从补丁前一个MCU（重新编码MCU的DC预测值）解码到最后一个被修改MCU之后的一个（其DC差值会改变），间隔其余部分原样复制
+        ranges: dict = {}
+        for mcu in patch_indices:
+            index, local = divmod(mcu, interval)
+            start, stop = ranges.get(index, (local, local + 1))
+            ranges[index] = (min(start, local), max(stop, local + 1))
+        for index, (start, stop) in ranges.items():
+            if index in modified:
+                stop = max(stop, max(modified[index]) + 2)
+            ranges[index] = (max(start - 1, 0), stop)
+
+        if sum(stop for _, stop in ranges.values()) > self.mcu_count * self.MAX_SCAN_FRACTION:
+            raise ValueError("Watermark spans most of the scan, re-encoding is faster&水印跨越大部分扫描数据，重新编码更快")
+
+        decoded = {index: self.decode_interval(index, start, stop) for index, (start, stop) in ranges.items()}
+        patch_mcus = [decoded[mcu // interval][0][mcu % interval] for mcu in patch_indices]
+
+        patch = self._decode_patch(patch_mcus, rx1 - rx0, ry1 - ry0)
+        patch.paste(overlay, (position[0] - rx0 * mcu_w, position[1] - ry0 * mcu_h), overlay)
+        stamped = self._encode_patch(patch)
+
+        for mcu in affected:
+            mx, my = mcu % self.mcus_x, mcu // self.mcus_x
+            decoded[mcu // interval][0][mcu % interval] = stamped[(my - ry0) * (rx1 - rx0) + (mx - rx0)]
+
+        replacements = {index: self._reencode_interval(index, *decoded[index], locals_)
+                        for index, locals_ in modified.items()}
+        return self._assemble(replacements, filter_segment)
+
+    def _affected_mcus(self, overlay: Image.Image, position: Tuple[int, int]) -> list:
+        """Get indices of MCUs receiving non-transparent overlay pixels&获取覆盖到非透明叠加像素的MCU索引"""
+        x, y = position
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + overlay.width, self.width), min(y + overlay.height, self.height)
+        if left >= right or top >= bottom:
+            return []
+
+        alpha = overlay.getchannel('A')
+        mcu_w, mcu_h = self.mcu_size
+        affected = []
+        for my in range(top // mcu_h, (bottom - 1) // mcu_h + 1):
+            for mx in range(left // mcu_w, (right - 1) // mcu_w + 1):
+                box = (max(mx * mcu_w, left) - x, max(my * mcu_h, top) - y,
+                       min((mx + 1) * mcu_w, right) - x, min((my + 1) * mcu_h, bottom) - y)
+                if alpha.crop(box).getbbox():
+                    affected.append(my * self.mcus_x + mx)
+        return affected
+
+    @classmethod
+    def _get_standard_huffman(cls) -> dict:
+        """Get complete standard Huffman tables as written by libjpeg&获取libjpeg写入的完整标准哈夫曼表"""
+        if cls._standard_huffman is None:
+            buffer = BytesIO()
+            Image.new('RGB', (16, 16)).save(buffer, 'JPEG', optimize=False)
+            cls._standard_huffman = BaselineJpeg(buffer.getvalue()).huffman
+        return cls._standard_huffman
+
+    def _decode_patch(self, mcus: list, mcus_x: int, mcus_y: int) -> Image.Image:
+        """Decode MCU rectangle to pixels by wrapping it in a standalone JPEG&将MCU矩形包装为独立JPEG并解码为像素"""
+        tables = self._get_standard_huffman()
+        blocks = [(c, tables[(0, min(c, 1))].codes, tables[(1, min(c, 1))].codes) for c in self.block_components]
+        value, nbits = _encode_mcus(mcus, {}, blocks)
+
+        width, height = mcus_x * self.mcu_size[0], mcus_y * self.mcu_size[1]
+        sof = bytes([8]) + height.to_bytes(2, 'big') + width.to_bytes(2, 'big') + bytes([len(self.components)])
+        sof += b''.join(bytes([cid, h << 4 | v, tq]) for cid, h, v, tq in self.components)
+        sos = bytes([len(self.components)])
+        sos += b''.join(bytes([cid, 0x00 if i == 0 else 0x11]) for i, (cid, _, _, _) in enumerate(self.components))
+        sos += b'\x00\x3f\x00'
+
+        parts = [JPEG_SOI]
+        for table_id, table in self.qtables.items():
+            parts.append(b'\xff\xdb\x00\x43' + bytes([table_id]) + bytes(table))
+        parts.append(b'\xff\xc0' + (len(sof) + 2).to_bytes(2, 'big') + sof)
+        for table_class, table_id in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            parts.append(tables[(table_class, table_id)].segment(table_class, table_id))
+        parts.append(b'\xff\xda' + (len(sos) + 2).to_bytes(2, 'big') + sos)
+        parts.append(_pack_entropy_bits(value, nbits))
+        parts.append(b'\xff\xd9')
+
+        patch = Image.open(BytesIO(b''.join(parts)))
+        return patch.convert('RGB' if len(self.components) == 3 else 'L')
+
+    def _encode_patch(self, patch: Image.Image) -> list:
+        """Re-encode stamped patch with source tables and sampling, returning its MCUs&用原图量化表和采样重新编码补丁并返回其MCU"""
+        qtables = []
+        for _, _, _, tq in self.components:
+            natural = [0] * 64
+            for k, value in enumerate(self.qtables[tq]):
+                natural[JPEG_ZIGZAG[k]] = value
+            qtables.append(natural)
+
+        options = {'qtables': qtables, 'optimize': False, 'progressive': False}
+        if self.subsampling is not None:
+            options['subsampling'] = self.subsampling
+        buffer = BytesIO()
+        patch.save(buffer, 'JPEG', **options)
+
+        encoded = BaselineJpeg(buffer.getvalue())
+        # Sampling factors of a single-component frame carry no layout&单分量帧的采样因子不影响布局
+        if ((encoded.subsampling, len(encoded.components)) != (self.subsampling, len(self.components)) or
+                any(encoded.qtables.get(e[3]) != self.qtables[s[3]]
+                    for e, s in zip(encoded.components, self.components))):
+            raise ValueError("Encoder did not reproduce source tables&编码器未能复现原图量化表")
+        return encoded.decode_interval(0)[0]
+
+    def _reencode_interval(self, index: int, mcus: list, positions: list, raw: bytes, modified: list) -> bytes:
+        """Re-encode modified MCUs of one interval, splicing original bits around them&重新编码间隔中被修改的MCU，并拼接其前后的原始比特"""
+        count = self.interval_mcus(index)
+        first = min(modified)
+        # The MCU after the last modified one needs new DC differences&最后一个被修改MCU之后的MCU需要新的DC差值
+        last = min(max(modified) + 1, count - 1)
+
+        preds = {}
+        if first:
+            for coefs, comp in zip(mcus[first - 1], self.block_components):
+                preds[comp] = coefs[0]
+        middle, middle_bits = _encode_mcus(mcus[first:last + 1], preds, self.encode_blocks)
+
+        total = len(raw) * 8
+        source = int.from_bytes(raw, 'big')
+        head, tail = positions[first], positions[last + 1]
+        end = self._interval_end(raw, positions, count, head + middle_bits - tail)
+        prefix = source >> (total - head)
+        suffix = (source >> (total - end)) & ((1 << (end - tail)) - 1)
+        value = (((prefix << middle_bits) | middle) << (end - tail)) | suffix
+        return _pack_entropy_bits(value, head + middle_bits + end - tail)
+
+    def _interval_end(self, raw: bytes, positions: list, count: int, shift: int) -> int:
+        """Get bit position where interval data ends, reading the undecoded rest only if needed&获取间隔数据的结束比特位置，仅在必要时读取未解码的剩余部分"""
+        if len(positions) == count + 1:
+            return positions[-1]
+
+        # Up to 7 trailing 1-bits may be padding; if the spliced interval packs into the same bytes
+        # for every candidate end, keeping them as data is exact
+        # 末尾至多7个1比特可能是填充；若对所有候选结束位置拼接结果的字节都相同，将其视为数据也完全等价
+        total = len(raw) * 8
+        last = bin(raw[-1]) if raw else '0'
+        ones = min(len(last) - len(last.rstrip('1')), 7, total - positions[-1])
+        if (total + shift + 7) // 8 == (total + shift - ones + 7) // 8:
+            return total
+        return _skip_mcus(raw, count + 1 - len(positions), self.decode_blocks, positions[-1])
+
+    def _assemble(self, replacements: dict,
+                  filter_segment: Callable[[int, bytes], bytes | None] | None) -> bytes:
+        """Rebuild file from header segments and (replaced) intervals&由头部段和（替换后的）间隔重建文件"""
+        parts = [JPEG_SOI]
+        for marker, start, length in self.segments:
+            segment = self.data[start - 4:start + length]
+            # Trailing MPF images are not carried over, so their index must go too&不保留尾部MPF图像，因此移除其索引
+            if marker == 0xE2 and segment.startswith(b'MPF\x00', 4):
+                continue
+            if filter_segment is not None:
+                segment = filter_segment(marker, segment)
+                if segment is None:
+                    continue
+            parts.append(segment)
+
+        # Untouched runs of intervals are copied as single slices&未改动的连续间隔作为整段切片复制
+        pos = self.scan_start
+        for index in sorted(replacements):
+            start, end = self.intervals[index]
+            parts.append(self.data[pos:start])
+            parts.append(replacements[index])
+            pos = end
+        parts.append(self.data[pos:self.end])
+        return b''.join(parts)
+
+
+# ==================== Scaled Decoding&缩放解码 ====================
+
+def fit_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Size that fits inside box keeping aspect ratio, never upscaled&保持宽高比适配到框内的尺寸，不放大"""
+    width, height = size
+    ratio = min(box[0] / width, box[1] / height, 1.0)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def draft_for_size(image: Image.Image, box: Tuple[int, int]) -> None:
+    """
+    Ask libjpeg for the smallest 1/2, 1/4 or 1/8 DCT scale still covering the fitted box&请求仍覆盖适配尺寸的最小DCT缩放比例
+    Must run before the image is loaded; no-op for non-JPEG images
+    """
+    if image.format == "JPEG":
+        image.draft("RGB", fit_size(image.size, box))
+
+
+def load_scaled_image(source: str | Path | bytes, box: Tuple[int, int]) -> Image.Image:
+    """Decode an image scaled to fit box via DCT scaling plus LANCZOS&通过DCT缩放加LANCZOS解码出适配框大小的图片"""
+    with Image.open(BytesIO(source) if isinstance(source, bytes) else source) as image:
+        draft_for_size(image, box)
+        image.thumbnail(box, Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        else:
+            image.load()
+        return image
+
+
+# ==================== Embedded Thumbnails&内嵌缩略图 ====================
+
+MPF_APP2_HEADER = b'MPF\x00'
+
+# EXIF orientation to transpose operation&EXIF方向到翻转操作的映射
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def _scan_embedded_sources(fp) -> Tuple[bytes | None, list, Tuple[int, int] | None]:
+    """
+    Find Exif payload, MPF secondary image spans and frame size in JPEG header&在JPEG头部查找Exif数据、MPF附属图像区间和画幅尺寸
+    MPF spans are (file offset, length) of the non-primary images, smallest first
+    """
+    tiff = None
+    spans = []
+    size = None
+    for marker, start, length in iter_jpeg_segments(fp):
+        if marker == 0xE1 and tiff is None and length > len(EXIF_APP1_HEADER):
+            payload = fp.read(length)
+            if payload.startswith(EXIF_APP1_HEADER):
+                tiff = payload[len(EXIF_APP1_HEADER):]
+        elif marker == 0xE2 and not spans and length > len(MPF_APP2_HEADER):
+            payload = fp.read(length)
+            if payload.startswith(MPF_APP2_HEADER):
+                base = start + len(MPF_APP2_HEADER)
+                try:
+                    spans = _read_mpf_spans(payload[len(MPF_APP2_HEADER):], base)
+                except (ValueError, struct.error) as e:
+                    logger.debug(f"Invalid MPF segment&无效的MPF段: {e}")
+        elif marker in _SOF_MARKERS and length >= 5:
+            frame = fp.read(5)
+            size = (int.from_bytes(frame[3:5], 'big'), int.from_bytes(frame[1:3], 'big'))
+            break
+    return tiff, spans, size
+
+
+def _read_mpf_spans(mpf: bytes, base: int) -> list:
+    """Parse MP entry table into (file offset, length) spans&将MP条目表解析为（文件偏移, 长度）区间"""
+    header = ExifHeader(mpf)
+    entries = header.get_value(header.ifd0, 0xB002)
+    if not isinstance(entries, bytes):
+        return []
+    spans = []
+    for pos in range(0, len(entries) - 15, 16):
+        length, offset = struct.unpack_from(header.endian + 'II', entries, pos + 4)
+        # Offset 0 is the primary image itself&偏移为0的条目是主图本身
+        if offset and length:
+            spans.append((base + offset, length))
+    return sorted(spans, key=lambda span: span[1])
+
+
+def _crop_to_aspect(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Center-crop letterboxed thumbnail to frame aspect ratio&将带黑边的缩略图居中裁剪到画幅宽高比"""
+    target = size[0] / size[1]
+    current = image.width / image.height
+    if abs(current - target) / target < 0.01:
+        return image
+    if current > target:
+        width = round(image.height * target)
+        left = (image.width - width) // 2
+        return image.crop((left, 0, left + width, image.height))
+    height = round(image.width / target)
+    top = (image.height - height) // 2
+    return image.crop((0, top, image.width, top + height))
+
+
+def _decode_embedded(data: bytes, frame_size: Tuple[int, int] | None,
+                     box: Tuple[int, int]) -> Image.Image | None:
+    """Decode embedded JPEG if it still covers box after aspect crop&若裁剪后仍覆盖目标框则解码内嵌JPEG"""
+    with Image.open(BytesIO(data)) as image:
+        if frame_size:
+            target = fit_size(frame_size, box)
+            scale = min(image.width / frame_size[0], image.height / frame_size[1])
+            if frame_size[0] * scale + 1 < target[0] or frame_size[1] * scale + 1 < target[1]:
+                return None
+        # Double box leaves headroom for the aspect crop&双倍目标尺寸为宽高比裁剪留出余量
+        draft_for_size(image, (box[0] * 2, box[1] * 2))
+        image = image.convert("RGB")
+    if frame_size:
+        image = _crop_to_aspect(image, frame_size)
+    image.thumbnail(box, Image.Resampling.LANCZOS)
+    return image
+
+
+def load_embedded_thumbnail(source: str | Path,
+                            box: Tuple[int, int]) -> Tuple[Image.Image | None, int | None]:
+    """
+    Load the smallest embedded IFD1/MPF preview that covers box&加载覆盖目标框的最小内嵌IFD1/MPF预览图
+    Returns (image or None, EXIF orientation); the image is not yet oriented
+    """
+    with open(source, 'rb') as fp:
+        if fp.read(2) != JPEG_SOI:
+            return None, None
+        fp.seek(0)
+        tiff, spans, frame_size = _scan_embedded_sources(fp)
+
+        orientation = None
+        candidates = []
+        if tiff:
+            try:
+                header = ExifHeader(tiff)
+                orientation = header.get_orientation()
+                thumb = header.get_thumbnail()
+                if thumb:
+                    candidates.append(thumb)
+            except (ValueError, struct.error) as e:
+                logger.debug(f"Invalid EXIF block&无效的EXIF块 [{source}]: {e}")
+
+        # MPF previews are read only when IFD1 is too small&仅在IFD1过小时读取MPF预览
+        for data in itertools.chain(candidates, _read_spans(fp, spans)):
+            try:
+                image = _decode_embedded(data, frame_size, box)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Embedded thumbnail unreadable&内嵌缩略图无法读取 [{source}]: {e}")
+                continue
+            if image is not None:
+                return image, orientation
+    return None, orientation
+
+
+def _read_spans(fp, spans: list) -> Iterator[bytes]:
+    """Lazily read JPEG byte spans from file&从文件按需读取JPEG字节区间"""
+    for offset, length in spans:
+        fp.seek(offset)
+        data = fp.read(length)
+        if data.startswith(JPEG_SOI):
+            yield data
+
+
+def load_thumbnail(source: str | Path, box: Tuple[int, int]) -> Image.Image:
+    """
+    Oriented thumbnail from embedded preview, falling back to scaled decode&优先使用内嵌预览生成已校正方向的缩略图，否则缩放解码
+    """
+    try:
+        image, orientation = load_embedded_thumbnail(source, box)
+    except OSError as e:
+        logger.debug(f"Embedded thumbnail lookup failed&查找内嵌缩略图失败 [{source}]: {e}")
+        image, orientation = None, None
+    if image is None:
+        image = load_scaled_image(source, box)
+    transpose = _ORIENTATION_TRANSPOSE.get(orientation)
+    return image.transpose(transpose) if transpose is not None else image
+
+
+# ==================== Caches&缓存 ====================
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and optional total cost&线程安全的LRU缓存，按条目数和可选总开销限制"""
+
+    def __init__(self, max_entries: int = 128, max_cost: int | None = None):
+        self.max_entries = max_entries
+        self.max_cost = max_cost
+        self._data: OrderedDict = OrderedDict()
+        self._cost = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get value and mark as recently used&获取值并标记为最近使用"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            self._data.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value, cost: int = 1) -> None:
+        """Insert value, evicting least recently used entries over limits&插入值，超限时淘汰最久未使用条目"""
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._cost -= old[1]
+            if self.max_cost is not None and cost > self.max_cost:
+                # Never flush the whole cache for one oversized entry&不为单个超大条目清空整个缓存
+                return
+            self._data[key] = (value, cost)
+            self._cost += cost
+            while self._data and (len(self._data) > self.max_entries or
+                                  (self.max_cost is not None and self._cost > self.max_cost)):
+                _, (_, evicted_cost) = self._data.popitem(last=False)
+                self._cost -= evicted_cost
+
+    def pop(self, key, default=None):
+        """Remove and return value&移除并返回值"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return default
+            self._cost -= item[1]
+            return item[0]
+
+    def clear(self) -> None:
+        """Remove all entries&清空所有条目"""
+        with self._lock:
+            self._data.clear()
+            self._cost = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+
+class MetadataCache:
+    """
+    Persistent image metadata cache validated by size and mtime&以文件大小和修改时间校验的持久化图片元数据缓存
+    Writes are queued and committed in chunks; a read-only cache keeps them queued for its owner to drain
+    """
+
+    # Only refresh LRU access time when older than this (seconds)&访问时间早于此值（秒）才刷新
+    TOUCH_INTERVAL = 3600
+    EVICT_CHECK_INTERVAL = 512
+    QUERY_CHUNK = 500
+    # Queued writes that trigger a flush&触发写入的排队条目数
+    WRITE_CHUNK = 256
+
+    def __init__(self, db_path: str = SS_METADATA_FILE, max_entries: int = 200000,
+                 read_only: bool = False):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._writes = 0
+        # Queued writes as {key: ((size, mtime_ns), metadata)}&排队的写入，{键: ((大小, 修改时间纳秒), 元数据)}
+        self._pending: dict = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open connection lazily, reopening after fork&延迟打开连接，fork后重新打开"""
+        if self.read_only:
+            if self._conn is None or self._pid != os.getpid():
+                self._conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                             timeout=10, check_same_thread=False)
+                self._pid = os.getpid()
+            return self._conn
+        if self._conn is None or self._pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "capture_time TEXT, orientation INTEGER, width INTEGER, height INTEGER, "
+                "last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_metadata_access ON metadata(last_access)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+            self._evict(conn)
+        return self._conn
+
+    @staticmethod
+    def _key(path: str | Path) -> str:
+        """Normalize path into cache key&将路径规范化为缓存键"""
+        return os.path.abspath(str(path))
+
+    @staticmethod
+    def _stat(path: str) -> Tuple[int, int] | None:
+        """Get (size, mtime_ns), None if file is gone&获取（大小, 修改时间纳秒），文件不存在时返回None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _row_to_entry(capture_time, orientation, width, height) -> dict:
+        """Convert row columns to metadata dict, omitting unknown fields&将行数据转为元数据字典，省略未知字段"""
+        entry = {}
+        if capture_time is not None:
+            entry['capture_time'] = datetime.fromisoformat(capture_time) if capture_time else None
+        if orientation is not None:
+            entry['orientation'] = orientation
+        if width is not None and height is not None:
+            entry['width'] = width
+            entry['height'] = height
+        return entry
+
+    def get(self, path: str | Path) -> dict | None:
+        """Get fresh metadata for one file&获取单个文件的有效元数据"""
+        return self.get_many([path]).get(str(path))
+
+    def get_many(self, paths: list) -> dict:
+        """Get fresh metadata for many files as {path: entry}&批量获取有效元数据，返回{路径: 条目}"""
+        keyed = {}
+        for path in paths:
+            key = self._key(path)
+            stat = self._stat(key)
+            if stat is not None:
+                keyed[key] = (str(path), stat)
+
+        found = {}
+        touched = []
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                keys = list(keyed)
+                for i in range(0, len(keys), self.QUERY_CHUNK):
+                    chunk = keys[i:i + self.QUERY_CHUNK]
+                    rows = conn.execute(
+                        "SELECT path, size, mtime_ns, capture_time, orientation, width, height, last_access "
+                        f"FROM metadata WHERE path IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    for key, size, mtime_ns, capture_time, orientation, width, height, last_access in rows:
+                        original, stat = keyed[key]
+                        if (size, mtime_ns) != stat:
+                            continue
+                        found[original] = self._row_to_entry(capture_time, orientation, width, height)
+                        if now - last_access > self.TOUCH_INTERVAL:
+                            touched.append((now, key))
+                if touched and not self.read_only:
+                    conn.executemany("UPDATE metadata SET last_access = ? WHERE path = ?", touched)
+                    conn.commit()
+        except (sqlite3.Error, ValueError) as e:
+            logger.debug(f"Metadata cache read failed&元数据缓存读取失败: {e}")
+
+        # Queued writes are newer than stored rows&排队的写入比已存储的行更新
+        with self._lock:
+            for key, (original, stat) in keyed.items():
+                pending = self._pending.get(key)
+                if pending is not None and pending[0] == stat:
+                    found[original] = {**found.get(original, {}), **pending[1]}
+        return found
+
+    def put(self, path: str | Path, metadata: dict) -> None:
+        """Queue metadata for one file, flushed once WRITE_CHUNK writes are queued&排队单个文件的元数据，累计WRITE_CHUNK条后写入"""
+        with self._lock:
+            self._queue(path, metadata)
+            if not self.read_only and len(self._pending) >= self.WRITE_CHUNK:
+                self.flush()
+
+    def put_many(self, entries: dict) -> None:
+        """Store or merge metadata for many files&批量存储或合并元数据"""
+        with self._lock:
+            for path, metadata in entries.items():
+                self._queue(path, metadata)
+            if not self.read_only:
+                self.flush()
+
+    def _queue(self, path: str | Path, metadata: dict) -> None:
+        """Queue metadata, merging with a queued entry of the same file version&排队元数据，与同一文件版本的已排队条目合并"""
+        key = self._key(path)
+        stat = self._stat(key)
+        if stat is None:
+            return
+        pending = self._pending.get(key)
+        if pending is not None and pending[0] == stat:
+            metadata = {**pending[1], **metadata}
+        self._pending[key] = (stat, dict(metadata))
+
+    def drain(self) -> dict:
+        """Take queued writes as {path: metadata}, used to hand them to a writable cache&取出排队的写入，用于交给可写缓存"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return {key: metadata for key, (_, metadata) in pending.items()}
+
+    def flush(self) -> None:
+        """Write queued entries with one commit per chunk&以每块一次提交写入排队条目"""
+        if self.read_only:
+            return
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                conn = self._connection()
+                keys = list(pending)
+                now = time.time()
+                for i in range(0, len(keys), self.QUERY_CHUNK):
+                    chunk = keys[i:i + self.QUERY_CHUNK]
+                    existing = {
+                        row[0]: row[1:]
+                        for row in conn.execute(
+                            "SELECT path, size, mtime_ns, capture_time, orientation, width, height "
+                            f"FROM metadata WHERE path IN ({','.join('?' * len(chunk))})",
+                            chunk
+                        )
+                    }
+                    rows = []
+                    for key in chunk:
+                        stat, metadata = pending[key]
+                        stored = existing.get(key)
+                        merged = self._row_to_entry(*stored[2:]) if stored and stored[:2] == stat else {}
+                        merged.update(metadata)
+                        capture_time = None
+                        if 'capture_time' in merged:
+                            capture_time = merged['capture_time'].isoformat() if merged['capture_time'] else ''
+                        rows.append((key, stat[0], stat[1], capture_time, merged.get('orientation'),
+                                     merged.get('width'), merged.get('height'), now))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO metadata "
+                        "(path, size, mtime_ns, capture_time, orientation, width, height, last_access) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    conn.commit()
+                self._writes += len(keys)
+                if self._writes >= self.EVICT_CHECK_INTERVAL:
+                    self._writes = 0
+                    self._evict(conn)
+            except (sqlite3.Error, ValueError) as e:
+                logger.debug(f"Metadata cache write failed&元数据缓存写入失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries beyond capacity&淘汰超出容量的最久未使用条目"""
+        count = conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM metadata WHERE path IN "
+                "(SELECT path FROM metadata ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            conn.commit()
+            logger.info(f"Evicted {excess} metadata cache entries&已淘汰 {excess} 条元数据缓存")
+
+
+_metadata_cache: MetadataCache | None = None
+_metadata_cache_lock = threading.Lock()
+
+
+def get_metadata_cache(config: dict | None = None, read_only: bool = False) -> MetadataCache | None:
+    """
+    Get process-wide metadata cache, None if disabled&获取进程级元数据缓存，禁用时返回None
+    read_only only applies when the cache is first created, as in pool workers
+    """
+    global _metadata_cache
+    cache_config = (config or {}).get('cache', {})
+    if not cache_config.get('metadata_enabled', True):
+        return None
+
+    max_entries = cache_config.get('metadata_max_entries', 200000)
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache(max_entries=max_entries, read_only=read_only)
+            atexit.register(_metadata_cache.flush)
+        else:
+            _metadata_cache.max_entries = max_entries
+    return _metadata_cache
+
+
+class ThumbnailCache:
+    """
+    On-disk JPEG cache for thumbnails and previews keyed by path, size, mtime and variant&以路径、大小、修改时间和变体为键的磁盘JPEG缓存
+    Writes are atomic via os.replace, so concurrent writers and readers never see partial files;
+    file mtime doubles as LRU access time for eviction
+    """
+
+    # Only refresh access time when older than this (seconds)&访问时间早于此值（秒）才刷新
+    TOUCH_INTERVAL = 3600
+    # Evict down to this fraction of the budget&淘汰至预算的此比例
+    EVICT_TARGET = 0.9
+
+    def __init__(self, directory: str = SS_THUMBNAIL_DIR, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: int | None = None
+
+    def _entry_path(self, path: str | Path, variant: str) -> Path | None:
+        """Content-addressed entry location, None if source is gone&基于内容寻址的条目路径，源文件不存在时返回None"""
+        source = MetadataCache._key(path)
+        stat = MetadataCache._stat(source)
+        if stat is None:
+            return None
+        digest = hashlib.sha1(f"{source}|{stat[0]}|{stat[1]}|{variant}".encode('utf-8')).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.jpg"
+
+    def get(self, path: str | Path, variant: str) -> bytes | None:
+        """Read cached bytes and refresh access time&读取缓存数据并刷新访问时间"""
+        entry = self._entry_path(path, variant)
+        if entry is None:
+            return None
+        try:
+            with open(entry, 'rb') as fp:
+                data = fp.read()
+                mtime = os.fstat(fp.fileno()).st_mtime
+            if time.time() - mtime > self.TOUCH_INTERVAL:
+                os.utime(entry)
+        except OSError:
+            return None
+        return data
+
+    def put(self, path: str | Path, variant: str, data: bytes) -> None:
+        """Atomically write entry, evicting when over budget&原子写入条目，超出预算时淘汰"""
+        entry = self._entry_path(path, variant)
+        if entry is None or not data:
+            return
+        tmp = None
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp, entry)
+        except OSError as e:
+            logger.debug(f"Thumbnail cache write failed&缩略图缓存写入失败: {e}")
+            if tmp:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._scan())
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def get_or_create(self, path: str | Path, variant: str, factory: Callable[[], bytes]) -> bytes:
+        """Return cached bytes or build, store and return them&返回缓存数据，未命中时生成并写入"""
+        data = self.get(path, variant)
+        if data is None:
+            data = factory()
+            self.put(path, variant, data)
+        return data
+
+    def _scan(self) -> list:
+        """List (mtime, size, path) of cache entries&列出缓存条目的（修改时间, 大小, 路径）"""
+        entries = []
+        for shard in _scan_entries(str(self.directory), sort=False):
+            for entry in _scan_entries(shard.path, sort=False):
+                # Skip in-flight temporary files of other writers&跳过其他写入者尚未完成的临时文件
+                if not entry.name.endswith('.jpg'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least recently used entries down to target size&删除最久未使用的条目直至目标大小"""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.EVICT_TARGET
+        removed = 0
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total = total
+        if removed:
+            logger.info(f"Evicted {removed} thumbnail cache entries&已淘汰 {removed} 个缩略图缓存条目")
+
+
+_thumbnail_cache: ThumbnailCache | None = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache(config: dict | None = None) -> ThumbnailCache | None:
+    """Get process-wide thumbnail cache, None if disabled&获取进程级缩略图缓存，禁用时返回None"""
+    global _thumbnail_cache
+    cache_config = (config or {}).get('cache', {})
+    if not cache_config.get('thumbnail_enabled', True):
+        return None
+
+    max_bytes = int(cache_config.get('thumbnail_max_mb', 256)) * 1024 * 1024
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache(max_bytes=max_bytes)
+        else:
+            _thumbnail_cache.max_bytes = max_bytes
+    return _thumbnail_cache
+
+
+class FontRegistry:
+    """Process-wide registry of loaded fonts with LRU eviction&进程级已加载字体注册表（LRU淘汰）"""
+
+    _fonts = LRUCache(max_entries=64)
+    _paths = LRUCache(max_entries=256)
+    _style_managers: dict = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def resolve(cls, fonts_dir: str | Path, font: dict) -> Path | None:
+        """Resolve style font section to path, cached per fonts directory&解析样式字体配置为路径，按字体目录缓存"""
+        key = (str(fonts_dir), font.get('file', 'Courier-Prime.ttf'), font.get('family'),
+               font.get('weight'), bool(font.get('italic', False)))
+        cached = cls._paths.get(key, False)
+        if cached is not False:
+            return cached
+
+        with cls._lock:
+            style_manager = cls._style_managers.get(key[0])
+            if style_manager is None:
+                style_manager = StyleManager(fonts_dir=key[0])
+                cls._style_managers[key[0]] = style_manager
+
+        font_path = style_manager.resolve_font(font)
+        cls._paths.put(key, font_path)
+        return font_path
+
+    @classmethod
+    def get_font(cls, fonts_dir: str | Path, font: dict, size: int) -> ImageFont.FreeTypeFont:
+        """Get loaded font by (resolved path, size)&按（解析后路径, 字号）获取已加载字体"""
+        font_path = cls.resolve(fonts_dir, font)
+        key = (str(font_path) if font_path else None, size)
+
+        loaded = cls._fonts.get(key)
+        if loaded is not None:
+            return loaded
+
+        try:
+            if font_path and font_path.exists():
+                loaded = ImageFont.truetype(str(font_path), size)
+            else:
+                loaded = ImageFont.load_default()
+                logger.warning(f"Using system default font instead of&使用系统默认字体替代: {font.get('file')}")
+        except Exception as e:
+            logger.error(f"Failed to load font&加载字体失败: {e}")
+            loaded = ImageFont.load_default()
+
+        cls._fonts.put(key, loaded)
+        return loaded
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop all cached fonts and resolved paths&清空所有缓存的字体和路径"""
+        cls._fonts.clear()
+        cls._paths.clear()
+        with cls._lock:
+            cls._style_managers.clear()
+
 
 class TimeExtractor:
     """Time Extractor&时间提取器"""
 
     def __init__(self, primary: str = "exif",
                  fallback_mode: str = "error",
-                 custom_time: str = ""):
+                 custom_time: str = "",
+                 metadata_cache: MetadataCache | None = None):
         self.primary = primary
         self.fallback_mode = fallback_mode
         self.custom_time = custom_time
+        self.metadata_cache = metadata_cache
 
-    def extract(self, image_path: str | Path) -> datetime:
-        """Extract time information from image&从图片提取时间信息"""
+    def extract(self, image_path: str | Path, data: bytes | None = None) -> datetime:
+        """Extract time information from image, reusing already read bytes if given&从图片提取时间信息，可复用已读取的字节"""
         image_path = Path(image_path)
 
         if self.primary == "exif":
-            exif_time = self.get_exif_datetime(image_path)
+            exif_time = self.get_exif_datetime(image_path, data)
             if exif_time:
                 return exif_time
 
@@ -388,28 +2124,32 @@ class TimeExtractor:
         else:
             return self.get_file_datetime(image_path, self.primary)
 
-    def get_exif_datetime(self, image_path: Path) -> datetime | None:
+    def get_exif_datetime(self, image_path: Path, data: bytes | None = None) -> datetime | None:
         """Read EXIF capture time&读取EXIF拍摄时间"""
+        if self.metadata_cache is not None:
+            entry = self.metadata_cache.get(image_path)
+            if entry is not None and 'capture_time' in entry:
+                return entry['capture_time']
+        try:
+            metadata = read_image_metadata(data if data is not None else image_path)
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(image_path, metadata)
+            return metadata['capture_time']
+        except Exception as e:
+            logger.debug(f"Fast EXIF read failed, falling back to piexif&快速EXIF读取失败，回退到piexif [{image_path.name}]: {e}")
+
         try:
-            exif_dict = piexif.load(str(image_path))
-
-            if piexif.ExifIFD.DateTimeOriginal in exif_dict.get("Exif", {}):
-                dt_str = exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal]
-                if isinstance(dt_str, bytes):
-                    dt_str = dt_str.decode('utf-8')
-                return datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
-
-            if piexif.ExifIFD.DateTimeDigitized in exif_dict.get("Exif", {}):
-                dt_str = exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized]
-                if isinstance(dt_str, bytes):
-                    dt_str = dt_str.decode('utf-8')
-                return datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
-
-            if piexif.ImageIFD.DateTime in exif_dict.get("0th", {}):
-                dt_str = exif_dict["0th"][piexif.ImageIFD.DateTime]
-                if isinstance(dt_str, bytes):
-                    dt_str = dt_str.decode('utf-8')
-                return datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
+            exif_dict = piexif.load(data if data is not None else str(image_path))
+
+            exif_ifd = exif_dict.get("Exif", {})
+            for date_tag, subsec_tag, ifd_name in _EXIF_DATE_TAGS:
+                ifd = exif_ifd if ifd_name == 'exif' else exif_dict.get("0th", {})
+                if date_tag in ifd:
+                    dt_str = ifd[date_tag]
+                    if isinstance(dt_str, bytes):
+                        dt_str = dt_str.decode('utf-8')
+                    dt = datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
+                    return _apply_subsec(dt, exif_ifd.get(subsec_tag))
 
             return None
 
@@ -434,55 +2174,111 @@ class TimeExtractor:
 class WatermarkRenderer:
     """Watermark Renderer&水印渲染器"""
 
+    # Rasterized text+shadow overlays shared by all renderers&所有渲染器共享的文字+阴影光栅化叠加层
+    _overlay_cache = LRUCache(max_entries=256, max_cost=64 * 1024 * 1024)
+
     def __init__(self, style: dict, fonts_dir: Path):
         self.style = style or {}
         self.fonts_dir = fonts_dir
-        self._font_cache: dict = {}
 
-    def render(self, image: Image.Image, timestamp: datetime) -> Image.Image:
-        """Render watermark on image and return new image&在图片上渲染水印并返回新图片"""
+    def render(self, image: Image.Image, timestamp: datetime, in_place: bool = False) -> Image.Image:
+        """
+        Render watermark on image&在图片上渲染水印
+        With in_place, an RGB image owned by the caller is stamped directly instead of copied;
+        only the watermark box is touched either way
+        """
         if image.mode != 'RGB':
-            image = image.convert('RGB')
+            result = image.convert('RGB')
+        elif in_place:
+            result = image
+        else:
+            result = image.copy()
 
-        result = image.copy()
-        draw = ImageDraw.Draw(result)
+        overlay, position = self.get_placement(result.size, timestamp)
+        # Masked paste blends within overlay box only&带蒙版粘贴仅在叠加层范围内混合
+        result.paste(overlay, position, overlay)
 
-        font_size = self._calculate_font_size(image.size)
-        font = self._get_font(font_size)
+        return result
 
+    def get_placement(self, image_size: Tuple[int, int], timestamp: datetime) -> tuple:
+        """Get RGBA overlay and its top-left position for image size&获取指定图片尺寸下的RGBA叠加层及其左上角位置"""
+        font_size = self._calculate_font_size(image_size)
         text = self._format_timestamp(timestamp)
 
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-
-        x, y = self._calculate_position(image.size, (text_width, text_height))
+        overlay, (offset_x, offset_y), text_size = self._get_overlay(text, font_size)
+        x, y = self._calculate_position(image_size, text_size)
+        return overlay, (x + offset_x, y + offset_y)
 
+    def _get_overlay(self, text: str, font_size: int) -> tuple:
+        """
+        Get cached RGBA overlay of text over shadow&获取缓存的文字叠加阴影RGBA图层
+        Returns (overlay, offset from text origin, text size)
+        """
         effects = self.style.get('effects', {})
-        if effects.get('shadow_enabled', True):
-            shadow_color = self._parse_color(
-                self.style.get('color', {}).get('shadow', '#000000'),
-                effects.get('shadow_opacity', 0.3)
-            )
+        color_config = self.style.get('color', {})
+        shadow_enabled = effects.get('shadow_enabled', True)
+        shadow_offset = (0, 0)
+        if shadow_enabled:
             scale = font_size / 30
-            offset_x = int(effects.get('shadow_offset_x', 2) * scale)
-            offset_y = int(effects.get('shadow_offset_y', 2) * scale)
-            draw.text((x + offset_x, y + offset_y), text, font=font, fill=shadow_color)
+            shadow_offset = (int(effects.get('shadow_offset_x', 2) * scale),
+                             int(effects.get('shadow_offset_y', 2) * scale))
 
-        text_color = self._parse_color(
-            self.style.get('color', {}).get('text', '#FF6B35'),
-            effects.get('opacity', 1.0)
+        opacity = self._clamp_opacity(effects.get('opacity', 1.0))
+        shadow_opacity = self._clamp_opacity(
+            color_config.get('shadow_opacity', effects.get('shadow_opacity', 1.0))
         )
-        draw.text((x, y), text, font=font, fill=text_color)
+        text_color = self._parse_color(color_config.get('text', '#FF6B35'), opacity)
+        shadow_color = self._parse_color(color_config.get('shadow', '#000000'), opacity * shadow_opacity)
+        font_path = FontRegistry.resolve(self.fonts_dir, self.style.get('font', {}))
+        cache_key = (str(font_path), font_size, text, text_color,
+                     shadow_color if shadow_enabled else None, shadow_offset)
+
+        cached = self._overlay_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        font = self._get_font(font_size)
+        left, top, right, bottom = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+        shadow_x, shadow_y = shadow_offset
+
+        # Overlay box relative to text origin, covering text and shadow ink
+        box_left = left + min(0, shadow_x)
+        box_top = top + min(0, shadow_y)
+        size = (right - left + abs(shadow_x), bottom - top + abs(shadow_y))
+
+        # Draw masks at layer alpha so opacity scales coverage&以图层透明度绘制蒙版
+        overlay = Image.new('RGBA', size, text_color[:3] + (0,))
+        if shadow_enabled:
+            shadow_mask = Image.new('L', size, 0)
+            ImageDraw.Draw(shadow_mask).text((shadow_x - box_left, shadow_y - box_top), text,
+                                             font=font, fill=shadow_color[3])
+            shadow_layer = Image.new('RGBA', size, shadow_color[:3] + (0,))
+            shadow_layer.putalpha(shadow_mask)
+            overlay = shadow_layer
+
+        text_mask = Image.new('L', size, 0)
+        ImageDraw.Draw(text_mask).text((-box_left, -box_top), text, font=font, fill=text_color[3])
+        text_layer = Image.new('RGBA', size, text_color[:3] + (0,))
+        text_layer.putalpha(text_mask)
+        overlay = Image.alpha_composite(overlay, text_layer)
+
+        result = (overlay, (box_left, box_top), (right - left, bottom - top))
+        self._overlay_cache.put(cache_key, result, cost=size[0] * size[1] * 4)
         return result
 
     def render_preview(self, image: Image.Image, timestamp: datetime,
-                       preview_size: Tuple[int, int]) -> Image.Image:
+                       preview_size: Tuple[int, int], in_place: bool = False) -> Image.Image:
         """Render thumbnail with watermark for preview&渲染用于预览的缩略图（带水印）"""
-        watermarked = self.render(image, timestamp)
+        watermarked = self.render(image, timestamp, in_place)
+        return self.scale_preview(watermarked, preview_size)
+
+    @staticmethod
+    def scale_preview(image: Image.Image, preview_size: Tuple[int, int]) -> Image.Image:
+        """Downscale image to fit preview size as new image&将图片缩放到预览尺寸内并返回新图片"""
+        if image.width <= preview_size[0] and image.height <= preview_size[1]:
+            return image.copy()
 
-        img_ratio = watermarked.width / watermarked.height
+        img_ratio = image.width / image.height
         preview_ratio = preview_size[0] / preview_size[1]
 
         if img_ratio > preview_ratio:
@@ -492,7 +2288,7 @@ class WatermarkRenderer:
             new_height = preview_size[1]
             new_width = int(new_height * img_ratio)
 
-        preview = watermarked.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        preview = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
         return preview
 
     def _calculate_font_size(self, image_size: Tuple[int, int]) -> int:
@@ -542,25 +2338,15 @@ class WatermarkRenderer:
 
     def _get_font(self, size: int) -> ImageFont.FreeTypeFont:
         """Get font object&获取字体对象"""
-        font_file = self.style.get('font', {}).get('file', 'Courier-Prime.ttf')
-        cache_key = f"{font_file}_{size}"
+        return FontRegistry.get_font(self.fonts_dir, self.style.get('font', {}), size)
 
-        if cache_key in self._font_cache:
-            return self._font_cache[cache_key]
-
-        font_path = StyleManager(fonts_dir=str(self.fonts_dir)).get_font_path(font_file)
+    @staticmethod
+    def _clamp_opacity(value) -> float:
+        """Clamp opacity setting into [0, 1]&将不透明度限制在[0, 1]范围内"""
         try:
-            if font_path and font_path.exists():
-                font = ImageFont.truetype(str(font_path), size)
-            else:
-                font = ImageFont.load_default()
-                logger.warning(f"Using system default font instead of&使用系统默认字体替代: {font_file}")
-        except Exception as e:
-            logger.error(f"Failed to load font&加载字体失败: {e}")
-            font = ImageFont.load_default()
-
-        self._font_cache[cache_key] = font
-        return font
+            return min(max(float(value), 0.0), 1.0)
+        except (TypeError, ValueError):
+            return 1.0
 
     def _parse_color(self, color_str: str, opacity: float = 1.0) -> tuple:
         """Parse color string to RGBA tuple&解析颜色字符串为RGBA元组"""
@@ -582,17 +2368,60 @@ class WatermarkRenderer:
         return (r, g, b, a)
 
 
+class ImageJob:
+    """Per-image job record shared by all processing stages&各处理阶段共享的单图任务记录"""
+
+    __slots__ = ('path', 'index', 'data', 'timestamp', 'size',
+                 'image', 'output_path', 'encoded', 'error',
+                 'encode_seconds', 'output_bytes', 'source_jpeg', 'lossless')
+
+    def __init__(self, path: str | Path, index: int = 1):
+        self.path = Path(path)
+        self.index = index
+        self.data: bytes | None = None
+        self.timestamp: datetime | None = None
+        self.size: Tuple[int, int] | None = None
+        self.image: Image.Image | None = None
+        self.output_path: Path | None = None
+        self.encoded: bytes | None = None
+        self.error: Exception | None = None
+        self.encode_seconds = 0.0
+        self.output_bytes = 0
+        self.source_jpeg: dict | None = None
+        self.lossless: LosslessJpegStamper | None = None
+
+    def encode_stats(self) -> Tuple[float, int]:
+        """Get (encode seconds, output bytes)&获取（编码耗时秒数, 输出字节数）"""
+        return self.encode_seconds, self.output_bytes
+
+
 class ImageProcessor:
     """Image Processor&图片处理器"""
 
+    # JPEG encoder settings per output.encode_profile&各输出编码档位的JPEG编码参数
+    ENCODE_PROFILES = {
+        "fast": {"optimize": False, "progressive": False, "subsampling": "4:2:0"},
+        "balanced": {"optimize": True, "progressive": False, "subsampling": "4:2:0"},
+        "smallest": {"optimize": True, "progressive": True, "subsampling": "4:2:0"},
+        # Source qtables/subsampling are filled in per image, balanced for non-JPEG input
+        # 逐图填入原图量化表/色度采样，非JPEG输入使用balanced
+        "match_source": {"optimize": True, "progressive": False},
+        # DCT-domain stamping for baseline JPEGs with restart markers, match_source otherwise
+        # 对带重启标记的基线JPEG在DCT域盖印，否则按match_source处理
+        "lossless": {"optimize": True, "progressive": False},
+    }
+    DEFAULT_ENCODE_PROFILE = "balanced"
+
     def __init__(self, config: dict, style_manager: StyleManager):
         self.config = config
         self.style_manager = style_manager
         time_config = config.get('time_source', {})
+        self.metadata_cache = get_metadata_cache(config)
         self.time_extractor = TimeExtractor(
             primary=time_config.get('primary', 'exif'),
             fallback_mode=time_config.get('fallback_mode', 'error'),
-            custom_time=time_config.get('custom_time', '')
+            custom_time=time_config.get('custom_time', ''),
+            metadata_cache=self.metadata_cache
         )
 
     def process(self, input_path: str, style_name: str,
@@ -602,30 +2431,230 @@ class ImageProcessor:
 
         try:
             style = self.style_manager.load_style(style_name)
-            image = Image.open(input_path)
-            timestamp = self.time_extractor.extract(input_path)
+            job = self.open_job(input_path)
+            self.parse_job(job)
+            self.decode_job(job)
+            if output_path is not None:
+                job.output_path = Path(output_path)
+            return self.finish_job(job, style)
 
+        except Exception as e:
+            logger.error(f"Processing failed&处理失败 [{input_path.name}]: {e}")
+            raise
+
+    # ---------- Job stages&任务阶段 ----------
+
+    def open_job(self, input_path: str | Path, index: int = 1) -> ImageJob:
+        """Create job and read source bytes once&创建任务并一次性读取源文件字节"""
+        job = ImageJob(input_path, index)
+        job.data = self.read_source(job.path)
+        return job
+
+    def parse_job(self, job: ImageJob) -> None:
+        """Resolve timestamp from job bytes header&从任务字节头部确定时间戳"""
+        job.timestamp = self.time_extractor.extract(job.path, job.data)
+
+    def decode_job(self, job: ImageJob) -> None:
+        """Decode job bytes into image, or only parse its layout for lossless stamping&将任务字节解码为图片，无损盖印时仅解析结构"""
+        if self.get_encode_profile(self.config) == 'lossless':
+            job.lossless = LosslessJpegStamper.probe(job.data)
+            if job.lossless is not None:
+                job.size = job.lossless.size
+                return
+
+        job.image = self.decode(job.data)
+        job.size = job.image.size
+        job.source_jpeg = self.get_source_jpeg(job.image)
+
+    def render_job(self, job: ImageJob, style: dict) -> None:
+        """Render watermark onto job image in place&在任务图片上原地渲染水印"""
+        if job.lossless is not None:
+            if self.stamp_lossless(job, style):
+                return
+            job.image = self.decode(job.data)
+            job.source_jpeg = self.get_source_jpeg(job.image)
+        job.image = self.render(job.image, job.timestamp, style, in_place=True)
+
+    def stamp_lossless(self, job: ImageJob, style: dict) -> bool:
+        """Stamp and encode job in the DCT domain, False if it must be re-encoded&在DCT域盖印并编码任务，需要重新编码时返回False"""
+        start = time.perf_counter()
+        try:
             renderer = WatermarkRenderer(style, self.style_manager.fonts_dir)
-            result = renderer.render(image, timestamp)
+            overlay, position = renderer.get_placement(job.size, job.timestamp)
+            job.encoded = job.lossless.stamp(overlay, position, self._filter_metadata_segment)
+        except ValueError as e:
+            logger.info(f"Lossless stamping unavailable, re-encoding&无法无损盖印，改为重新编码 [{job.path.name}]: {e}")
+            job.lossless = None
+            return False
+        finally:
+            job.encode_seconds = time.perf_counter() - start
+        job.output_bytes = len(job.encoded)
+        return True
+
+    def _filter_metadata_segment(self, marker: int, segment: bytes) -> bytes | None:
+        """
+        Apply EXIF settings to a metadata segment carried into the output&对带入输出的元数据段应用EXIF设置
+        Shared by lossless stamping and re-encoding: preserve_exif only governs Exif/XMP, the ICC profile is always kept
+        """
+        if marker != 0xE1:
+            return segment
+        output_config = self.config.get('output', {})
+        if not output_config.get('preserve_exif', True):
+            return None if segment.startswith((EXIF_APP1_HEADER, XMP_APP1_HEADER), 4) else segment
 
-            if output_path is None:
-                output_path = self.generate_output_path(input_path, timestamp)
-            output_path = Path(output_path)
+        drop_thumbnail = output_config.get('exif_strip_thumbnail', False)
+        software = output_config.get('exif_software', '')
+        if drop_thumbnail or software:
+            try:
+                return patch_exif_segment(segment, drop_thumbnail, software)
+            except (ValueError, struct.error) as e:
+                logger.debug(f"Cannot patch EXIF segment&无法修补EXIF段: {e}")
+        return segment
+
+    def encode_job(self, job: ImageJob) -> None:
+        """Encode job image, carrying metadata over from its source bytes&编码任务图片，并从源字节沿用元数据"""
+        if job.encoded is not None:
+            # Already encoded by lossless stamping&已由无损盖印完成编码
+            job.image = None
+            return
+        start = time.perf_counter()
+        job.encoded = self.encode(job.image, job.path, job.source_jpeg, job.data)
+        job.encode_seconds = time.perf_counter() - start
+        job.output_bytes = len(job.encoded)
+        job.image = None
+
+    def write_job(self, job: ImageJob) -> bool:
+        """Write encoded job to its output path&将编码结果写入任务输出路径"""
+        if not self.prepare_output(job.output_path):
+            return False
+        self.write_output(job.encoded, job.output_path)
+        logger.info(f"Processing complete&处理完成: {job.path.name} -> {job.output_path.name}")
+        return True
+
+    def finish_job(self, job: ImageJob, style: dict,
+                   on_rendered: Callable[[ImageJob], None] | None = None) -> bool:
+        """
+        Render, encode and write a decoded job&渲染、编码并写入已解码的任务
+        on_rendered sees the stamped frame before it is encoded and released
+        """
+        if job.output_path is None:
+            job.output_path = self.generate_output_path(job.path, job.timestamp)
 
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.prepare_output(job.output_path):
+            return False
 
-            if output_path.exists() and not self.config.get('output', {}).get('overwrite_existing', False):
-                logger.warning(f"Output file exists, skipping&输出文件已存在，跳过: {output_path}")
-                return False
+        self.render_job(job, style)
+        if on_rendered:
+            on_rendered(job)
+        self.encode_job(job)
+        return self.write_job(job)
 
-            self._save_with_exif(result, input_path, output_path)
+    # ---------- Primitives&基础操作 ----------
 
-            logger.info(f"Processing complete&处理完成: {input_path.name} -> {output_path.name}")
-            return True
+    def read_source(self, input_path: Path) -> bytes:
+        """Read raw bytes of source image&读取源图片的原始字节"""
+        with open(input_path, 'rb') as f:
+            return f.read()
 
-        except Exception as e:
-            logger.error(f"Processing failed&处理失败 [{input_path.name}]: {e}")
-            raise
+    def decode(self, data: bytes) -> Image.Image:
+        """Decode image from raw bytes&从原始字节解码图片"""
+        try:
+            image = Image.open(BytesIO(data))
+        except UnidentifiedImageError:
+            raise ValueError("Cannot identify image file&无法识别图片文件")
+        image.load()
+        return image
+
+    def render(self, image: Image.Image, timestamp: datetime, style: dict,
+               in_place: bool = False) -> Image.Image:
+        """Render watermark onto decoded image&在解码后的图片上渲染水印"""
+        renderer = WatermarkRenderer(style, self.style_manager.fonts_dir)
+        return renderer.render(image, timestamp, in_place)
+
+    def encode(self, image: Image.Image, original_path: Path,
+               source_jpeg: dict | None = None, source_data: bytes | None = None) -> bytes:
+        """Encode image to JPEG bytes with EXIF handling&将图片编码为JPEG字节并处理EXIF"""
+        output_config = self.config.get('output', {})
+        preserve_exif = output_config.get('preserve_exif', True)
+
+        save_kwargs = self.get_encode_options(source_jpeg)
+
+        segments = self.get_metadata_segments(source_data) if source_data is not None else []
+        if preserve_exif and not (output_config.get('exif_passthrough', True) and segments):
+            # piexif re-serializes Exif, only the ICC profile is spliced verbatim&piexif重新序列化Exif，仅原样拼接ICC配置
+            segments = [segment for segment in segments if segment[1] == 0xE2]
+            try:
+                exif_dict = piexif.load(source_data if source_data is not None else str(original_path))
+                if exif_dict:
+                    save_kwargs['exif'] = piexif.dump(exif_dict)
+            except Exception as e:
+                logger.debug(f"Cannot preserve EXIF&无法保留EXIF: {e}")
+
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', **save_kwargs)
+        if segments:
+            return splice_metadata_segments(buffer.getvalue(), segments)
+        return buffer.getvalue()
+
+    def get_metadata_segments(self, source_data: bytes) -> list[bytes]:
+        """Get source APP1/ICC segments filtered and patched per output config&获取按输出配置过滤并修补的源APP1/ICC段"""
+        segments = (self._filter_metadata_segment(segment[1], segment)
+                    for segment in read_metadata_segments(source_data))
+        return [segment for segment in segments if segment is not None]
+
+    @classmethod
+    def get_encode_profile(cls, config: dict) -> str:
+        """Get configured encode profile name&获取配置的编码档位名称"""
+        profile = config.get('output', {}).get('encode_profile', cls.DEFAULT_ENCODE_PROFILE)
+        if profile not in cls.ENCODE_PROFILES:
+            logger.warning(f"Unknown encode profile, using default&未知的编码档位，使用默认值: {profile}")
+            profile = cls.DEFAULT_ENCODE_PROFILE
+        return profile
+
+    def get_encode_options(self, source_jpeg: dict | None = None) -> dict:
+        """Build Pillow JPEG save options from output config&根据输出配置构建Pillow JPEG保存参数"""
+        output_config = self.config.get('output', {})
+        profile = self.get_encode_profile(self.config)
+        if profile in ('match_source', 'lossless'):
+            if source_jpeg:
+                # Quality would rescale the source tables, so it is left out&传入质量会缩放原图量化表，因此不设置
+                options = dict(self.ENCODE_PROFILES[profile])
+                options.update(source_jpeg)
+                return options
+            profile = self.DEFAULT_ENCODE_PROFILE
+
+        options = dict(self.ENCODE_PROFILES[profile])
+        options['quality'] = output_config.get('jpeg_quality', 95)
+        subsampling = output_config.get('chroma_subsampling', '')
+        if subsampling:
+            options['subsampling'] = subsampling
+        return options
+
+    @staticmethod
+    def get_source_jpeg(image: Image.Image) -> dict | None:
+        """Capture quantization tables and subsampling of decoded JPEG, None otherwise&获取已解码JPEG的量化表和色度采样，非JPEG返回None"""
+        qtables = getattr(image, 'quantization', None)
+        if image.format != 'JPEG' or not qtables:
+            return None
+        source_jpeg = {'qtables': qtables}
+        subsampling = JpegImagePlugin.get_sampling(image)
+        if subsampling != -1:
+            source_jpeg['subsampling'] = subsampling
+        return source_jpeg
+
+    def prepare_output(self, output_path: Path) -> bool:
+        """Create output directory, False if target exists and must be kept&创建输出目录，目标已存在且不可覆盖时返回False"""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if output_path.exists() and not self.config.get('output', {}).get('overwrite_existing', False):
+            logger.warning(f"Output file exists, skipping&输出文件已存在，跳过: {output_path}")
+            return False
+        return True
+
+    def write_output(self, data: bytes, output_path: Path) -> None:
+        """Write encoded bytes to output file&将编码后的字节写入输出文件"""
+        with open(output_path, 'wb') as f:
+            f.write(data)
 
     def generate_output_path(self, input_path: Path, timestamp: datetime) -> Path:
         """Generate output path based on configuration&根据配置生成输出路径"""
@@ -655,29 +2684,15 @@ class ImageProcessor:
     def _save_with_exif(self, image: Image.Image, original_path: Path,
                         output_path: Path) -> None:
         """Save image with EXIF handling&保存图片并处理EXIF"""
-        output_config = self.config.get('output', {})
-        quality = output_config.get('jpeg_quality', 95)
-        preserve_exif = output_config.get('preserve_exif', True)
-
-        save_kwargs = {
-            'quality': quality,
-            'optimize': True,
-        }
-
-        if preserve_exif:
-            try:
-                exif_dict = piexif.load(str(original_path))
-                exif_bytes = piexif.dump(exif_dict)
-                save_kwargs['exif'] = exif_bytes
-            except Exception as e:
-                logger.debug(f"Cannot preserve EXIF&无法保留EXIF: {e}")
-
-        image.save(output_path, 'JPEG', **save_kwargs)
+        self.write_output(self.encode(image, original_path), output_path)
 
 
 class BatchProcessor:
     """Batch Processing Engine&批量处理引擎"""
 
+    PREVIEW_SIZE = (3600, 2700)
+    WORKER_PREVIEW_SIZE = (960, 960)
+
     def __init__(self, config: dict, style_manager: StyleManager):
         self.config = config
         self.style_manager = style_manager
@@ -695,18 +2710,68 @@ class BatchProcessor:
         results = {
             "success": 0,
             "failed": 0,
-            "errors": []
+            "errors": [],
+            "encode_stats": {
+                "profile": ImageProcessor.get_encode_profile(self.config),
+                "files": 0,
+                "encode_seconds": 0.0,
+                "output_bytes": 0
+            }
         }
 
-        total = len(image_paths)
-        processor = ImageProcessor(self.config, self.style_manager)
-
         try:
-            style = self.style_manager.load_style(style_name)
+            self.style_manager.load_style(style_name)
         except Exception as e:
             results["errors"].append(f"Failed to load style&加载样式失败: {e}")
             raise Exception(f"Failed to load style&加载样式失败: {e}")
 
+        mode = self.config.get('processing', {}).get('mode', 'sequential')
+        try:
+            if mode == 'parallel' and len(image_paths) > 1:
+                self._run_parallel(image_paths, style_name, results,
+                                   progress_callback, preview_callback)
+            elif mode == 'pipeline' and len(image_paths) > 1:
+                self._run_pipeline(image_paths, style_name, results,
+                                   progress_callback, preview_callback)
+            else:
+                self._run_sequential(image_paths, style_name, results,
+                                     progress_callback, preview_callback)
+        finally:
+            metadata_cache = get_metadata_cache(self.config)
+            if metadata_cache is not None:
+                metadata_cache.flush()
+
+        logger.info(f"Batch processing complete: success {results['success']}, failed {results['failed']}&批处理完成: 成功 {results['success']}, 失败 {results['failed']}")
+        stats = results["encode_stats"]
+        if stats["files"]:
+            logger.info(
+                f"Encode profile {stats['profile']}: {stats['files']} files, {stats['encode_seconds']:.2f}s, "
+                f"{stats['output_bytes']} bytes&编码档位 {stats['profile']}: {stats['files']} 个文件, "
+                f"{stats['encode_seconds']:.2f}秒, {stats['output_bytes']} 字节"
+            )
+        return results
+
+    def cancel(self) -> None:
+        """Cancel current batch processing&取消当前批处理"""
+        self._cancelled = True
+        logger.info("Cancelling batch processing...&正在取消批处理...")
+
+    def get_worker_count(self) -> int:
+        """Get configured worker count, 0 means CPU count&获取配置的工作进程数，0表示CPU核心数"""
+        try:
+            workers = int(self.config.get('processing', {}).get('workers', 0) or 0)
+        except (TypeError, ValueError):
+            workers = 0
+        return workers if workers > 0 else (os.cpu_count() or 1)
+
+    def _run_sequential(self, image_paths: list[str], style_name: str, results: dict,
+                        progress_callback: Callable[[int, int, str], None] | None,
+                        preview_callback: Callable[[str, Image.Image], None] | None) -> None:
+        """Process images one by one in current thread&在当前线程中逐张处理图片"""
+        total = len(image_paths)
+        processor = ImageProcessor(self.config, self.style_manager)
+        style = self.style_manager.load_style(style_name)
+
         for i, image_path in enumerate(image_paths):
             if self._cancelled:
                 logger.info("Batch processing cancelled&批处理已取消")
@@ -717,43 +2782,257 @@ class BatchProcessor:
             if progress_callback:
                 progress_callback(i + 1, total, image_path.name)
 
+            try:
+                job = self._prepare_job(processor, image_path, i + 1)
+
+                previews = {}
+                success = processor.finish_job(
+                    job, style,
+                    self._capture_preview(previews, self.PREVIEW_SIZE) if preview_callback else None
+                )
+                if previews.get(job.index) is not None:
+                    preview_callback(str(image_path), previews[job.index])
+            except Exception as e:
+                logger.error(f"Processing failed&处理失败 [{image_path.name}]: {e}")
+                results["failed"] += 1
+                error_msg = str(e)
+                results["errors"].append(f"{image_path.name}: {error_msg}")
+                raise Exception(f"Processing failed&处理失败 [{image_path.name}]: {error_msg}")
+
+            self._record_result(results, image_path, success, job.encode_stats())
+
+    def _run_parallel(self, image_paths: list[str], style_name: str, results: dict,
+                      progress_callback: Callable[[int, int, str], None] | None,
+                      preview_callback: Callable[[str, Image.Image], None] | None) -> None:
+        """Fan images out to a process pool&将图片分发到进程池并行处理"""
+        total = len(image_paths)
+        workers = min(self.get_worker_count(), total)
+        # Keep a bounded number of jobs in flight so cancel() stops promptly
+        max_in_flight = workers * 2
+        preview_size = self.WORKER_PREVIEW_SIZE if preview_callback else None
+
+        logger.info(f"Parallel batch processing with {workers} workers&使用 {workers} 个进程并行批处理")
+
+        completed = 0
+        next_index = 0
+        in_flight = {}
+        first_error = None
+        metadata_cache = get_metadata_cache(self.config)
+
+        # Spawn everywhere: forking the GUI process could copy locks held by its worker threads&所有平台均使用spawn：fork GUI进程可能复制其工作线程持有的锁
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_batch_worker,
+                initargs=(self.config, str(self.style_manager.styles_dir),
+                          str(self.style_manager.fonts_dir))
+        ) as executor:
+            while True:
+                while (not self._cancelled and first_error is None
+                       and next_index < total and len(in_flight) < max_in_flight):
+                    image_path = Path(image_paths[next_index])
+                    next_index += 1
+                    future = executor.submit(_run_batch_job, style_name, str(image_path),
+                                             next_index, preview_size)
+                    in_flight[future] = image_path
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    image_path = in_flight.pop(future)
+                    completed += 1
+
+                    if progress_callback:
+                        progress_callback(completed, total, image_path.name)
+
+                    try:
+                        success, preview, stats, metadata = future.result()
+                    except Exception as e:
+                        logger.error(f"Processing failed&处理失败 [{image_path.name}]: {e}")
+                        results["failed"] += 1
+                        results["errors"].append(f"{image_path.name}: {e}")
+                        if first_error is None:
+                            first_error = (image_path, str(e))
+                        continue
+
+                    if preview is not None and preview_callback:
+                        preview_callback(str(image_path), preview)
+
+                    if metadata_cache is not None:
+                        for path, entry in metadata.items():
+                            metadata_cache.put(path, entry)
+                    self._record_result(results, image_path, success, stats)
+
+        if first_error is not None:
+            image_path, error_msg = first_error
+            raise Exception(f"Processing failed&处理失败 [{image_path.name}]: {error_msg}")
+
+        if self._cancelled:
+            logger.info("Batch processing cancelled&批处理已取消")
+
+    def _run_pipeline(self, image_paths: list[str], style_name: str, results: dict,
+                      progress_callback: Callable[[int, int, str], None] | None,
+                      preview_callback: Callable[[str, Image.Image], None] | None) -> None:
+        """Run read/decode/stamp/encode/write as stages joined by bounded queues&以有界队列连接读取/解码/加水印/编码/写入各阶段"""
+        total = len(image_paths)
+        processor = ImageProcessor(self.config, self.style_manager)
+        style = self.style_manager.load_style(style_name)
+        try:
+            queue_size = max(int(self.config.get('processing', {}).get('queue_size', 4)), 1)
+        except (TypeError, ValueError):
+            queue_size = 4
+        stop = threading.Event()
+        previews: dict = {}
+
+        def decode_stage(job: ImageJob) -> None:
+            processor.parse_job(job)
+            processor.decode_job(job)
+            job.output_path = self._generate_indexed_output_path(
+                processor, job.path, job.index, job.timestamp
+            )
+
+        capture_preview = self._capture_preview(previews, self.PREVIEW_SIZE)
+
+        def stamp_stage(job: ImageJob) -> None:
+            processor.render_job(job, style)
             if preview_callback:
+                capture_preview(job)
+
+        def encode_stage(job: ImageJob) -> None:
+            processor.encode_job(job)
+            job.data = None
+
+        queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+        stages = [decode_stage, stamp_stage, encode_stage]
+
+        def read_stage() -> None:
+            for index, image_path in enumerate(image_paths, start=1):
+                if self._cancelled or stop.is_set():
+                    break
                 try:
-                    image = Image.open(image_path)
-                    timestamp = processor.time_extractor.extract(image_path)
-                    renderer = WatermarkRenderer(style, self.style_manager.fonts_dir)
-                    preview = renderer.render_preview(image, timestamp, (3600, 2700))
-                    preview_callback(str(image_path), preview)
+                    job = processor.open_job(image_path, index)
                 except Exception as e:
-                    logger.debug(f"Failed to generate preview&生成预览失败: {e}")
+                    job = ImageJob(image_path, index)
+                    job.error = e
+                queues[0].put(job)
+            queues[0].put(None)
+
+        threads = [threading.Thread(target=read_stage, name="pipeline-read", daemon=True)]
+        for i, stage in enumerate(stages):
+            threads.append(threading.Thread(
+                target=self._pipeline_stage,
+                args=(stage, queues[i], queues[i + 1], stop),
+                name=f"pipeline-{stage.__name__}",
+                daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+        # Write stage runs in caller thread so callbacks keep their thread
+        completed = 0
+        first_error = None
+        while True:
+            job = queues[-1].get()
+            if job is None:
+                break
+            if self._cancelled:
+                continue
+            completed += 1
 
-            output_path = self._generate_indexed_output_path(
-                processor, image_path, i + 1
-            )
+            if progress_callback:
+                progress_callback(completed, total, job.path.name)
 
             try:
-                success = processor.process(str(image_path), style_name, str(output_path))
-                if success:
-                    results["success"] += 1
-                else:
-                    results["failed"] += 1
-                    results["errors"].append(f"Processing failed&处理失败: {image_path.name}")
+                if job.error is not None:
+                    raise job.error
+                preview = previews.pop(job.index, None)
+                if preview is not None:
+                    preview_callback(str(job.path), preview)
+                success = processor.write_job(job)
             except Exception as e:
+                logger.error(f"Processing failed&处理失败 [{job.path.name}]: {e}")
                 results["failed"] += 1
-                error_msg = str(e)
-                results["errors"].append(f"{image_path.name}: {error_msg}")
-                raise Exception(f"Processing failed&处理失败 [{image_path.name}]: {error_msg}")
-
-        logger.info(f"Batch processing complete: success {results['success']}, failed {results['failed']}&批处理完成: 成功 {results['success']}, 失败 {results['failed']}")
-        return results
+                results["errors"].append(f"{job.path.name}: {e}")
+                if first_error is None:
+                    first_error = (job.path, str(e))
+                    stop.set()
+                continue
+
+            self._record_result(results, job.path, success, job.encode_stats())
+
+        for thread in threads:
+            thread.join()
+
+        if first_error is not None:
+            image_path, error_msg = first_error
+            raise Exception(f"Processing failed&处理失败 [{image_path.name}]: {error_msg}")
+
+        if self._cancelled:
+            logger.info("Batch processing cancelled&批处理已取消")
+
+    def _pipeline_stage(self, func: Callable, inbox: queue.Queue, outbox: queue.Queue,
+                        stop: threading.Event) -> None:
+        """Run one pipeline stage until end marker, forwarding failed jobs downstream&运行单个流水线阶段直到结束标记，失败任务向下游传递"""
+        while True:
+            job = inbox.get()
+            if job is None:
+                outbox.put(None)
+                return
+            if stop.is_set() or self._cancelled:
+                # Drain remaining jobs after failure or cancel&失败或取消后排空剩余任务
+                continue
+            if job.error is None:
+                try:
+                    func(job)
+                except Exception as e:
+                    job.error = e
+            outbox.put(job)
+
+    def _prepare_job(self, processor: ImageProcessor, image_path: Path, index: int) -> ImageJob:
+        """Read, parse and decode one image into an indexed job&将单张图片读取、解析并解码为带序号的任务"""
+        job = processor.open_job(image_path, index)
+        processor.parse_job(job)
+        processor.decode_job(job)
+        job.output_path = self._generate_indexed_output_path(
+            processor, job.path, index, job.timestamp
+        )
+        return job
 
-    def cancel(self) -> None:
-        """Cancel current batch processing&取消当前批处理"""
-        self._cancelled = True
-        logger.info("Cancelling batch processing...&正在取消批处理...")
+    @staticmethod
+    def _capture_preview(previews: dict, preview_size: Tuple[int, int]) -> Callable[[ImageJob], None]:
+        """Build hook storing downscaled stamped frame into previews by index&构建将缩小后的已渲染画面按序号存入previews的钩子"""
+        def capture(job: ImageJob) -> None:
+            try:
+                image = job.image
+                if image is None and job.encoded is not None:
+                    # Lossless jobs have no decoded frame; use a DCT-scaled decode&无损任务没有解码画面，使用DCT缩放解码
+                    image = Image.open(BytesIO(job.encoded))
+                    draft_for_size(image, preview_size)
+                previews[job.index] = WatermarkRenderer.scale_preview(image, preview_size)
+            except Exception as e:
+                logger.debug(f"Failed to generate preview&生成预览失败: {e}")
+        return capture
+
+    @staticmethod
+    def _record_result(results: dict, image_path: Path, success: bool,
+                       encode_stats: Tuple[float, int] | None = None) -> None:
+        """Record a finished image and its encode stats into results&将处理结果及编码统计记录到结果字典"""
+        if success:
+            results["success"] += 1
+            if encode_stats:
+                stats = results["encode_stats"]
+                stats["files"] += 1
+                stats["encode_seconds"] += encode_stats[0]
+                stats["output_bytes"] += encode_stats[1]
+        else:
+            results["failed"] += 1
+            results["errors"].append(f"Processing failed&处理失败: {image_path.name}")
 
     def _generate_indexed_output_path(self, processor: ImageProcessor,
-                                      input_path: Path, index: int) -> Path:
+                                      input_path: Path, index: int,
+                                      timestamp: datetime | None = None) -> Path:
         """Generate indexed output path&生成带序号的输出路径"""
         output_config = self.config.get('output', {})
 
@@ -763,10 +3042,11 @@ class BatchProcessor:
             custom_dir = output_config.get('custom_directory', '')
             output_dir = Path(custom_dir) if custom_dir else input_path.parent
 
-        try:
-            timestamp = processor.time_extractor.extract(input_path)
-        except:
-            timestamp = datetime.now()
+        if timestamp is None:
+            try:
+                timestamp = processor.time_extractor.extract(input_path)
+            except:
+                timestamp = datetime.now()
 
         pattern = output_config.get('filename_pattern', '{original}_stamped')
 
@@ -780,20 +3060,102 @@ class BatchProcessor:
         return output_dir / f"{filename}{input_path.suffix}"
 
 
+# ==================== Process Pool Workers&进程池工作函数 ====================
+
+_worker_state: dict = {}
+
+
+def _init_batch_worker(config: dict, styles_dir: str, fonts_dir: str) -> None:
+    """Initialize per-process batch state&初始化工作进程的批处理状态"""
+    # Workers only read the metadata cache, the parent process writes what they found&工作进程只读元数据缓存，由主进程写入其读取结果
+    get_metadata_cache(config, read_only=True)
+    style_manager = StyleManager(styles_dir, fonts_dir)
+    _worker_state['batch'] = BatchProcessor(config, style_manager)
+    _worker_state['processor'] = ImageProcessor(config, style_manager)
+
+
+def _run_batch_job(style_name: str, image_path: str, index: int,
+                   preview_size: Tuple[int, int] | None) -> tuple:
+    """Process one image inside a worker process, returns (success, preview, encode stats, metadata)&在工作进程中处理单张图片，返回（成功, 预览, 编码统计, 元数据）"""
+    batch = _worker_state['batch']
+    processor = _worker_state['processor']
+    style = processor.style_manager.load_style(style_name)
+
+    job = batch._prepare_job(processor, Path(image_path), index)
+    previews = {}
+    success = processor.finish_job(
+        job, style, batch._capture_preview(previews, preview_size) if preview_size else None
+    )
+    metadata = processor.metadata_cache.drain() if processor.metadata_cache is not None else {}
+    return success, previews.get(index), job.encode_stats(), metadata
+
+
+# Image file extensions, matched case-insensitively&图片文件扩展名（不区分大小写）
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+
+# NAS/OS housekeeping directories never containing user photos&不含用户照片的NAS/系统管理目录
+SKIPPED_DIRS = frozenset({
+    '@eadir', '#recycle', '#snapshot', '$recycle.bin', 'system volume information', '.trashes', '.spotlight-v100',
+})
+
+# Windows hidden/system file attributes&Windows隐藏/系统文件属性
+_HIDDEN_ATTRIBUTES = 0x2 | 0x4
+
+
+def _is_hidden_entry(entry: os.DirEntry) -> bool:
+    """Check whether directory entry is hidden or system&检查目录项是否为隐藏或系统项"""
+    if entry.name.startswith('.') or entry.name.lower() in SKIPPED_DIRS:
+        return True
+    if os.name == 'nt':
+        try:
+            return bool(entry.stat(follow_symlinks=False).st_file_attributes & _HIDDEN_ATTRIBUTES)
+        except OSError:
+            return False
+    return False
+
+
+def _scan_entries(directory: str, sort: bool) -> list:
+    """List directory entries, optionally sorted by name, empty if unreadable&列出目录项（可选按名称排序），无法读取时返回空列表"""
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError as e:
+        logger.debug(f"Cannot scan directory&无法扫描目录 [{directory}]: {e}")
+        return []
+    if sort:
+        entries.sort(key=lambda entry: os.path.normcase(entry.name))
+    return entries
+
+
+def iter_images(directory: str | Path, recursive: bool = True,
+                skip_hidden: bool = False, sort: bool = False) -> Iterator[str]:
+    """
+    Yield image file paths in a single directory walk&单次遍历目录并逐个产出图片文件路径
+    Extensions match case-insensitively and directory symlinks are not followed.
+    Hidden and system entries are included unless skip_hidden is set.
+    With sort, paths come out in depth-first name order, same as sorting the full list
+    """
+    stack = [iter(_scan_entries(str(directory), sort))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+        if skip_hidden and _is_hidden_entry(entry):
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    stack.append(iter(_scan_entries(entry.path, sort)))
+            elif entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                yield entry.path
+        except OSError:
+            continue
+
+
 def scan_images(directory: str, recursive: bool = True) -> list[str]:
     """Scan directory for image files&扫描目录中的图片文件"""
-    directory = Path(directory)
-    extensions = {'.jpg', '.jpeg', '.JPG', '.JPEG'}
-    images = []
-
-    if recursive:
-        for ext in extensions:
-            images.extend(directory.rglob(f"*{ext}"))
-    else:
-        for ext in extensions:
-            images.extend(directory.glob(f"*{ext}"))
-
-    return [str(p) for p in sorted(images)]
+    return list(iter_images(directory, recursive, sort=True))
 
 
 def process_single_image(image_path: str, style_name: str = "CANON&佳能",
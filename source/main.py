@@ -3,6 +3,7 @@ Photo-Timestamper Entry Point&入口点
 """
 
 import sys
+import multiprocessing
 from pathlib import Path
 
 if __name__ == "__main__":
@@ -17,5 +18,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Required for process-pool workers in frozen builds&打包后进程池工作进程需要
+    multiprocessing.freeze_support()
     main()
     
\ No newline at end of file
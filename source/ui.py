@@ -6,7 +6,10 @@ import sys
 import os
 import subprocess
 import json
-import base64
+import heapq
+import itertools
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from io import BytesIO
@@ -16,20 +19,47 @@ from PyQt6.QtWidgets import (
     QMessageBox, QDialog, QLabel, QPushButton, QComboBox, QGroupBox,
     QRadioButton, QButtonGroup, QCheckBox, QLineEdit, QSpinBox, QDateTimeEdit
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QUrl, QTimer, QDateTime, pyqtSlot, QObject
+from PyQt6.QtCore import (
+    Qt, QThread, pyqtSignal, QUrl, QTimer, QDateTime, pyqtSlot, QObject, QBuffer, QIODevice
+)
 from PyQt6.QtGui import QIcon, QShortcut, QKeySequence
+from PyQt6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebChannel import QWebChannel
 from PIL import Image
 
 from .core import (
     ConfigManager, StyleManager, BatchProcessor, TimeExtractor,
-    WatermarkRenderer, scan_images, get_base_path, logger,
-    LocalizationManager, L
+    WatermarkRenderer, iter_images, get_base_path, logger,
+    LocalizationManager, L, get_metadata_cache, read_image_metadata, load_scaled_image,
+    load_thumbnail, get_thumbnail_cache, LRUCache
 )
 from . import __version__, __author__, __collaborators__
 
 
+# ==================== Image Helpers ====================
+PREVIEW_SIZE = 960
+THUMB_SIZE = 128
+THUMB_QUALITY = 65
+THUMB_VARIANT = f"thumb-{THUMB_SIZE}-q{THUMB_QUALITY}"
+
+
+def _jpeg_bytes(image: Image.Image, quality: int) -> bytes:
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    buf = BytesIO()
+    image.save(buf, format='JPEG', quality=quality)
+    return buf.getvalue()
+
+
+def _cached_jpeg(config: dict, path: str, variant: str, factory) -> bytes:
+    """列表与预览共用磁盘缩略图缓存，禁用时直接生成"""
+    cache = get_thumbnail_cache(config)
+    if cache is None:
+        return factory()
+    return cache.get_or_create(path, variant, factory)
+
+
 # ==================== Processing Thread ====================
 class ProcessingThread(QThread):
     progress = pyqtSignal(int, int, str)
@@ -66,9 +96,278 @@ class ProcessingThread(QThread):
         self.processor.cancel()
 
 
+# ==================== Folder Scan Thread ====================
+class FolderScanThread(QThread):
+    """后台遍历文件夹，按块推送发现的图片，首块很小以便尽快显示"""
+    chunk = pyqtSignal(list)
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(int, bool)
+
+    FIRST_CHUNK = 32
+    MAX_CHUNK = 2048
+    FLUSH_INTERVAL = 0.25
+
+    def __init__(self, folder: str, recursive: bool = True):
+        super().__init__()
+        self.folder = folder
+        self.recursive = recursive
+        self._cancelled = False
+
+    def run(self):
+        found = 0
+        pending: list[str] = []
+        chunk_size = self.FIRST_CHUNK
+        last_flush = time.monotonic()
+        try:
+            for path in iter_images(self.folder, recursive=self.recursive, sort=True):
+                if self._cancelled:
+                    break
+                pending.append(path)
+                found += 1
+                now = time.monotonic()
+                if len(pending) >= chunk_size or now - last_flush >= self.FLUSH_INTERVAL:
+                    self.chunk.emit(pending)
+                    self.progress.emit(found)
+                    pending = []
+                    last_flush = now
+                    chunk_size = min(chunk_size * 2, self.MAX_CHUNK)
+        except Exception as e:
+            logger.error(f"Folder scan failed&文件夹扫描失败 [{self.folder}]: {e}")
+        if pending and not self._cancelled:
+            self.chunk.emit(pending)
+        self.progress.emit(found)
+        self.finished.emit(found, self._cancelled)
+
+    def cancel(self):
+        self._cancelled = True
+
+
+# ==================== Image Scheme ====================
+IMAGE_SCHEME = b"pts"
+
+
+def register_image_scheme():
+    """注册 pts:// 协议，必须在创建 QApplication 之前调用"""
+    scheme = QWebEngineUrlScheme(IMAGE_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme |
+        QWebEngineUrlScheme.Flag.LocalScheme |
+        QWebEngineUrlScheme.Flag.LocalAccessAllowed
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class ImageSchemeHandler(QWebEngineUrlSchemeHandler):
+    """直接提供 pts://thumb/<id>/<token> 与 pts://preview/<pane>/<token> 的 JPEG 数据，不再经 WebChannel 传 base64"""
+
+    def __init__(self, bridge: 'WebBridge', parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        url = job.requestUrl()
+        data = self.bridge.get_image_bytes(url.host(), url.path().strip('/'))
+        if not data:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        buffer = QBuffer(job)
+        buffer.setData(data)
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(b"image/jpeg", buffer)
+
+
+# ==================== Thumbnail Loader ====================
+class ThumbnailLoader(QObject):
+    """后台线程池生成缩略图，可见项优先，移除的条目直接丢弃"""
+    thumbnailReady = pyqtSignal(str, bytes)
+
+    VISIBLE_PRIORITY = 0
+    NORMAL_PRIORITY = 1
+
+    def __init__(self, make_thumb, workers: int | None = None):
+        super().__init__()
+        self._make_thumb = make_thumb
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, int, str]] = []
+        self._pending: dict[str, int] = {}
+        self._counter = itertools.count()
+        self._stopped = False
+        count = workers or min(4, os.cpu_count() or 1)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"thumbnail-{i}", daemon=True)
+            for i in range(count)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def request(self, paths: list[str], visible: bool = False):
+        """排队生成缩略图，已在队列中且优先级不低于本次请求的路径忽略"""
+        priority = self.VISIBLE_PRIORITY if visible else self.NORMAL_PRIORITY
+        with self._cond:
+            for path in paths:
+                if self._pending.get(path, priority + 1) > priority:
+                    self._push(path, priority)
+            self._cond.notify_all()
+
+    def prioritize(self, paths: list[str]):
+        """将仍在排队的路径提升为可见优先级"""
+        with self._cond:
+            for path in paths:
+                if self._pending.get(path) == self.NORMAL_PRIORITY:
+                    self._push(path, self.VISIBLE_PRIORITY)
+            self._cond.notify_all()
+
+    def cancel(self, paths):
+        """取消尚未开始的任务，堆中的旧条目在出队时跳过"""
+        with self._cond:
+            for path in paths:
+                self._pending.pop(path, None)
+
+    def clear(self):
+        with self._cond:
+            self._pending.clear()
+            self._heap.clear()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+
+    def _push(self, path: str, priority: int):
+        self._pending[path] = priority
+        heapq.heappush(self._heap, (priority, next(self._counter), path))
+
+    def _next_path(self) -> str | None:
+        with self._cond:
+            while not self._stopped:
+                while self._heap:
+                    priority, _, path = heapq.heappop(self._heap)
+                    if self._pending.get(path) == priority:
+                        del self._pending[path]
+                        return path
+                self._cond.wait()
+            return None
+
+    def _worker(self):
+        while True:
+            path = self._next_path()
+            if path is None:
+                return
+            self.thumbnailReady.emit(path, self._make_thumb(path))
+
+
+# ==================== Metadata Warmer ====================
+class MetadataWarmer:
+    """后台线程按批预读新加入文件的元数据并写入缓存，界面线程只负责排队"""
+
+    BATCH_SIZE = 256
+
+    def __init__(self, warm):
+        self._warm = warm
+        self._cond = threading.Condition()
+        self._queue: list[str] = []
+        self._stopped = False
+        self._thread = threading.Thread(target=self._worker, name="metadata-warmer", daemon=True)
+        self._thread.start()
+
+    def request(self, paths: list[str]):
+        with self._cond:
+            self._queue.extend(paths)
+            self._cond.notify()
+
+    def clear(self):
+        with self._cond:
+            self._queue.clear()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            self._cond.notify()
+
+    def _next_batch(self) -> list[str] | None:
+        with self._cond:
+            while not self._stopped:
+                if self._queue:
+                    batch = self._queue[:self.BATCH_SIZE]
+                    del self._queue[:self.BATCH_SIZE]
+                    return batch
+                self._cond.wait()
+            return None
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._warm(batch)
+            except Exception as e:
+                logger.debug(f"Metadata warm-up failed: {e}")
+
+
+# ==================== Preview Worker ====================
+class PreviewWorker(QThread):
+    """后台生成预览 JPEG；每个面板只保留最新请求，排队中的旧请求被覆盖，进行中的旧结果被丢弃"""
+    ready = pyqtSignal(str, int, bytes)
+
+    def __init__(self):
+        super().__init__()
+        self._cond = threading.Condition()
+        self._pending: dict[str, tuple[int, object]] = {}
+        self._latest: dict[str, int] = {}
+        self._generations = itertools.count(1)
+        self._stopped = False
+
+    def submit(self, pane: str, task) -> int:
+        """提交面板任务，task 在工作线程中执行并返回 JPEG 数据"""
+        with self._cond:
+            generation = next(self._generations)
+            self._pending.pop(pane, None)
+            self._pending[pane] = (generation, task)
+            self._latest[pane] = generation
+            self._cond.notify()
+        return generation
+
+    def is_current(self, pane: str, generation: int) -> bool:
+        with self._cond:
+            return self._latest.get(pane) == generation
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # 按提交顺序处理，原图面板先于效果面板
+                pane = next(iter(self._pending))
+                generation, task = self._pending.pop(pane)
+            try:
+                data = task()
+            except Exception as e:
+                logger.error(f"Failed to generate preview: {e}")
+                data = b""
+            if self.is_current(pane, generation):
+                self.ready.emit(pane, generation, data)
+
+
 # ==================== Web Bridge ====================
 class WebBridge(QObject):
-    filesUpdated = pyqtSignal(str)
+    """文件列表以增量消息同步到页面：插入、移除、缩略图、选中变化，均以条目 ID 为键；filesReset 用于整体重同步"""
+    filesReset = pyqtSignal(str)
+    filesInserted = pyqtSignal(str)
+    filesRemoved = pyqtSignal(str)
+    selectionChanged = pyqtSignal(str)
     previewUpdated = pyqtSignal(str, str)
     progressUpdated = pyqtSignal(int, int, str)
     processingFinished = pyqtSignal(str)
@@ -77,11 +376,22 @@ class WebBridge(QObject):
     uiTextsUpdated = pyqtSignal(str)
     showProgressOverlay = pyqtSignal(bool)
     stylesUpdated = pyqtSignal(str)
+    scanProgress = pyqtSignal(int, bool)
+    thumbnailUpdated = pyqtSignal(int, str)
 
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self._file_list: list[dict] = []
+        self._items: dict[str, dict] = {}
+        self._items_by_id: dict[int, dict] = {}
+        self._next_id = itertools.count(1)
+        self._thumb_bytes = LRUCache(max_entries=20000, max_cost=64 * 1024 * 1024)
+        self._previews: dict[str, tuple[int, bytes]] = {}
+        self._preview_tokens = itertools.count(1)
+        self._thumb_tokens = itertools.count(1)
+        self.thumbnail_loader = ThumbnailLoader(self._make_thumb)
+        self.thumbnail_loader.thumbnailReady.connect(self._on_thumbnail_ready)
+        self.metadata_warmer = MetadataWarmer(self._warm_metadata)
 
     # ---------- API to JS ----------
     @pyqtSlot(result=str)
@@ -101,6 +411,7 @@ class WebBridge(QObject):
             "btn_process": L("Start Processing&开始处理"),
             "btn_process_selected": L("Process Selected ({count})&处理选中 ({count})"),
             "btn_cancel": L("Cancel&取消"),
+            "scanning": L("Scanning... {count} images found&正在扫描... 已发现 {count} 张图片"),
             "preview_original": L("Original&原图"),
             "preview_result": L("Preview&效果预览"),
             "preview_no_image": L("Select an image to preview&选择图片以预览"),
@@ -134,7 +445,8 @@ class WebBridge(QObject):
 
     @pyqtSlot(result=str)
     def getFileList(self) -> str:
-        return json.dumps(self._file_list, ensure_ascii=False)
+        """完整列表，供页面初始化或整体重同步"""
+        return json.dumps(list(self._items_by_id.values()), ensure_ascii=False)
 
     @pyqtSlot()
     def requestAddFiles(self):
@@ -144,56 +456,68 @@ class WebBridge(QObject):
     def requestAddFolder(self):
         self.main_window._import_folder()
 
+    @pyqtSlot()
+    def cancelScan(self):
+        self.main_window._cancel_scan()
+
     @pyqtSlot()
     def requestClearFiles(self):
-        self._file_list.clear()
-        self.filesUpdated.emit(json.dumps(self._file_list))
+        self.thumbnail_loader.clear()
+        self.metadata_warmer.clear()
+        self._items.clear()
+        self._items_by_id.clear()
+        self._thumb_bytes.clear()
+        self.filesReset.emit("[]")
         self.statusMessage.emit(L("Image list cleared&已清空图片列表"))
 
     @pyqtSlot(str)
     def setFileSelected(self, data: str):
         """设置单个文件的选中状态"""
         info = json.loads(data)
-        path = info.get('path')
-        selected = info.get('selected', False)
-        for item in self._file_list:
-            if item['path'] == path:
-                item['selected'] = selected
-                break
+        self._set_selected([info.get('id')], info.get('selected', False))
 
     @pyqtSlot(str)
     def setMultipleSelected(self, data: str):
         """批量设置选中状态"""
         info = json.loads(data)
-        paths = set(info.get('paths', []))
-        selected = info.get('selected', False)
-        for item in self._file_list:
-            if item['path'] in paths:
-                item['selected'] = selected
+        self._set_selected(info.get('ids', []), info.get('selected', False))
 
     @pyqtSlot()
     def selectAll(self):
-        for item in self._file_list:
+        for item in self._items_by_id.values():
             item['selected'] = True
-        self.filesUpdated.emit(json.dumps(self._file_list))
+        self.selectionChanged.emit(json.dumps({'all': True, 'selected': True}))
 
     @pyqtSlot()
     def deselectAll(self):
-        for item in self._file_list:
+        for item in self._items_by_id.values():
             item['selected'] = False
-        self.filesUpdated.emit(json.dumps(self._file_list))
+        self.selectionChanged.emit(json.dumps({'all': True, 'selected': False}))
 
     @pyqtSlot(str)
     def removeSelected(self, selected_json: str):
-        selected = set(json.loads(selected_json))
-        before = len(self._file_list)
-        self._file_list = [item for item in self._file_list if item['path'] not in selected]
-        removed = before - len(self._file_list)
-        self.filesUpdated.emit(json.dumps(self._file_list))
+        removed_ids = []
+        removed_paths = []
+        for item_id in json.loads(selected_json):
+            item = self._items_by_id.pop(item_id, None)
+            if item is None:
+                continue
+            del self._items[item['path']]
+            self._thumb_bytes.pop(item_id)
+            removed_ids.append(item_id)
+            removed_paths.append(item['path'])
+        self.thumbnail_loader.cancel(removed_paths)
+        self.filesRemoved.emit(json.dumps(removed_ids))
         self.statusMessage.emit(
-            L("Removed {count} images&已移除 {count} 张图片").replace("{count}", str(removed))
+            L("Removed {count} images&已移除 {count} 张图片").replace("{count}", str(len(removed_ids)))
         )
 
+    @pyqtSlot(str)
+    def setVisibleItems(self, ids_json: str):
+        """JS 上报当前可见的条目，优先为其生成缩略图"""
+        items = (self._items_by_id.get(item_id) for item_id in json.loads(ids_json))
+        self.thumbnail_loader.prioritize([item['path'] for item in items if item is not None])
+
     @pyqtSlot(str)
     def requestPreview(self, filepath: str):
         """请求预览指定图片"""
@@ -203,6 +527,7 @@ class WebBridge(QObject):
     def setStyle(self, style_name: str):
         self.main_window.config['ui']['last_style'] = style_name
         self.main_window.config_manager.save(self.main_window.config)
+        self.main_window._refresh_result_preview()
 
     @pyqtSlot(str)
     def startProcessing(self, data: str):
@@ -260,45 +585,110 @@ class WebBridge(QObject):
 
     # ---------- Helpers ----------
     def add_files(self, files: list[str]) -> tuple[int, int]:
-        existing = {item['path'] for item in self._file_list}
+        """先以占位缩略图插入条目，缩略图由后台线程池生成后逐项推送"""
         added = 0
         duplicates = 0
+        new_items = []
         for filepath in files:
-            if filepath in existing:
+            if filepath in self._items:
                 duplicates += 1
                 continue
-            filename = Path(filepath).name
-            thumb = self._make_thumb(filepath, max_size=128, quality=65)
-            self._file_list.append({
+            item = {
+                'id': next(self._next_id),
                 'path': filepath,
-                'name': filename,
+                'name': Path(filepath).name,
                 'selected': False,
-                'thumbnail': thumb
-            })
-            existing.add(filepath)
+                'thumbnail': ''
+            }
+            self._items[filepath] = item
+            self._items_by_id[item['id']] = item
+            new_items.append(item)
             added += 1
-        self.filesUpdated.emit(json.dumps(self._file_list))
+        new_paths = [item['path'] for item in new_items]
+        if new_items:
+            self.filesInserted.emit(json.dumps(new_items, ensure_ascii=False))
+        self.thumbnail_loader.request(new_paths)
+        self.metadata_warmer.request(new_paths)
         return added, duplicates
 
-    def _make_thumb(self, path: str, max_size: int = 128, quality: int = 65) -> str:
+    def _on_thumbnail_ready(self, path: str, data: bytes):
+        item = self._items.get(path)
+        if item is None or not data:
+            return
+        self._thumb_bytes.put(item['id'], data, cost=len(data))
+        # 每次生成使用新令牌，页面对之前请求失败的地址不会复用缓存
+        item['thumbnail'] = f"pts://thumb/{item['id']}/{next(self._thumb_tokens)}"
+        self.thumbnailUpdated.emit(item['id'], item['thumbnail'])
+
+    def _set_selected(self, ids: list[int], selected: bool):
+        for item_id in ids:
+            item = self._items_by_id.get(item_id)
+            if item is not None:
+                item['selected'] = selected
+
+    def publish_preview(self, pane: str, data: bytes) -> str:
+        """保存某个预览面板的最新 JPEG，返回带新令牌的 URL 以绕过页面缓存"""
+        token = next(self._preview_tokens)
+        self._previews[pane] = (token, data)
+        return f"pts://preview/{pane}/{token}"
+
+    def get_image_bytes(self, kind: str, key: str) -> bytes | None:
+        """供 pts:// 协议处理器在界面线程中查询图片数据，不做任何解码"""
+        if kind == 'thumb':
+            try:
+                item = self._items_by_id.get(int(key.partition('/')[0]))
+            except ValueError:
+                return None
+            if item is None:
+                return None
+            data = self._thumb_bytes.get(item['id'])
+            if data is None:
+                # 内存中已淘汰时只读取磁盘缓存命中；否则请求失败，交给后台重新生成后经 thumbnailUpdated 刷新
+                cache = get_thumbnail_cache(self.main_window.config)
+                data = cache.get(item['path'], THUMB_VARIANT) if cache is not None else None
+                if data:
+                    self._thumb_bytes.put(item['id'], data, cost=len(data))
+                else:
+                    self.thumbnail_loader.request([item['path']], visible=True)
+            return data
+        if kind == 'preview':
+            pane, _, token = key.partition('/')
+            current = self._previews.get(pane)
+            if current is not None and str(current[0]) == token:
+                return current[1]
+        return None
+
+    def _warm_metadata(self, paths: list[str]):
+        """在预读线程中为缓存中缺失的文件读取元数据，后续预览和批处理无需再解析"""
+        cache = get_metadata_cache(self.main_window.config)
+        if cache is None or not paths:
+            return
+        known = cache.get_many(paths)
+        missing = {}
+        for path in paths:
+            if 'capture_time' in known.get(path, {}):
+                continue
+            try:
+                missing[path] = read_image_metadata(path)
+            except Exception as e:
+                logger.debug(f"Metadata read failed [{path}]: {e}")
+        cache.put_many(missing)
+
+    def _make_thumb(self, path: str) -> bytes:
         try:
-            with Image.open(path) as im:
-                if im.mode not in ("RGB", "RGBA"):
-                    im = im.convert("RGB")
-                im.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                buf = BytesIO()
-                im.save(buf, format="JPEG", quality=quality)
-                b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-                return f"data:image/jpeg;base64,{b64}"
+            return _cached_jpeg(
+                self.main_window.config, path, THUMB_VARIANT,
+                lambda: _jpeg_bytes(load_thumbnail(path, (THUMB_SIZE, THUMB_SIZE)), THUMB_QUALITY)
+            )
         except Exception as e:
             logger.debug(f"Thumbnail failed [{path}]: {e}")
-            return ""
+            return b""
 
     def get_all_files(self) -> list[str]:
-        return [item['path'] for item in self._file_list]
+        return [item['path'] for item in self._items_by_id.values()]
 
     def get_selected_files(self) -> list[str]:
-        return [item['path'] for item in self._file_list if item.get('selected')]
+        return [item['path'] for item in self._items_by_id.values() if item.get('selected')]
 
 
 # ==================== HTML ====================
@@ -378,6 +768,27 @@ body {
     font-size: 10px;
 }
 
+.scan-banner {
+    display: none;
+    align-items: center;
+    justify-content: space-between;
+    gap: 8px;
+    margin-bottom: 8px;
+    padding: 6px 8px;
+    background: var(--bg-tertiary);
+    border-radius: 4px;
+    font-size: 11px;
+    color: var(--text-secondary);
+}
+
+.scan-banner.visible {
+    display: flex;
+}
+
+.scan-banner .btn {
+    padding: 2px 10px;
+}
+
 .search-box {
     background: var(--bg-tertiary);
     border: 1px solid #4d4d4d;
@@ -412,6 +823,12 @@ body {
     flex: 1;
     overflow-y: auto;
     padding: 4px;
+    position: relative;
+}
+
+/* 虚拟列表：占位层撑起总高度，只渲染可视区附近的行 */
+.file-list-spacer {
+    position: relative;
 }
 
 .file-list::-webkit-scrollbar {
@@ -437,15 +854,18 @@ body {
 
 /* 文件项 */
 .file-item {
+    position: absolute;
+    left: 0;
+    right: 0;
+    height: 70px;
     display: flex;
     align-items: center;
     padding: 6px 8px;
     border-radius: 6px;
     cursor: pointer;
-    margin-bottom: 2px;
     gap: 10px;
     border: 2px solid transparent;
-    transition: all 0.15s ease;
+    transition: background 0.15s ease, border-color 0.15s ease;
 }
 
 .file-item:hover {
@@ -815,10 +1235,16 @@ body {
             <span class="list-info" id="listInfo">共 0 张图片</span>
         </div>
 
+        <div class="scan-banner" id="scanBanner">
+            <span id="scanText">正在扫描...</span>
+            <button class="btn" id="btnCancelScan">取消</button>
+        </div>
+
         <input type="text" class="search-box" id="searchBox" placeholder="搜索图片...">
 
         <div class="file-list-container">
             <div class="file-list" id="fileList">
+                <div class="file-list-spacer" id="fileListSpacer"></div>
                 <div class="empty-hint" id="emptyHint">
                     将图片或文件夹拖放到此处<br>或点击下方按钮添加
                 </div>
@@ -899,11 +1325,21 @@ body {
     let bridge = null;
     let fileList = [];           // 完整文件列表
     let filteredList = [];       // 筛选后的文件列表
-    let selectedPaths = new Set(); // 选中的文件路径
-    let lastClickedPath = null;  // 最后点击的路径（用于Shift多选）
+    let selectedIds = new Set(); // 选中的文件ID
+    let lastClickedId = null;    // 最后点击的ID（用于Shift多选）
     let currentStyleValue = '';
     let isProcessing = false;
     let translations = {};
+    let fileIndex = new Map();     // ID -> 文件条目
+    let itemElements = new Map();  // ID -> 已渲染的行元素
+    let visibleIds = new Set();    // 已渲染且缩略图未就绪的ID
+    let visibleReportTimer = null;
+    let rowPool = [];              // 回收的行元素
+    let renderScheduled = false;
+
+    const ROW_HEIGHT = 72;         // 与 .file-item 高度加间距一致
+    const OVERSCAN = 8;            // 可视区上下额外渲染的行数
+    const ROW_POOL_LIMIT = 200;
 
     // DOM 元素缓存
     const $ = id => document.getElementById(id);
@@ -923,20 +1359,23 @@ body {
 
     function cacheElements() {
         const ids = [
-            'panelTitle', 'listInfo', 'searchBox', 'fileList', 'emptyHint',
+            'panelTitle', 'listInfo', 'searchBox', 'fileList', 'fileListSpacer', 'emptyHint',
             'btnAdd', 'btnSelectAll', 'btnClear', 'styleTitle', 'styleSelect',
             'btnProcess', 'originalTitle', 'originalPlaceholder', 'originalImage',
             'resultTitle', 'resultPlaceholder', 'resultImage', 'contextMenu',
             'menuSelectAll', 'menuDeselectAll', 'menuOpenFile', 'menuOpenFolder',
             'menuRemoveSelected', 'menuClearAll', 'dropOverlay', 'progressOverlay',
             'progressTitle', 'progressFill', 'progressText', 'progressError',
-            'btnCancelProgress', 'statusBar'
+            'btnCancelProgress', 'statusBar', 'scanBanner', 'scanText', 'btnCancelScan'
         ];
         ids.forEach(id => elements[id] = $(id));
     }
 
     function bindBridgeEvents() {
-        bridge.filesUpdated.connect(onFilesUpdated);
+        bridge.filesReset.connect(onFilesReset);
+        bridge.filesInserted.connect(onFilesInserted);
+        bridge.filesRemoved.connect(onFilesRemoved);
+        bridge.selectionChanged.connect(onSelectionChanged);
         bridge.previewUpdated.connect(onPreviewUpdated);
         bridge.progressUpdated.connect(onProgressUpdated);
         bridge.processingFinished.connect(onProcessingFinished);
@@ -945,6 +1384,8 @@ body {
         bridge.uiTextsUpdated.connect(onUITextsUpdated);
         bridge.stylesUpdated.connect(onStylesUpdated);
         bridge.showProgressOverlay.connect(onShowProgressOverlay);
+        bridge.scanProgress.connect(onScanProgress);
+        bridge.thumbnailUpdated.connect(onThumbnailUpdated);
     }
 
     function bindUIEvents() {
@@ -954,6 +1395,19 @@ body {
         elements.btnClear.addEventListener('click', () => bridge.requestClearFiles());
         elements.btnProcess.addEventListener('click', startProcessing);
         elements.btnCancelProgress.addEventListener('click', () => bridge.cancelProcessing());
+        elements.btnCancelScan.addEventListener('click', () => bridge.cancelScan());
+
+        // 文件列表：事件委托到容器，滚动时按帧渲染可视行
+        elements.fileList.addEventListener('click', (e) => {
+            const row = e.target.closest('.file-item');
+            if (row) onFileItemClick(e, Number(row.dataset.id));
+        });
+        elements.fileList.addEventListener('contextmenu', (e) => {
+            const row = e.target.closest('.file-item');
+            if (row) onFileItemContextMenu(e, Number(row.dataset.id));
+        });
+        elements.fileList.addEventListener('scroll', scheduleRender, { passive: true });
+        window.addEventListener('resize', scheduleRender);
 
         // 样式选择
         elements.styleSelect.addEventListener('change', onStyleChange);
@@ -999,140 +1453,271 @@ body {
 
         // 加载文件列表
         const fileListJson = await bridge.getFileList();
-        fileList = JSON.parse(fileListJson);
-        applyFilter();
-        renderFileList();
+        onFilesReset(fileListJson);
     }
 
     // ==================== 文件列表相关 ====================
 
-    function onFilesUpdated(jsonData) {
+    function onFilesReset(jsonData) {
         fileList = JSON.parse(jsonData);
-        
+        fileIndex = new Map(fileList.map(f => [f.id, f]));
+
         // 清理已不存在的选中项
-        const pathSet = new Set(fileList.map(f => f.path));
-        selectedPaths = new Set([...selectedPaths].filter(p => pathSet.has(p)));
-        
+        selectedIds = new Set([...selectedIds].filter(id => fileIndex.has(id)));
+        if (!fileIndex.has(lastClickedId)) {
+            lastClickedId = null;
+        }
+
         applyFilter();
         renderFileList();
         updateProcessButton();
     }
 
-    function applyFilter() {
-        const searchText = elements.searchBox.value.toLowerCase().trim();
-        if (!searchText) {
-            filteredList = [...fileList];
+    function onFilesInserted(jsonData) {
+        const items = JSON.parse(jsonData);
+        const matched = [];
+        items.forEach(file => {
+            fileList.push(file);
+            fileIndex.set(file.id, file);
+            if (matchesFilter(file)) {
+                filteredList.push(file);
+                matched.push(file);
+            }
+        });
+        if (matched.length > 0) {
+            updateListLayout();
+            scheduleRender();
+        }
+        updateListInfo();
+    }
+
+    function onFilesRemoved(jsonData) {
+        const ids = new Set(JSON.parse(jsonData));
+        if (ids.size === 0) {
+            return;
+        }
+        fileList = fileList.filter(f => !ids.has(f.id));
+        filteredList = filteredList.filter(f => !ids.has(f.id));
+        ids.forEach(id => {
+            fileIndex.delete(id);
+            selectedIds.delete(id);
+        });
+        if (ids.has(lastClickedId)) {
+            lastClickedId = null;
+        }
+        updateListLayout();
+        renderVisibleRows();
+        updateListInfo();
+        updateProcessButton();
+    }
+
+    function onSelectionChanged(jsonData) {
+        const change = JSON.parse(jsonData);
+        if (change.all) {
+            selectedIds = change.selected ? new Set(fileIndex.keys()) : new Set();
         } else {
-            filteredList = fileList.filter(f => 
-                f.name.toLowerCase().includes(searchText)
-            );
+            change.ids.forEach(id => {
+                if (!fileIndex.has(id)) return;
+                if (change.selected) {
+                    selectedIds.add(id);
+                } else {
+                    selectedIds.delete(id);
+                }
+            });
         }
+        refreshSelection();
+        updateProcessButton();
+    }
+
+    function matchesFilter(file) {
+        const searchText = elements.searchBox.value.toLowerCase().trim();
+        return !searchText || file.name.toLowerCase().includes(searchText);
+    }
+
+    function applyFilter() {
+        filteredList = fileList.filter(matchesFilter);
     }
 
     function onSearchInput() {
         applyFilter();
+        elements.fileList.scrollTop = 0;
         renderFileList();
     }
 
+    // ==================== 虚拟列表 ====================
+
     function renderFileList() {
-        const container = elements.fileList;
-        const emptyHint = elements.emptyHint;
+        // 列表内容整体变化（重置/筛选）时回收全部行后重绘可视区
+        itemElements.forEach(row => releaseRow(row));
+        itemElements.clear();
+        updateListLayout();
+        renderVisibleRows();
+        updateListInfo();
+    }
 
-        // 清空容器
-        container.innerHTML = '';
+    function updateListLayout() {
+        elements.fileListSpacer.style.height = (filteredList.length * ROW_HEIGHT) + 'px';
+        elements.emptyHint.style.display = filteredList.length === 0 ? 'flex' : 'none';
+    }
 
-        if (filteredList.length === 0) {
-            container.appendChild(emptyHint);
-            emptyHint.style.display = 'flex';
-            updateListInfo();
-            return;
+    function scheduleRender() {
+        // 滚动与批量插入合并到下一帧渲染
+        if (renderScheduled) return;
+        renderScheduled = true;
+        requestAnimationFrame(() => {
+            renderScheduled = false;
+            renderVisibleRows();
+        });
+    }
+
+    function renderVisibleRows() {
+        const list = elements.fileList;
+        const viewTop = list.scrollTop;
+        const viewBottom = viewTop + list.clientHeight;
+        const first = Math.max(0, Math.floor(viewTop / ROW_HEIGHT) - OVERSCAN);
+        const last = Math.min(filteredList.length, Math.ceil(viewBottom / ROW_HEIGHT) + OVERSCAN);
+
+        const wanted = new Map();
+        for (let i = first; i < last; i++) {
+            wanted.set(filteredList[i].id, i);
         }
 
-        emptyHint.style.display = 'none';
+        // 回收离开渲染窗口的行
+        itemElements.forEach((row, id) => {
+            if (!wanted.has(id)) {
+                releaseRow(row);
+                itemElements.delete(id);
+            }
+        });
 
-        // 创建文件项
-        filteredList.forEach(file => {
-            const item = document.createElement('div');
-            item.className = 'file-item';
-            if (selectedPaths.has(file.path)) {
-                item.classList.add('selected');
+        visibleIds.clear();
+        wanted.forEach((index, id) => {
+            const file = fileIndex.get(id);
+            let row = itemElements.get(id);
+            if (!row) {
+                row = acquireRow(file);
+                itemElements.set(id, row);
             }
-            item.dataset.path = file.path;
+            row.style.top = (index * ROW_HEIGHT) + 'px';
+            if (!file.thumbnail) {
+                visibleIds.add(id);
+            }
+        });
+        scheduleVisibleReport();
+    }
 
-            const thumbHtml = file.thumbnail
-                ? `<img src="${file.thumbnail}" alt="">`
-                : '<span class="thumbnail-placeholder">...</span>';
+    function acquireRow(file) {
+        let row = rowPool.pop();
+        if (!row) {
+            row = document.createElement('div');
+            row.className = 'file-item';
+            row.innerHTML = '<div class="thumbnail"></div><span class="file-name"></span>';
+        }
+        row.dataset.id = file.id;
+        row.classList.toggle('selected', selectedIds.has(file.id));
+        setRowThumbnail(row, file.thumbnail);
+        const name = row.lastElementChild;
+        name.textContent = file.name;
+        name.title = file.path;
+        elements.fileListSpacer.appendChild(row);
+        return row;
+    }
 
-            item.innerHTML = `
-                <div class="thumbnail">${thumbHtml}</div>
-                <span class="file-name" title="${escapeHtml(file.path)}">${escapeHtml(file.name)}</span>
-            `;
+    function releaseRow(row) {
+        row.remove();
+        if (rowPool.length < ROW_POOL_LIMIT) {
+            rowPool.push(row);
+        }
+    }
 
-            item.addEventListener('click', (e) => onFileItemClick(e, file.path));
-            item.addEventListener('contextmenu', (e) => onFileItemContextMenu(e, file.path));
+    function setRowThumbnail(row, thumbnail) {
+        row.firstElementChild.innerHTML = thumbnail
+            ? `<img src="${thumbnail}" alt="" loading="lazy" decoding="async" onerror="this.style.visibility='hidden'">`
+            : '<span class="thumbnail-placeholder">...</span>';
+    }
 
-            container.appendChild(item);
+    function refreshSelection() {
+        // 只切换已有元素的样式，不重建列表
+        itemElements.forEach((item, id) => {
+            item.classList.toggle('selected', selectedIds.has(id));
         });
-
         updateListInfo();
     }
 
-    function escapeHtml(text) {
-        const div = document.createElement('div');
-        div.textContent = text;
-        return div.innerHTML;
+    // ==================== 缩略图 ====================
+
+    function onThumbnailUpdated(id, thumbnail) {
+        const file = fileIndex.get(id);
+        if (file) {
+            file.thumbnail = thumbnail;
+        }
+        const row = itemElements.get(id);
+        if (row) {
+            setRowThumbnail(row, thumbnail);
+        }
+        visibleIds.delete(id);
     }
 
-    function onFileItemClick(event, path) {
+    function scheduleVisibleReport() {
+        // 滚动时合并上报，避免频繁调用桥接
+        clearTimeout(visibleReportTimer);
+        visibleReportTimer = setTimeout(() => {
+            if (visibleIds.size > 0) {
+                bridge.setVisibleItems(JSON.stringify([...visibleIds]));
+            }
+        }, 80);
+    }
+
+    function onFileItemClick(event, id) {
         event.stopPropagation();
 
         if (event.ctrlKey || event.metaKey) {
             // Ctrl+点击：切换选中状态
-            if (selectedPaths.has(path)) {
-                selectedPaths.delete(path);
+            if (selectedIds.has(id)) {
+                selectedIds.delete(id);
             } else {
-                selectedPaths.add(path);
+                selectedIds.add(id);
             }
-            lastClickedPath = path;
-        } else if (event.shiftKey && lastClickedPath) {
+            lastClickedId = id;
+        } else if (event.shiftKey && lastClickedId !== null) {
             // Shift+点击：范围选择
-            const paths = filteredList.map(f => f.path);
-            const startIdx = paths.indexOf(lastClickedPath);
-            const endIdx = paths.indexOf(path);
+            const ids = filteredList.map(f => f.id);
+            const startIdx = ids.indexOf(lastClickedId);
+            const endIdx = ids.indexOf(id);
 
             if (startIdx !== -1 && endIdx !== -1) {
                 const minIdx = Math.min(startIdx, endIdx);
                 const maxIdx = Math.max(startIdx, endIdx);
                 for (let i = minIdx; i <= maxIdx; i++) {
-                    selectedPaths.add(paths[i]);
+                    selectedIds.add(ids[i]);
                 }
             }
         } else {
             // 普通点击：单选
-            selectedPaths.clear();
-            selectedPaths.add(path);
-            lastClickedPath = path;
+            selectedIds.clear();
+            selectedIds.add(id);
+            lastClickedId = id;
         }
 
-        renderFileList();
+        refreshSelection();
         updateProcessButton();
 
         // 请求预览最后点击的图片
-        if (selectedPaths.size > 0) {
-            bridge.requestPreview(path);
+        if (selectedIds.size > 0) {
+            bridge.requestPreview(fileIndex.get(id).path);
         }
     }
 
-    function onFileItemContextMenu(event, path) {
+    function onFileItemContextMenu(event, id) {
         event.preventDefault();
         event.stopPropagation();
 
         // 如果右键点击的项未被选中，则选中它
-        if (!selectedPaths.has(path)) {
-            selectedPaths.clear();
-            selectedPaths.add(path);
-            lastClickedPath = path;
-            renderFileList();
+        if (!selectedIds.has(id)) {
+            selectedIds.clear();
+            selectedIds.add(id);
+            lastClickedId = id;
+            refreshSelection();
             updateProcessButton();
         }
 
@@ -1141,7 +1726,7 @@ body {
 
     function updateListInfo() {
         const total = fileList.length;
-        const selected = selectedPaths.size;
+        const selected = selectedIds.size;
 
         if (selected > 0) {
             elements.listInfo.textContent = translations.selected_count
@@ -1157,29 +1742,57 @@ body {
     // ==================== 选择操作 ====================
 
     function selectAll() {
-        filteredList.forEach(f => selectedPaths.add(f.path));
-        renderFileList();
+        filteredList.forEach(f => selectedIds.add(f.id));
+        refreshSelection();
         updateProcessButton();
     }
 
     function deselectAll() {
-        selectedPaths.clear();
-        lastClickedPath = null;
-        renderFileList();
+        selectedIds.clear();
+        lastClickedId = null;
+        refreshSelection();
         updateProcessButton();
     }
 
     function toggleSelectAll() {
-        if (selectedPaths.size === filteredList.length && filteredList.length > 0) {
+        if (selectedIds.size === filteredList.length && filteredList.length > 0) {
             deselectAll();
         } else {
             selectAll();
         }
     }
 
+    function moveSelection(step) {
+        if (filteredList.length === 0) return;
+        const current = filteredList.findIndex(f => f.id === lastClickedId);
+        const index = current === -1 ? 0 : Math.min(filteredList.length - 1, Math.max(0, current + step));
+        const file = filteredList[index];
+
+        selectedIds.clear();
+        selectedIds.add(file.id);
+        lastClickedId = file.id;
+        scrollRowIntoView(index);
+        refreshSelection();
+        updateProcessButton();
+
+        // 预览在后台生成，连续按键时只保留最新请求
+        bridge.requestPreview(file.path);
+    }
+
+    function scrollRowIntoView(index) {
+        const list = elements.fileList;
+        const top = index * ROW_HEIGHT;
+        if (top < list.scrollTop) {
+            list.scrollTop = top;
+        } else if (top + ROW_HEIGHT > list.scrollTop + list.clientHeight) {
+            list.scrollTop = top + ROW_HEIGHT - list.clientHeight;
+        }
+        renderVisibleRows();
+    }
+
     function removeSelected() {
-        if (selectedPaths.size > 0) {
-            bridge.removeSelected(JSON.stringify([...selectedPaths]));
+        if (selectedIds.size > 0) {
+            bridge.removeSelected(JSON.stringify([...selectedIds]));
         }
         hideContextMenu();
     }
@@ -1189,7 +1802,7 @@ body {
     let currentContextPath = null;
 
     function showContextMenu(x, y) {
-        currentContextPath = selectedPaths.size === 1 ? [...selectedPaths][0] : null;
+        currentContextPath = selectedIds.size === 1 ? fileIndex.get([...selectedIds][0]).path : null;
         
         const menu = elements.contextMenu;
         menu.style.left = x + 'px';
@@ -1235,13 +1848,8 @@ body {
 
     function onStyleChange() {
         currentStyleValue = elements.styleSelect.value;
+        // 后端只重新渲染效果面板
         bridge.setStyle(currentStyleValue);
-
-        // 如果有选中的图片，刷新预览
-        if (selectedPaths.size > 0) {
-            const lastSelected = [...selectedPaths].pop();
-            bridge.requestPreview(lastSelected);
-        }
     }
 
     function onStylesUpdated(jsonStr) {
@@ -1253,7 +1861,7 @@ body {
 
     function updateProcessButton() {
         const btn = elements.btnProcess;
-        const count = selectedPaths.size;
+        const count = selectedIds.size;
 
         if (count > 0) {
             btn.disabled = false;
@@ -1267,13 +1875,13 @@ body {
     }
 
     function startProcessing() {
-        if (selectedPaths.size === 0) {
+        if (selectedIds.size === 0) {
             return;
         }
 
         const data = {
             style_name: currentStyleValue,
-            selected_paths: [...selectedPaths]
+            selected_paths: [...selectedIds].map(id => fileIndex.get(id).path)
         };
         bridge.startProcessing(JSON.stringify(data));
     }
@@ -1317,30 +1925,39 @@ body {
         }
     }
 
-    // ==================== 预览相关 ====================
+    // ==================== 文件夹扫描 ====================
 
-    function onPreviewUpdated(originalBase64, resultBase64) {
-        if (originalBase64) {
-            elements.originalImage.src = originalBase64;
-            elements.originalImage.style.display = 'block';
-            elements.originalPlaceholder.style.display = 'none';
-        } else {
-            elements.originalImage.style.display = 'none';
-            elements.originalPlaceholder.style.display = 'block';
-        }
+    function onScanProgress(found, active) {
+        elements.scanBanner.classList.toggle('visible', active);
+        elements.scanText.textContent = translations.scanning
+            ? translations.scanning.replace('{count}', found)
+            : `正在扫描... 已发现 ${found} 张图片`;
+    }
+
+    // ==================== 预览相关 ====================
 
-        if (resultBase64) {
-            elements.resultImage.src = resultBase64;
-            elements.resultImage.style.display = 'block';
-            elements.resultPlaceholder.style.display = 'none';
+    function onPreviewUpdated(pane, url) {
+        // 两个面板分别更新，先完成的先显示
+        const image = pane === 'original' ? elements.originalImage : elements.resultImage;
+        const placeholder = pane === 'original' ? elements.originalPlaceholder : elements.resultPlaceholder;
+        if (url) {
+            image.src = url;
+            image.style.display = 'block';
+            placeholder.style.display = 'none';
         } else {
-            elements.resultImage.style.display = 'none';
-            elements.resultPlaceholder.style.display = 'block';
+            image.style.display = 'none';
+            placeholder.style.display = 'block';
         }
     }
 
     // ==================== 键盘快捷键 ====================
 
+    function isListKeyTarget(target) {
+        if (target === document.body || target === document.documentElement) return true;
+        if (!elements.fileList.contains(target)) return false;
+        return !(target.isContentEditable || target.closest('input, select, textarea, button'));
+    }
+
     function onKeyDown(e) {
         if (isProcessing) return;
 
@@ -1357,8 +1974,15 @@ body {
             return;
         }
 
+        // ↑/↓：移动单选并预览（仅在焦点位于文件列表或页面本身时，表单控件保留原生行为）
+        if ((e.key === 'ArrowDown' || e.key === 'ArrowUp') && isListKeyTarget(e.target)) {
+            e.preventDefault();
+            moveSelection(e.key === 'ArrowDown' ? 1 : -1);
+            return;
+        }
+
         // Delete：删除选中
-        if (e.key === 'Delete' && selectedPaths.size > 0) {
+        if (e.key === 'Delete' && selectedIds.size > 0) {
             e.preventDefault();
             removeSelected();
             return;
@@ -1418,6 +2042,7 @@ body {
         elements.resultPlaceholder.textContent = translations.preview_no_image || '选择图片以预览';
         elements.statusBar.textContent = translations.msg_ready || '就绪';
         elements.btnCancelProgress.textContent = translations.btn_cancel || '取消';
+        elements.btnCancelScan.textContent = translations.btn_cancel || '取消';
 
         elements.menuSelectAll.textContent = translations.ctx_select_all || '全选';
         elements.menuDeselectAll.textContent = translations.ctx_deselect_all || '取消全选';
@@ -1448,7 +2073,7 @@ class SettingsDialog(QDialog):
         self.config = config_manager.load()
 
         self.setWindowTitle(L("Settings&设置"))
-        self.setMinimumSize(500, 720)
+        self.setMinimumSize(500, 860)
         self.setModal(True)
 
         from PyQt6.QtWidgets import QVBoxLayout, QHBoxLayout
@@ -1537,6 +2162,27 @@ class SettingsDialog(QDialog):
         quality_layout.addStretch()
         output_layout.addLayout(quality_layout)
 
+        # encode profile
+        profile_layout = QHBoxLayout()
+        profile_label = QLabel(L("Encoding&编码方式:"))
+        profile_label.setFixedWidth(90)
+        profile_layout.addWidget(profile_label)
+        self.encode_profile_combo = QComboBox()
+        self.encode_profile_combo.setMinimumHeight(28)
+        self.encode_profile_combo.addItem(L("Fast&快速"), "fast")
+        self.encode_profile_combo.addItem(L("Balanced&均衡"), "balanced")
+        self.encode_profile_combo.addItem(L("Smallest file&最小文件"), "smallest")
+        self.encode_profile_combo.addItem(L("Match source&匹配原图"), "match_source")
+        self.encode_profile_combo.addItem(L("Lossless (restart-marker JPEG)&无损（带重启标记的JPEG）"), "lossless")
+        encode_profile = output_config.get('encode_profile', 'balanced')
+        for i in range(self.encode_profile_combo.count()):
+            if self.encode_profile_combo.itemData(i) == encode_profile:
+                self.encode_profile_combo.setCurrentIndex(i)
+                break
+        profile_layout.addWidget(self.encode_profile_combo)
+        profile_layout.addStretch()
+        output_layout.addLayout(profile_layout)
+
         self.preserve_exif_check = QCheckBox(L("Preserve original EXIF data&保留原始EXIF信息"))
         self.preserve_exif_check.setChecked(output_config.get('preserve_exif', True))
         output_layout.addWidget(self.preserve_exif_check)
@@ -1609,6 +2255,42 @@ class SettingsDialog(QDialog):
         time_layout.addLayout(fallback_layout)
         layout.addWidget(time_group)
 
+        # Performance
+        perf_group = QGroupBox(L("Performance&性能"))
+        perf_layout = QVBoxLayout(perf_group)
+        processing_config = self.config.get('processing', {})
+
+        mode_layout = QHBoxLayout()
+        mode_label = QLabel(L("Batch mode&批处理模式:"))
+        mode_label.setFixedWidth(130)
+        mode_layout.addWidget(mode_label)
+        self.mode_combo = QComboBox()
+        self.mode_combo.setMinimumHeight(28)
+        self.mode_combo.addItem(L("Sequential&顺序处理"), "sequential")
+        self.mode_combo.addItem(L("Parallel (multi-process)&并行处理（多进程）"), "parallel")
+        self.mode_combo.addItem(L("Pipeline (overlap I/O and compute)&流水线（I/O与计算重叠）"), "pipeline")
+        mode = processing_config.get('mode', 'sequential')
+        for i in range(self.mode_combo.count()):
+            if self.mode_combo.itemData(i) == mode:
+                self.mode_combo.setCurrentIndex(i)
+                break
+        mode_layout.addWidget(self.mode_combo)
+        perf_layout.addLayout(mode_layout)
+
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel(L("Worker count&工作进程数:"))
+        workers_label.setFixedWidth(130)
+        workers_layout.addWidget(workers_label)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setMinimumHeight(28)
+        self.workers_spin.setRange(0, 256)
+        self.workers_spin.setSpecialValueText(L("Auto (CPU count)&自动（CPU核心数）"))
+        self.workers_spin.setValue(processing_config.get('workers', 0))
+        workers_layout.addWidget(self.workers_spin)
+        workers_layout.addStretch()
+        perf_layout.addLayout(workers_layout)
+        layout.addWidget(perf_group)
+
         layout.addStretch()
 
         # buttons
@@ -1645,10 +2327,13 @@ class SettingsDialog(QDialog):
         self.same_dir_radio.setChecked(True)
         self.filename_pattern_edit.setText("{original}_stamped")
         self.quality_spin.setValue(97)
+        self.encode_profile_combo.setCurrentIndex(1)  # balanced
         self.preserve_exif_check.setChecked(True)
         self.overwrite_check.setChecked(False)
         self.time_exif_radio.setChecked(True)
         self.fallback_combo.setCurrentIndex(0)
+        self.mode_combo.setCurrentIndex(0)
+        self.workers_spin.setValue(0)
 
     def _save_and_close(self):
         new_lang = self.language_combo.currentData()
@@ -1675,13 +2360,20 @@ class SettingsDialog(QDialog):
             'custom_time': custom_time
         }
         self.config['output'] = {
+            **self.config.get('output', {}),
             'same_directory': self.same_dir_radio.isChecked(),
             'custom_directory': self.output_dir_edit.text(),
             'filename_pattern': self.filename_pattern_edit.text() or '{original}_stamped',
             'jpeg_quality': self.quality_spin.value(),
+            'encode_profile': self.encode_profile_combo.currentData(),
             'preserve_exif': self.preserve_exif_check.isChecked(),
             'overwrite_existing': self.overwrite_check.isChecked()
         }
+        self.config['processing'] = {
+            **self.config.get('processing', {}),
+            'mode': self.mode_combo.currentData(),
+            'workers': self.workers_spin.value()
+        }
         self.config_manager.save(self.config)
         self.accept()
 
@@ -1848,6 +2540,7 @@ class ImportDialog(QDialog):
         self.setWindowTitle(L("Import Images&导入图片"))
         self.setFixedSize(380, 220)
         self.selected_files: list[str] = []
+        self.selected_folder = ""
         self.recursive = True
 
         from PyQt6.QtWidgets import QVBoxLayout, QHBoxLayout
@@ -1898,14 +2591,16 @@ class ImportDialog(QDialog):
     def _select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, L("Select Folder&选择文件夹"))
         if folder:
-            recursive = self.recursive_check.isChecked()
-            self.selected_files = scan_images(folder, recursive=recursive)
-            self.recursive = recursive
+            self.selected_folder = folder
+            self.recursive = self.recursive_check.isChecked()
             self.accept()
 
     def get_files(self) -> list[str]:
         return self.selected_files
 
+    def get_folder(self) -> str:
+        return self.selected_folder
+
 
 # ==================== Language Selection Dialog ====================
 class LanguageSelectDialog(QDialog):
@@ -1965,6 +2660,12 @@ class MainWindow(QMainWindow):
         LocalizationManager.set_language(saved_lang)
 
         self.processing_thread: ProcessingThread | None = None
+        self.scan_thread: FolderScanThread | None = None
+        # 解码后的预览底图与时间，样式变化时只需重新叠加水印
+        self._preview_bases = LRUCache(max_entries=16, max_cost=64 * 1024 * 1024)
+        self._preview_path: str | None = None
+        self._scan_added = 0
+        self._scan_duplicates = 0
 
         self._init_ui()
         self._setup_menu()
@@ -1993,6 +2694,11 @@ class MainWindow(QMainWindow):
         self.channel = QWebChannel()
         self.channel.registerObject('bridge', self.bridge)
         self.web_view.page().setWebChannel(self.channel)
+        self.image_scheme_handler = ImageSchemeHandler(self.bridge, self)
+        self.web_view.page().profile().installUrlSchemeHandler(IMAGE_SCHEME, self.image_scheme_handler)
+        self.preview_worker = PreviewWorker()
+        self.preview_worker.ready.connect(self._on_preview_ready)
+        self.preview_worker.start()
         self.web_view.setHtml(get_html_content(), QUrl("qrc:///"))
         self.setCentralWidget(self.web_view)
         self.statusBar().showMessage(L("Ready&就绪"))
@@ -2056,6 +2762,10 @@ class MainWindow(QMainWindow):
     def _show_import_dialog(self):
         dialog = ImportDialog(self)
         if dialog.exec():
+            folder = dialog.get_folder()
+            if folder:
+                self._scan_folder(folder, recursive=dialog.recursive)
+                return
             files = dialog.get_files()
             if files:
                 self._add_files(files)
@@ -2063,20 +2773,57 @@ class MainWindow(QMainWindow):
     def _import_folder(self):
         folder = QFileDialog.getExistingDirectory(self, L("Select Folder&选择文件夹"))
         if folder:
-            files = scan_images(folder, recursive=True)
-            if files:
-                self._add_files(files)
+            self._scan_folder(folder, recursive=True)
 
     def _add_files(self, files: list[str]):
         added, duplicates = self.bridge.add_files(files)
+        self._show_added_message(added, duplicates)
+
+    # ---------- Folder scan ----------
+    def _scan_folder(self, folder: str, recursive: bool = True):
+        self._cancel_scan(wait=True)
+        self._scan_added = 0
+        self._scan_duplicates = 0
+        self.scan_thread = FolderScanThread(folder, recursive)
+        self.scan_thread.chunk.connect(self._on_scan_chunk)
+        self.scan_thread.progress.connect(self._on_scan_progress)
+        self.scan_thread.finished.connect(self._on_scan_finished)
+        self.bridge.scanProgress.emit(0, True)
+        self.scan_thread.start()
+
+    def _cancel_scan(self, wait: bool = False):
+        if self.scan_thread and self.scan_thread.isRunning():
+            self.scan_thread.cancel()
+            if wait:
+                self.scan_thread.wait()
+
+    def _on_scan_chunk(self, files: list):
+        if self.sender() is not self.scan_thread:
+            return
+        added, duplicates = self.bridge.add_files(files)
+        self._scan_added += added
+        self._scan_duplicates += duplicates
+
+    def _on_scan_progress(self, found: int):
+        if self.sender() is not self.scan_thread:
+            return
+        self.bridge.scanProgress.emit(found, True)
+        self.statusBar().showMessage(
+            L("Scanning... {count} images found&正在扫描... 已发现 {count} 张图片").replace("{count}", str(found))
+        )
+
+    def _on_scan_finished(self, found: int, cancelled: bool):
+        if self.sender() is not self.scan_thread:
+            return
+        self.bridge.scanProgress.emit(found, False)
+        prefix = L("Scan cancelled&扫描已取消") + " | " if cancelled else ""
+        self._show_added_message(self._scan_added, self._scan_duplicates, prefix)
+
+    def _show_added_message(self, added: int, duplicates: int, prefix: str = ""):
+        message = prefix + L("Added {count} images&已添加 {count} 张图片").replace("{count}", str(added))
         if duplicates > 0:
-            self.statusBar().showMessage(
-                L("Added {count} images&已添加 {count} 张图片").replace("{count}", str(added)) +
-                " | " +
-                L("Skipped {count} duplicate images&跳过 {count} 张重复图片").replace("{count}", str(duplicates))
-            )
-        else:
-            self.statusBar().showMessage(L("Added {count} images&已添加 {count} 张图片").replace("{count}", str(added)))
+            message += " | " + L("Skipped {count} duplicate images&跳过 {count} 张重复图片").replace("{count}", str(duplicates))
+        self.statusBar().showMessage(message)
 
     def _clear_files(self):
         self.bridge.requestClearFiles()
@@ -2085,6 +2832,9 @@ class MainWindow(QMainWindow):
         dialog = SettingsDialog(self.config_manager, self)
         if dialog.exec():
             self.config = self.config_manager.load()
+            # 时间来源等设置可能改变，缓存的预览时间不再可信
+            self._preview_bases.clear()
+            self._refresh_result_preview()
             self._update_ui_texts()
             self.statusBar().showMessage(L("Settings saved&设置已保存"))
 
@@ -2097,48 +2847,76 @@ class MainWindow(QMainWindow):
         dialog.exec()
 
     # ---------- Preview ----------
-    def _make_preview_b64(self, image: Image.Image, max_long: int = 960, quality: int = 80) -> str:
-        im = image.copy()
-        im.thumbnail((max_long, max_long), Image.Resampling.LANCZOS)
-        if im.mode != 'RGB':
-            im = im.convert('RGB')
-        buf = BytesIO()
-        im.save(buf, format='JPEG', quality=quality)
-        return f"data:image/jpeg;base64,{base64.b64encode(buf.getvalue()).decode('utf-8')}"
+    def _encode_preview(self, image: Image.Image, max_long: int = PREVIEW_SIZE, quality: int = 80) -> bytes:
+        im = image
+        if max(im.size) > max_long:
+            im = WatermarkRenderer.scale_preview(im, (max_long, max_long))
+        return _jpeg_bytes(im, quality)
+
+    def _load_preview_base(self, filepath: str) -> bytes:
+        """原图预览的 JPEG 数据，经磁盘缓存与列表缩略图共享"""
+        return _cached_jpeg(
+            self.config, filepath, f"preview-{PREVIEW_SIZE}-q85",
+            lambda: _jpeg_bytes(load_scaled_image(filepath, (PREVIEW_SIZE, PREVIEW_SIZE)), 85)
+        )
 
     def _update_preview(self, filepath: str):
-        try:
-            with Image.open(filepath) as image:
-                if image.mode not in ('RGB', 'RGBA'):
-                    image = image.convert('RGB')
-
-                original_b64 = self._make_preview_b64(image, max_long=960, quality=80)
-
-                style_name = self.config.get('ui', {}).get('last_style', 'CANON&佳能')
-                style = self.style_manager.load_style(style_name)
-
-                time_config = self.config.get('time_source', {})
-                extractor = TimeExtractor(
-                    primary=time_config.get('primary', 'exif'),
-                    fallback_mode=time_config.get('fallback_mode', 'error'),
-                    custom_time=time_config.get('custom_time', '')
-                )
-                try:
-                    timestamp = extractor.extract(filepath)
-                except:
-                    timestamp = datetime.now()
+        """提交两个面板的预览任务，立即返回，不阻塞界面"""
+        self._preview_path = filepath
+        self.preview_worker.submit('original', lambda: self._get_preview_base(filepath)[0])
+        self._submit_result_preview(filepath)
+
+    def _refresh_result_preview(self):
+        """样式或设置变化时只重新渲染效果面板，底图与时间取自缓存"""
+        if self._preview_path:
+            self._submit_result_preview(self._preview_path)
+
+    def _submit_result_preview(self, filepath: str):
+        style_name = self.config.get('ui', {}).get('last_style', 'CANON&佳能')
+        self.preview_worker.submit('result', lambda: self._render_preview(filepath, style_name))
+
+    def _on_preview_ready(self, pane: str, generation: int, data: bytes):
+        # 发出信号后又有新请求提交时丢弃旧结果
+        if not self.preview_worker.is_current(pane, generation):
+            return
+        url = self.bridge.publish_preview(pane, data) if data else ''
+        self.bridge.previewUpdated.emit(pane, url)
 
-                renderer = WatermarkRenderer(style, self.style_manager.fonts_dir)
+    def _get_preview_base(self, filepath: str) -> tuple[bytes, Image.Image, datetime]:
+        """预览底图的 JPEG 数据、解码图像与拍摄时间，按路径、大小和修改时间缓存"""
+        stat = os.stat(filepath)
+        key = (filepath, stat.st_size, stat.st_mtime_ns)
+        cached = self._preview_bases.get(key)
+        if cached is not None:
+            return cached
 
-                preview_base = image.copy()
-                preview_base.thumbnail((960, 960), Image.Resampling.LANCZOS)
-                result_img = renderer.render(preview_base, timestamp)
-                result_b64 = self._make_preview_b64(result_img, max_long=960, quality=80)
+        data = self._load_preview_base(filepath)
+        image = Image.open(BytesIO(data))
+        image.load()
 
-                self.bridge.previewUpdated.emit(original_b64, result_b64)
-        except Exception as e:
-            logger.error(f"Failed to generate preview: {e}")
-            self.bridge.previewUpdated.emit('', '')
+        time_config = self.config.get('time_source', {})
+        extractor = TimeExtractor(
+            primary=time_config.get('primary', 'exif'),
+            fallback_mode=time_config.get('fallback_mode', 'error'),
+            custom_time=time_config.get('custom_time', ''),
+            metadata_cache=get_metadata_cache(self.config)
+        )
+        try:
+            timestamp = extractor.extract(filepath)
+        except:
+            timestamp = datetime.now()
+
+        entry = (data, image, timestamp)
+        self._preview_bases.put(key, entry, cost=len(data) + image.width * image.height * len(image.getbands()))
+        return entry
+
+    def _render_preview(self, filepath: str, style_name: str) -> bytes:
+        """在预览工作线程中执行：取缓存底图，复制后叠加水印"""
+        _, image, timestamp = self._get_preview_base(filepath)
+        style = self.style_manager.load_style(style_name)
+        renderer = WatermarkRenderer(style, self.style_manager.fonts_dir)
+        result_img = renderer.render(image, timestamp)
+        return self._encode_preview(result_img, quality=80)
 
     # ---------- Processing ----------
     def _start_processing_with_files(self, files: list[str], style_name: str):
@@ -2164,17 +2942,9 @@ class MainWindow(QMainWindow):
         )
 
     def _on_processing_preview(self, filepath: str, image: Image.Image):
-        try:
-            img = image.copy()
-            img.thumbnail((960, 960), Image.Resampling.LANCZOS)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=78)
-            result_b64 = f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
-            self.bridge.previewUpdated.emit('', result_b64)
-        except Exception as e:
-            logger.debug(f"Preview update failed: {e}")
+        # 批处理期间只显示效果面板，编码同样交给预览线程并按最新结果合并
+        self.preview_worker.submit('original', lambda: b"")
+        self.preview_worker.submit('result', lambda: self._encode_preview(image, quality=78))
 
     def _on_finished(self, results: dict):
         self.bridge.showProgressOverlay.emit(False)
@@ -2213,6 +2983,7 @@ class MainWindow(QMainWindow):
             "btn_process": L("Start Processing&开始处理"),
             "btn_process_selected": L("Process Selected ({count})&处理选中 ({count})"),
             "btn_cancel": L("Cancel&取消"),
+            "scanning": L("Scanning... {count} images found&正在扫描... 已发现 {count} 张图片"),
             "preview_original": L("Original&原图"),
             "preview_result": L("Preview&效果预览"),
             "preview_no_image": L("Select an image to preview&选择图片以预览"),
@@ -2285,12 +3056,18 @@ class MainWindow(QMainWindow):
             self.processing_thread.cancel()
             self.processing_thread.wait()
 
+        self._cancel_scan(wait=True)
+        self.bridge.thumbnail_loader.stop()
+        self.bridge.metadata_warmer.stop()
+        self.preview_worker.stop()
+        self.preview_worker.wait()
         self._save_session()
         self._save_ui_state()
         event.accept()
 
 
 def run_app():
+    register_image_scheme()
     app = QApplication(sys.argv)
     app.setApplicationName("Photo Timestamper")
     app.setOrganizationName("PhotoTimestamper")
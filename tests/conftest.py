@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 使测试可以直接导入 source 包
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
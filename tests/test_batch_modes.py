@@ -0,0 +1,56 @@
+import copy
+from io import BytesIO
+
+import piexif
+import pytest
+from PIL import Image
+
+from source.core import BatchProcessor, ConfigManager, StyleManager
+
+
+def make_photo(path, shade: int, taken: str):
+    exif = piexif.dump({'0th': {}, 'Exif': {piexif.ExifIFD.DateTimeOriginal: taken.encode()},
+                        'GPS': {}, '1st': {}, 'thumbnail': None})
+    Image.new('RGB', (320, 240), (shade, 120, 200 - shade)).save(path, 'JPEG', quality=90, exif=exif)
+
+
+def make_config(output_dir, mode: str) -> dict:
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output'].update(same_directory=False, custom_directory=str(output_dir),
+                            filename_pattern='{original}_{index}', overwrite_existing=True)
+    config['processing'].update(mode=mode, workers=2)
+    config['cache'].update(metadata_enabled=False, thumbnail_enabled=False)
+    return config
+
+
+@pytest.fixture
+def photos(tmp_path, monkeypatch):
+    # 样式与字体索引写入 ./simpsave，切换到临时目录避免污染仓库
+    monkeypatch.chdir(tmp_path)
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"photo_{i}.jpg"
+        make_photo(path, 40 * i, f"2023:05:0{i + 1} 07:08:09")
+        paths.append(str(path))
+    return paths
+
+
+def run_batch(tmp_path, paths, mode: str):
+    output_dir = tmp_path / mode
+    output_dir.mkdir()
+    results = BatchProcessor(make_config(output_dir, mode), StyleManager()).process_batch(paths, 'CANON&佳能')
+    outputs = {path.name: path.read_bytes() for path in sorted(output_dir.iterdir())}
+    return results, outputs
+
+
+@pytest.mark.parametrize('mode', ['parallel', 'pipeline'])
+def test_mode_matches_sequential(tmp_path, photos, mode):
+    expected_results, expected_outputs = run_batch(tmp_path, photos, 'sequential')
+    results, outputs = run_batch(tmp_path, photos, mode)
+
+    assert expected_results['success'] == len(photos)
+    assert (results['success'], results['failed'], results['errors']) == (len(photos), 0, [])
+    assert results['encode_stats']['files'] == expected_results['encode_stats']['files']
+    assert results['encode_stats']['output_bytes'] == expected_results['encode_stats']['output_bytes']
+    assert outputs == expected_outputs
+    assert len(outputs) == len(photos)
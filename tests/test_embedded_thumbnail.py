@@ -0,0 +1,112 @@
+from io import BytesIO
+
+import piexif
+import pytest
+from PIL import Image
+
+from source.core import load_embedded_thumbnail, load_thumbnail
+
+RED, GREEN, BLUE = (220, 20, 20), (20, 200, 20), (20, 20, 220)
+
+
+def split_image(size, left=RED, right=GREEN) -> Image.Image:
+    """左右两色的图，用于区分翻转方向"""
+    image = Image.new('RGB', size, right)
+    image.paste(left, (0, 0, size[0] // 2, size[1]))
+    return image
+
+
+def jpeg_bytes(image: Image.Image, **options) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=90, **options)
+    return buffer.getvalue()
+
+
+def write_photo(path, size=(640, 480), orientation=None, thumbnail: bytes | None = None) -> None:
+    """主图为蓝色，内嵌缩略图为左红右绿，便于判断图像来源"""
+    zeroth = {piexif.ImageIFD.Orientation: orientation} if orientation else {}
+    first = {}
+    if thumbnail is not None:
+        first = {piexif.ImageIFD.JPEGInterchangeFormat: 0,
+                 piexif.ImageIFD.JPEGInterchangeFormatLength: len(thumbnail)}
+    exif = piexif.dump({'0th': zeroth, 'Exif': {}, 'GPS': {}, '1st': first, 'thumbnail': thumbnail})
+    path.write_bytes(jpeg_bytes(Image.new('RGB', size, BLUE), exif=exif))
+
+
+def close_to(pixel, color, tolerance=40) -> bool:
+    return all(abs(a - b) <= tolerance for a, b in zip(pixel, color))
+
+
+def test_embedded_thumbnail_used_when_it_covers_box(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    write_photo(path, orientation=1, thumbnail=jpeg_bytes(split_image((160, 120))))
+
+    image, orientation = load_embedded_thumbnail(path, (128, 128))
+    assert orientation == 1
+    assert image.size == (128, 96)
+    assert close_to(image.getpixel((10, 48)), RED) and close_to(image.getpixel((118, 48)), GREEN)
+
+
+@pytest.mark.parametrize('orientation, size, first, second', [
+    # (方向, 结果尺寸, 起点附近颜色, 终点附近颜色)
+    (3, (128, 96), (10, 48, GREEN), (118, 48, RED)),
+    (6, (96, 128), (48, 10, RED), (48, 118, GREEN)),
+    (8, (96, 128), (48, 10, GREEN), (48, 118, RED)),
+])
+def test_load_thumbnail_applies_orientation(tmp_path, orientation, size, first, second):
+    path = tmp_path / 'photo.jpg'
+    write_photo(path, orientation=orientation, thumbnail=jpeg_bytes(split_image((160, 120))))
+
+    image = load_thumbnail(path, (128, 128))
+    assert image.size == size
+    for x, y, color in (first, second):
+        assert close_to(image.getpixel((x, y)), color)
+
+
+def test_falls_back_to_scaled_decode_when_thumbnail_too_small(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    write_photo(path, orientation=6, thumbnail=jpeg_bytes(split_image((160, 120))))
+
+    image, orientation = load_embedded_thumbnail(path, (400, 400))
+    assert image is None and orientation == 6
+    # 缩放解码主图，并同样按方向旋转
+    image = load_thumbnail(path, (400, 400))
+    assert image.size == (300, 400)
+    assert close_to(image.getpixel((150, 200)), BLUE)
+
+
+def truncated_thumbnail() -> bytes:
+    data = jpeg_bytes(split_image((160, 120)))
+    return data[:data.index(b'\xff\xda') + 20]
+
+
+@pytest.mark.parametrize('thumbnail', [None, truncated_thumbnail()])
+def test_falls_back_without_usable_thumbnail(tmp_path, thumbnail):
+    path = tmp_path / 'photo.jpg'
+    write_photo(path, orientation=8, thumbnail=thumbnail)
+
+    image, orientation = load_embedded_thumbnail(path, (64, 64))
+    assert image is None and orientation == 8
+    image = load_thumbnail(path, (64, 64))
+    assert image.size == (48, 64)
+    assert close_to(image.getpixel((24, 32)), BLUE)
+
+
+def test_letterboxed_thumbnail_cropped_to_frame_aspect(tmp_path):
+    # 16:9 画幅配 4:3 缩略图，上下为黑边
+    thumb = Image.new('RGB', (160, 120), (0, 0, 0))
+    thumb.paste(split_image((160, 90)), (0, 15))
+    path = tmp_path / 'photo.jpg'
+    write_photo(path, size=(640, 360), thumbnail=jpeg_bytes(thumb))
+
+    image, _ = load_embedded_thumbnail(path, (128, 128))
+    assert image.size == (128, 72)
+    assert close_to(image.getpixel((10, 2)), RED) and close_to(image.getpixel((118, 69)), GREEN)
+
+
+def test_non_jpeg_source(tmp_path):
+    path = tmp_path / 'photo.png'
+    Image.new('RGB', (200, 100), BLUE).save(path)
+
+    assert load_embedded_thumbnail(path, (64, 64)) == (None, None)
+    assert load_thumbnail(path, (64, 64)).size == (64, 32)
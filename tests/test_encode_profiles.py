@@ -0,0 +1,97 @@
+import copy
+from io import BytesIO
+
+import piexif
+import pytest
+from PIL import Image, JpegImagePlugin
+
+from source.core import ConfigManager, ImageProcessor, LosslessJpegStamper, StyleManager
+
+STYLE = 'CANON&佳能'
+
+
+def make_source(path) -> None:
+    """4:4:4、质量 80 且带重启标记的源图，与默认编码参数都不同"""
+    gradient = Image.linear_gradient('L').resize((256, 192))
+    noise = Image.effect_noise((256, 192), 48)
+    image = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    exif = piexif.dump({'0th': {}, 'Exif': {piexif.ExifIFD.DateTimeOriginal: b'2023:05:01 07:08:09'},
+                        'GPS': {}, '1st': {}, 'thumbnail': None})
+    image.save(path, 'JPEG', quality=80, subsampling=0, exif=exif, restart_marker_rows=1)
+
+
+def reference_qtables(quality: int) -> dict:
+    """Pillow 在给定质量下使用的标准量化表"""
+    buffer = BytesIO()
+    Image.new('RGB', (16, 16)).save(buffer, 'JPEG', quality=quality)
+    return Image.open(buffer).quantization
+
+
+def encode_with(tmp_path, monkeypatch, profile: str, **output):
+    # 样式与字体索引写入 ./simpsave，切换到临时目录避免污染仓库
+    monkeypatch.chdir(tmp_path)
+    source_path = tmp_path / 'source.jpg'
+    make_source(source_path)
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output'].update(encode_profile=profile, overwrite_existing=True, **output)
+    config['cache'].update(metadata_enabled=False, thumbnail_enabled=False)
+
+    output_path = tmp_path / f'{profile}.jpg'
+    assert ImageProcessor(config, StyleManager()).process(str(source_path), STYLE, str(output_path))
+    source = Image.open(source_path)
+    output = Image.open(output_path)
+    output.load()
+    return source, output, output_path.read_bytes()
+
+
+@pytest.mark.parametrize('profile', ['fast', 'balanced', 'smallest'])
+def test_fixed_profiles(tmp_path, monkeypatch, profile):
+    _, output, data = encode_with(tmp_path, monkeypatch, profile, jpeg_quality=90)
+    options = ImageProcessor.ENCODE_PROFILES[profile]
+    assert JpegImagePlugin.get_sampling(output) == 2
+    assert output.quantization == reference_qtables(90)
+    assert bool(output.info.get('progressive')) == options['progressive']
+    assert output.getexif().get_ifd(0x8769).get(0x9003) == '2023:05:01 07:08:09'
+
+
+def test_optimize_and_progressive_shrink_output(tmp_path, monkeypatch):
+    sizes = {profile: len(encode_with(tmp_path, monkeypatch, profile)[2])
+             for profile in ('fast', 'balanced', 'smallest')}
+    assert sizes['fast'] > sizes['balanced'] >= sizes['smallest']
+
+
+@pytest.mark.parametrize('profile', ['match_source', 'lossless'])
+def test_source_matching_profiles(tmp_path, monkeypatch, profile):
+    source, output, data = encode_with(tmp_path, monkeypatch, profile, jpeg_quality=90)
+    # 沿用原图的色度采样与量化表，而非 jpeg_quality 对应的表
+    assert JpegImagePlugin.get_sampling(output) == JpegImagePlugin.get_sampling(source) == 0
+    assert output.quantization == source.quantization
+    assert not output.info.get('progressive')
+    assert output.size == source.size
+
+
+def test_lossless_profile_keeps_untouched_scan_bytes(tmp_path, monkeypatch):
+    _, _, data = encode_with(tmp_path, monkeypatch, 'lossless')
+    source = LosslessJpegStamper((tmp_path / 'source.jpg').read_bytes())
+    stamped = LosslessJpegStamper(data)
+    unchanged = sum(source.data[s:e] == stamped.data[ns:ne]
+                    for (s, e), (ns, ne) in zip(source.intervals, stamped.intervals))
+    # 水印只覆盖右下角，绝大多数重启间隔原样保留
+    assert len(stamped.intervals) == len(source.intervals)
+    assert unchanged >= len(source.intervals) - 6
+
+
+@pytest.mark.parametrize('profile, chroma, expected', [
+    ('fast', '4:4:4', 0),
+    ('balanced', '4:2:2', 1),
+    ('smallest', '4:4:4', 0),
+    ('balanced', '', 2),
+    # 沿用原图的档位忽略 chroma_subsampling 设置
+    ('match_source', '4:2:0', 0),
+    ('lossless', '4:2:0', 0),
+])
+def test_chroma_subsampling_setting(tmp_path, monkeypatch, profile, chroma, expected):
+    source, output, _ = encode_with(tmp_path, monkeypatch, profile, chroma_subsampling=chroma)
+    assert JpegImagePlugin.get_sampling(output) == expected
+    if profile in ('match_source', 'lossless'):
+        assert output.quantization == source.quantization
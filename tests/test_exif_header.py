@@ -0,0 +1,82 @@
+from datetime import datetime
+from io import BytesIO
+
+import piexif
+import pytest
+from PIL import Image
+
+from source.core import ExifHeader, read_exif_block, read_image_metadata
+
+
+def make_jpeg(exif: bytes | None = None, size=(48, 32)) -> bytes:
+    buffer = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new('RGB', size, (90, 120, 150)).save(buffer, 'JPEG', **options)
+    return buffer.getvalue()
+
+
+def piexif_header(zeroth=None, exif=None) -> bytes:
+    return piexif.dump({'0th': zeroth or {}, 'Exif': exif or {}, 'GPS': {}, '1st': {}, 'thumbnail': None})
+
+
+def test_reads_original_time_subsec_and_orientation():
+    data = make_jpeg(piexif_header(
+        {piexif.ImageIFD.Orientation: 6, piexif.ImageIFD.DateTime: b'2020:01:01 00:00:00'},
+        {piexif.ExifIFD.DateTimeOriginal: b'2023:05:06 07:08:09',
+         piexif.ExifIFD.SubSecTimeOriginal: b'123',
+         piexif.ExifIFD.DateTimeDigitized: b'2023:05:06 07:08:10'},
+    ))
+    assert read_image_metadata(data) == {
+        'capture_time': datetime(2023, 5, 6, 7, 8, 9, 123000),
+        'orientation': 6,
+        'width': 48,
+        'height': 32,
+    }
+
+
+@pytest.mark.parametrize('zeroth, exif, expected', [
+    ({}, {piexif.ExifIFD.DateTimeDigitized: b'2021:02:03 04:05:06', piexif.ExifIFD.SubSecTimeDigitized: b'5'},
+     datetime(2021, 2, 3, 4, 5, 6, 500000)),
+    ({piexif.ImageIFD.DateTime: b'2019:12:31 23:59:59'}, {piexif.ExifIFD.SubSecTime: b'0042'},
+     datetime(2019, 12, 31, 23, 59, 59, 4200)),
+    ({piexif.ImageIFD.DateTime: b'2019:12:31 23:59:59'},
+     {piexif.ExifIFD.DateTimeOriginal: b'    :  :     :  :  ', piexif.ExifIFD.SubSecTimeOriginal: b'7'},
+     datetime(2019, 12, 31, 23, 59, 59)),
+    ({}, {piexif.ExifIFD.DateTimeOriginal: b'2022:07:08 09:10:11', piexif.ExifIFD.SubSecTimeOriginal: b'12x'},
+     datetime(2022, 7, 8, 9, 10, 11)),
+])
+def test_capture_time_fallback_order(zeroth, exif, expected):
+    header = ExifHeader(read_exif_block(make_jpeg(piexif_header(zeroth, exif))))
+    assert header.get_datetime() == expected
+
+
+def test_little_endian_header_matches_piexif():
+    exif = Image.Exif()
+    exif.endian = '<'
+    exif[0x0112] = 8
+    exif.get_ifd(0x8769)[0x9003] = '2024:10:11 12:13:14'
+    exif.get_ifd(0x8769)[0x9291] = '987654321'
+    data = make_jpeg(exif.tobytes())
+
+    tiff = read_exif_block(data)
+    assert tiff.startswith(b'II')
+    header = ExifHeader(tiff)
+    assert header.get_orientation() == piexif.load(data)['0th'][piexif.ImageIFD.Orientation] == 8
+    assert header.get_datetime() == datetime(2024, 10, 11, 12, 13, 14, 987654)
+
+
+def test_reads_from_file_path(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(make_jpeg(piexif_header({piexif.ImageIFD.Orientation: 3}), size=(20, 10)))
+    assert read_image_metadata(path) == {'capture_time': None, 'orientation': 3, 'width': 20, 'height': 10}
+
+
+def test_jpeg_without_exif():
+    assert read_image_metadata(make_jpeg()) == {'capture_time': None, 'orientation': None, 'width': 48, 'height': 32}
+
+
+def test_rejects_invalid_tiff():
+    with pytest.raises(ValueError):
+        ExifHeader(b'XX\x00\x2a\x00\x00\x00\x08')
+    with pytest.raises(ValueError):
+        read_image_metadata(b'not a jpeg')
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from source.core import StyleManager
+
+FONTS_DIR = Path(__file__).resolve().parent.parent / 'fonts'
+
+
+@pytest.fixture
+def style_manager(tmp_path, monkeypatch):
+    # 字体索引写入 ./simpsave，切换到临时目录避免污染仓库
+    monkeypatch.chdir(tmp_path)
+    return StyleManager(fonts_dir=str(FONTS_DIR))
+
+
+@pytest.mark.parametrize('font, expected', [
+    # 仅指定文件时，字重/斜体在该文件所属字体族内生效
+    ({'file': 'Roboto-Mono.ttf', 'weight': 'bold'}, 'RobotoMono-Bold.ttf'),
+    ({'file': 'Roboto-Mono.ttf', 'weight': 'bold', 'italic': True}, 'RobotoMono-BoldItalic.ttf'),
+    ({'file': 'Roboto-Mono.ttf', 'weight': 'normal', 'italic': False}, 'RobotoMono-Regular.ttf'),
+    ({'file': 'Roboto-Mono.ttf'}, 'RobotoMono-Regular.ttf'),
+    # 内置样式的写法：DS-Digital + bold
+    ({'file': 'DS-Digital.ttf', 'weight': 'bold', 'italic': False}, 'DS-DIGIB.TTF'),
+    # 指定字体族时优先于文件
+    ({'family': 'Courier Prime', 'file': 'Roboto-Mono.ttf', 'weight': 'bold'}, 'CourierPrime-Bold.ttf'),
+    # 未知字体族回退到文件，并仍在其字体族内应用字重
+    ({'family': 'No Such Font', 'file': 'Roboto-Mono.ttf', 'weight': 'bold'}, 'RobotoMono-Bold.ttf'),
+])
+def test_resolve_font(style_manager, font, expected):
+    assert style_manager.resolve_font(font).name == expected
+
+
+def test_resolve_font_missing_file(style_manager):
+    assert style_manager.resolve_font({'file': 'Missing-Font.ttf', 'weight': 'bold'}) is None
@@ -0,0 +1,93 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageChops
+
+from source.core import LosslessJpegStamper
+
+
+BOX = (148, 100, 220, 132)
+
+
+def make_source(mode: str = 'RGB', **options) -> bytes:
+    """带噪声的渐变图，保证每个 MCU 都有非零 AC 系数"""
+    gradient = Image.linear_gradient('L').resize((256, 192))
+    noise = Image.effect_noise((256, 192), 48)
+    image = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    buffer = BytesIO()
+    image.convert(mode).save(buffer, 'JPEG', quality=90, **options)
+    return buffer.getvalue()
+
+
+def make_overlay() -> Image.Image:
+    return Image.new('RGBA', (BOX[2] - BOX[0], BOX[3] - BOX[1]), (255, 0, 0, 255))
+
+
+def touched_intervals(stamper: LosslessJpegStamper) -> set:
+    mcu_w, mcu_h = stamper.mcu_size
+    return {
+        (my * stamper.mcus_x + mx) // stamper.restart_interval
+        for my in range(BOX[1] // mcu_h, (BOX[3] - 1) // mcu_h + 1)
+        for mx in range(BOX[0] // mcu_w, (BOX[2] - 1) // mcu_w + 1)
+    }
+
+
+@pytest.mark.parametrize('mode, options', [
+    ('RGB', {'subsampling': 2, 'restart_marker_rows': 1}),
+    ('RGB', {'subsampling': 0, 'restart_marker_rows': 1}),
+    ('RGB', {'subsampling': 1, 'restart_marker_blocks': 5}),
+    ('L', {'restart_marker_blocks': 3}),
+])
+def test_stamp_only_rewrites_touched_intervals(mode, options):
+    source = make_source(mode, **options)
+    stamper = LosslessJpegStamper(source)
+    output = stamper.stamp(make_overlay(), BOX[:2])
+
+    stamped = LosslessJpegStamper(output)
+    assert len(stamped.intervals) == len(stamper.intervals)
+    touched = touched_intervals(stamper)
+    for index, ((start, end), (new_start, new_end)) in enumerate(zip(stamper.intervals, stamped.intervals)):
+        if index not in touched:
+            assert output[new_start:new_end] == source[start:end], f"interval {index} changed"
+            continue
+        # 改写的间隔须完整解码，且末尾只有不足一个字节的 1 填充
+        _, positions, raw = stamped.decode_interval(index)
+        padding = len(raw) * 8 - positions[-1]
+        assert 0 <= padding < 8
+        assert int.from_bytes(raw, 'big') & ((1 << padding) - 1) == (1 << padding) - 1
+
+    before = Image.open(BytesIO(source)).convert('RGB')
+    after = Image.open(BytesIO(output))
+    after.load()
+    assert after.size == before.size
+    after = after.convert('RGB')
+
+    inside = ImageChops.difference(before.crop(BOX), after.crop(BOX))
+    assert max(high for _, high in inside.getextrema()) > 64
+
+    # 像素变化不超出水印框所在的 MCU 网格，色度上采样可向外渗出一个色度采样点
+    mcu_w, mcu_h = stamper.mcu_size
+    bleed_x, bleed_y = mcu_w // 8 * 2 - 2, mcu_h // 8 * 2 - 2
+    changed = ImageChops.difference(before, after).getbbox()
+    assert changed is not None
+    assert changed[0] >= BOX[0] // mcu_w * mcu_w - bleed_x
+    assert changed[1] >= BOX[1] // mcu_h * mcu_h - bleed_y
+    assert changed[2] <= -(-BOX[2] // mcu_w) * mcu_w + bleed_x
+    assert changed[3] <= -(-BOX[3] // mcu_h) * mcu_h + bleed_y
+
+
+def test_transparent_overlay_keeps_scan_bytes():
+    source = make_source(restart_marker_rows=1)
+    stamper = LosslessJpegStamper(source)
+    output = stamper.stamp(Image.new('RGBA', (64, 32)), BOX[:2])
+    assert output == source[:stamper.end]
+
+
+def test_probe_rejects_jpeg_without_restart_markers():
+    assert LosslessJpegStamper.probe(make_source()) is None
+
+
+def test_stamp_covering_most_of_frame_falls_back():
+    stamper = LosslessJpegStamper(make_source(restart_marker_rows=1))
+    with pytest.raises(ValueError):
+        stamper.stamp(Image.new('RGBA', (256, 160), (0, 0, 0, 255)), (0, 0))
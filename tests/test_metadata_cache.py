@@ -0,0 +1,115 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from source import core
+from source.core import MetadataCache
+
+TAKEN = datetime(2023, 5, 1, 7, 8, 9)
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"photo_{i}.jpg"
+        path.write_bytes(b'\xff\xd8' + bytes(i))
+        paths.append(str(path))
+    return paths
+
+
+def stored_paths(db_path) -> set:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return {row[0] for row in conn.execute("SELECT path FROM metadata")}
+    finally:
+        conn.close()
+
+
+def test_round_trip_and_merge(tmp_path, files):
+    cache = MetadataCache(str(tmp_path / 'metadata.db'))
+    cache.put_many({files[0]: {'capture_time': TAKEN, 'orientation': 6}})
+    cache.put(files[0], {'width': 640, 'height': 480})
+    cache.flush()
+
+    # 新实例只能从数据库读到，且两次写入已合并
+    reopened = MetadataCache(str(tmp_path / 'metadata.db'))
+    assert reopened.get(files[0]) == {'capture_time': TAKEN, 'orientation': 6, 'width': 640, 'height': 480}
+    assert reopened.get(files[1]) is None
+
+
+def test_change_in_size_or_mtime_invalidates(tmp_path, files):
+    cache = MetadataCache(str(tmp_path / 'metadata.db'))
+    cache.put_many({path: {'capture_time': TAKEN} for path in files[:2]})
+    assert set(cache.get_many(files[:2])) == set(files[:2])
+
+    with open(files[0], 'ab') as f:
+        f.write(b'\x00')
+    stat = os.stat(files[1])
+    os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get_many(files[:2]) == {}
+
+    os.remove(files[2])
+    cache.put(files[2], {'capture_time': TAKEN})
+    assert cache.drain() == {}
+
+
+def test_writes_are_queued_until_chunk_is_full(tmp_path, files, monkeypatch):
+    db_path = tmp_path / 'metadata.db'
+    cache = MetadataCache(str(db_path))
+    monkeypatch.setattr(cache, 'WRITE_CHUNK', 3)
+    assert cache.get(files[4]) is None
+
+    cache.put(files[0], {'capture_time': TAKEN})
+    cache.put(files[1], {'capture_time': None})
+    # 未满一块时只在内存中排队，读取仍能命中
+    assert stored_paths(db_path) == set()
+    assert cache.get_many(files[:2]) == {files[0]: {'capture_time': TAKEN}, files[1]: {'capture_time': None}}
+
+    cache.put(files[2], {'capture_time': TAKEN})
+    assert stored_paths(db_path) == {os.path.abspath(path) for path in files[:3]}
+
+    cache.put(files[3], {'capture_time': TAKEN})
+    cache.flush()
+    assert len(stored_paths(db_path)) == 4
+
+
+def test_evicts_least_recently_used_beyond_max_entries(tmp_path, files, monkeypatch):
+    db_path = tmp_path / 'metadata.db'
+    clock = iter(range(1000, 2000, 10))
+    monkeypatch.setattr(core.time, 'time', lambda: next(clock))
+
+    cache = MetadataCache(str(db_path), max_entries=3)
+    for path in files:
+        cache.put_many({path: {'capture_time': TAKEN}})
+    # 重新打开时按容量淘汰最久未访问的条目
+    MetadataCache(str(db_path), max_entries=3).get(files[0])
+    assert stored_paths(db_path) == {os.path.abspath(path) for path in files[2:]}
+
+    cache.max_entries = 2
+    monkeypatch.setattr(cache, 'EVICT_CHECK_INTERVAL', 1)
+    cache.put_many({files[0]: {'capture_time': TAKEN}})
+    assert stored_paths(db_path) == {os.path.abspath(path) for path in (files[0], files[4])}
+
+
+def test_read_only_cache_never_writes(tmp_path, files):
+    db_path = tmp_path / 'metadata.db'
+    MetadataCache(str(db_path)).put_many({files[0]: {'capture_time': TAKEN}})
+
+    reader = MetadataCache(str(db_path), read_only=True)
+    assert reader.get(files[0]) == {'capture_time': TAKEN}
+    reader.put_many({files[1]: {'capture_time': TAKEN}})
+    reader.flush()
+    assert stored_paths(db_path) == {os.path.abspath(files[0])}
+
+    # 排队的写入交还给可写缓存
+    assert reader.get(files[1]) == {'capture_time': TAKEN}
+    assert reader.drain() == {os.path.abspath(files[1]): {'capture_time': TAKEN}}
+
+
+def test_read_only_cache_without_database(tmp_path, files):
+    reader = MetadataCache(str(tmp_path / 'missing.db'), read_only=True)
+    assert reader.get(files[0]) is None
+    assert not (tmp_path / 'missing.db').exists()
@@ -0,0 +1,164 @@
+import copy
+from io import BytesIO
+from pathlib import Path
+
+import piexif
+import pytest
+from PIL import Image, ImageCms
+
+from source.core import (ConfigManager, ImageProcessor, LosslessJpegStamper, StyleManager,
+                         patch_exif_segment, read_metadata_segments, splice_metadata_segments)
+
+
+def make_source() -> bytes:
+    """带 Exif、ICC 且有重启标记的源图，可走无损与重编码两条路径"""
+    exif = piexif.dump({'0th': {piexif.ImageIFD.Software: b'Camera 1.0'},
+                        'Exif': {piexif.ExifIFD.DateTimeOriginal: b'2023:05:01 07:08:09'},
+                        'GPS': {}, '1st': {}, 'thumbnail': None})
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), (90, 140, 200)).save(buffer, 'JPEG', quality=90, exif=exif,
+                                                     icc_profile=icc, restart_marker_rows=1)
+    return buffer.getvalue()
+
+
+def segment_kinds(data: bytes) -> list:
+    return sorted(segment[4:8] for segment in read_metadata_segments(data))
+
+
+def make_processor(tmp_path, monkeypatch, **output) -> ImageProcessor:
+    # 字体索引写入 ./simpsave，切换到临时目录避免污染仓库
+    monkeypatch.chdir(tmp_path)
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output'].update(output)
+    config['cache'].update(metadata_enabled=False, thumbnail_enabled=False)
+    return ImageProcessor(config, StyleManager())
+
+
+@pytest.mark.parametrize('output, expected', [
+    ({'preserve_exif': True}, [b'Exif', b'ICC_']),
+    ({'preserve_exif': True, 'exif_passthrough': False}, [b'Exif', b'ICC_']),
+    # 不保留 EXIF 时只去掉 Exif/XMP，ICC 色彩配置在两条路径上都保留
+    ({'preserve_exif': False}, [b'ICC_']),
+])
+def test_lossless_and_reencode_keep_same_segments(tmp_path, monkeypatch, output, expected):
+    source = make_source()
+    processor = make_processor(tmp_path, monkeypatch, **output)
+
+    overlay = Image.new('RGBA', (8, 8), (255, 0, 0, 255))
+    lossless = LosslessJpegStamper(source).stamp(overlay, (8, 8), processor._filter_metadata_segment)
+    reencoded = processor.encode(Image.open(BytesIO(source)), Path('source.jpg'), None, source)
+
+    assert segment_kinds(lossless) == expected
+    assert segment_kinds(reencoded) == expected
+    assert Image.open(BytesIO(reencoded)).info.get('icc_profile') == Image.open(BytesIO(source)).info['icc_profile']
+
+
+def make_thumbnail() -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (16, 12), (200, 30, 30)).save(buffer, 'JPEG', quality=70)
+    return buffer.getvalue()
+
+
+def exif_segment_with_thumbnail() -> tuple:
+    """piexif 生成的大端 Exif 段，带 IFD1 缩略图"""
+    thumbnail = make_thumbnail()
+    exif = piexif.dump({
+        '0th': {piexif.ImageIFD.Make: b'Canon', piexif.ImageIFD.Software: b'Firmware 1.0.0'},
+        'Exif': {piexif.ExifIFD.DateTimeOriginal: b'2023:05:01 07:08:09'},
+        'GPS': {}, '1st': {piexif.ImageIFD.JPEGInterchangeFormat: 0,
+                           piexif.ImageIFD.JPEGInterchangeFormatLength: len(thumbnail)},
+        'thumbnail': thumbnail,
+    })
+    segment = b'\xff\xe1' + (len(exif) + 2).to_bytes(2, 'big') + exif
+    # piexif 写入时会去掉缩略图的 APP0，以写入后的缩略图为准
+    return segment, piexif.load(splice_metadata_segments(encode_plain(), [segment]))['thumbnail']
+
+
+def encode_plain(**options) -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', (32, 24), (90, 140, 200)).save(buffer, 'JPEG', **options)
+    return buffer.getvalue()
+
+
+def test_splice_inserts_after_app0_and_round_trips():
+    segment, thumbnail = exif_segment_with_thumbnail()
+    assert Image.open(BytesIO(thumbnail)).size == (16, 12)
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    icc_segment = b'\xff\xe2' + (len(icc) + 16).to_bytes(2, 'big') + b'ICC_PROFILE\x00\x01\x01' + icc
+    encoded = encode_plain()
+    assert encoded[2:4] == b'\xff\xe0'
+
+    output = splice_metadata_segments(encoded, [segment, icc_segment])
+    app0_end = 4 + int.from_bytes(encoded[4:6], 'big')
+    assert output[:app0_end] == encoded[:app0_end]
+    assert output[app0_end:app0_end + len(segment)] == segment
+    assert output.endswith(encoded[app0_end:])
+
+    loaded = piexif.load(output)
+    assert loaded['0th'][piexif.ImageIFD.Make] == b'Canon'
+    assert loaded['Exif'][piexif.ExifIFD.DateTimeOriginal] == b'2023:05:01 07:08:09'
+    assert loaded['thumbnail'] == thumbnail
+    image = Image.open(BytesIO(output))
+    image.load()
+    assert image.info['icc_profile'] == icc
+    assert read_metadata_segments(output) == [segment, icc_segment]
+
+
+def test_splice_without_app0():
+    segment, _ = exif_segment_with_thumbnail()
+    encoded = encode_plain()
+    # 去掉 JFIF APP0 后段直接插在 SOI 之后
+    bare = encoded[:2] + encoded[4 + int.from_bytes(encoded[4:6], 'big'):]
+    output = splice_metadata_segments(bare, [segment])
+    assert output == bare[:2] + segment + bare[2:]
+    assert piexif.load(output)['0th'][piexif.ImageIFD.Make] == b'Canon'
+
+
+@pytest.mark.parametrize('drop_thumbnail, software', [
+    (True, None),
+    (False, 'PTS 2.0'),
+    (True, 'PTS 2.0'),
+    # 不超过 4 字节的值改为内联存放
+    (False, 'PTS'),
+])
+def test_patch_exif_segment_round_trip(drop_thumbnail, software):
+    segment, thumbnail = exif_segment_with_thumbnail()
+    patched = patch_exif_segment(segment, drop_thumbnail=drop_thumbnail, software=software)
+    # 原地修补，段长度不变
+    assert len(patched) == len(segment)
+
+    loaded = piexif.load(splice_metadata_segments(encode_plain(), [patched]))
+    assert loaded['0th'][piexif.ImageIFD.Make] == b'Canon'
+    assert loaded['Exif'][piexif.ExifIFD.DateTimeOriginal] == b'2023:05:01 07:08:09'
+    if drop_thumbnail:
+        assert loaded['1st'] == {} and loaded['thumbnail'] is None
+    else:
+        assert loaded['thumbnail'] == thumbnail
+    expected_software = software.encode() if software else b'Firmware 1.0.0'
+    assert loaded['0th'][piexif.ImageIFD.Software] == expected_software
+
+
+def test_patch_software_that_does_not_fit_is_skipped():
+    segment, _ = exif_segment_with_thumbnail()
+    assert patch_exif_segment(segment, software='A much longer software name') == segment
+
+
+def test_patch_little_endian_segment():
+    exif = Image.Exif()
+    exif.endian = '<'
+    exif[0x0131] = 'Firmware 1.0.0'
+    exif[0x010F] = 'Canon'
+    data = encode_plain(exif=exif.tobytes())
+    segment = read_metadata_segments(data)[0]
+
+    patched = patch_exif_segment(segment, drop_thumbnail=True, software='PTS')
+    loaded = piexif.load(splice_metadata_segments(encode_plain(), [patched]))
+    assert loaded['0th'][piexif.ImageIFD.Software] == b'PTS'
+    assert loaded['0th'][piexif.ImageIFD.Make] == b'Canon'
+
+
+def test_patch_ignores_non_exif_segment():
+    xmp = b'http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>'
+    segment = b'\xff\xe1' + (len(xmp) + 2).to_bytes(2, 'big') + xmp
+    assert patch_exif_segment(segment, drop_thumbnail=True, software='PTS') == segment
@@ -0,0 +1,97 @@
+import copy
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from source.core import FontRegistry, LRUCache, WatermarkRenderer
+
+FONTS_DIR = Path(__file__).resolve().parent.parent / 'fonts'
+TAKEN = datetime(2023, 5, 1, 7, 8, 9)
+
+BASE_STYLE = {
+    'font': {'file': 'DS-Digital.ttf', 'size_ratio': 0.05, 'weight': 'bold', 'italic': False},
+    'color': {'text': '#FF6B35', 'shadow': '#000000'},
+    'effects': {'shadow_enabled': True, 'shadow_offset_x': 2, 'shadow_offset_y': 2, 'opacity': 1.0},
+    'position': {'anchor': 'bottom-right'},
+    'format': {'datetime': '%Y-%m-%d %H:%M'},
+}
+
+
+def test_lru_evicts_least_recently_used_over_entry_limit():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert (cache.get('a'), cache.get('c'), len(cache)) == (1, 3, 2)
+
+
+def test_lru_evicts_over_cost_limit():
+    cache = LRUCache(max_entries=10, max_cost=100)
+    cache.put('a', 'A', cost=40)
+    cache.put('b', 'B', cost=40)
+    cache.get('a')
+    cache.put('c', 'C', cost=30)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+
+    # 替换同一键时按新开销计算
+    cache.put('a', 'A2', cost=10)
+    cache.put('d', 'D', cost=60)
+    assert 'c' in cache and cache.get('a') == 'A2'
+
+    # 单个条目超出总开销上限时不保留，也不挤掉其它条目
+    cache.put('huge', 'H', cost=101)
+    assert 'huge' not in cache and len(cache) == 3
+    assert cache.pop('a') == 'A2' and cache.pop('a', 'gone') == 'gone'
+
+
+@pytest.fixture
+def renderer_factory(tmp_path, monkeypatch):
+    # 字体索引写入 ./simpsave，切换到临时目录避免污染仓库
+    monkeypatch.chdir(tmp_path)
+    FontRegistry.clear()
+    WatermarkRenderer._overlay_cache.clear()
+    yield lambda style: WatermarkRenderer(style, FONTS_DIR)
+    WatermarkRenderer._overlay_cache.clear()
+    FontRegistry.clear()
+
+
+def with_changes(**changes) -> dict:
+    style = copy.deepcopy(BASE_STYLE)
+    for path, value in changes.items():
+        section, key = path.split('__')
+        style[section][key] = value
+    return style
+
+
+@pytest.mark.parametrize('changes', [
+    {'effects__opacity': 0.5},
+    {'effects__shadow_enabled': False},
+    {'effects__shadow_offset_x': 6},
+    {'effects__shadow_offset_y': -3},
+    {'effects__shadow_opacity': 0.3},
+    {'color__shadow_opacity': 0.6},
+    {'color__shadow': '#3366FF'},
+    {'color__text': '#FFFFFF'},
+    {'font__weight': 'normal'},
+    {'font__italic': True},
+])
+def test_overlay_cache_never_returns_stale_overlay(renderer_factory, changes):
+    size = (640, 480)
+    base_overlay, _ = renderer_factory(BASE_STYLE).get_placement(size, TAKEN)
+    cached_overlay, cached_position = renderer_factory(with_changes(**changes)).get_placement(size, TAKEN)
+    assert cached_overlay.tobytes() != base_overlay.tobytes() or cached_overlay.size != base_overlay.size
+
+    # 清空缓存后重新渲染，应与缓存命中的结果一致
+    WatermarkRenderer._overlay_cache.clear()
+    fresh_overlay, fresh_position = renderer_factory(with_changes(**changes)).get_placement(size, TAKEN)
+    assert (cached_overlay.size, cached_position) == (fresh_overlay.size, fresh_position)
+    assert cached_overlay.tobytes() == fresh_overlay.tobytes()
+
+
+def test_overlay_cache_hit_for_identical_style(renderer_factory):
+    first, _ = renderer_factory(BASE_STYLE).get_placement((640, 480), TAKEN)
+    second, _ = renderer_factory(copy.deepcopy(BASE_STYLE)).get_placement((640, 480), TAKEN)
+    assert second is first
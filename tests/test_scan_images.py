@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from source.core import iter_images, scan_images
+
+
+def touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'\xff\xd8\xff\xd9')
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'photos'
+    for name in ('b.JPG', 'a.jpeg', 'C.Jpg', 'a_b.jpg', 'notes.txt', 'raw.CR2', 'fake.jpg.bak',
+                 'a/z.jpg', 'a/deep/y.JPEG', 'a/readme.md', '.hidden/h.jpg', '.dot.jpg', '@eaDir/t.jpg'):
+        touch(root / name)
+    (root / 'folder.jpg').mkdir()
+    return root
+
+
+def relative(root: Path, paths) -> list:
+    return [Path(path).relative_to(root).as_posix() for path in paths]
+
+
+def test_extensions_match_case_insensitively(tree):
+    found = set(relative(tree, iter_images(tree)))
+    assert found == {'b.JPG', 'a.jpeg', 'C.Jpg', 'a_b.jpg', 'a/z.jpg', 'a/deep/y.JPEG',
+                     '.hidden/h.jpg', '.dot.jpg', '@eaDir/t.jpg'}
+
+
+def test_sorted_walk_matches_sorted_paths(tree):
+    found = scan_images(str(tree))
+    # 深度优先按名称遍历的结果与对完整 Path 列表排序一致
+    assert found == [str(path) for path in sorted(Path(path) for path in found)]
+    assert relative(tree, found).index('a/deep/y.JPEG') < relative(tree, found).index('a/z.jpg')
+    assert relative(tree, found).index('a/z.jpg') < relative(tree, found).index('a_b.jpg')
+
+
+def test_non_recursive_lists_top_level_only(tree):
+    found = scan_images(str(tree), recursive=False)
+    assert set(relative(tree, found)) == {'.dot.jpg', 'C.Jpg', 'a.jpeg', 'a_b.jpg', 'b.JPG'}
+    assert found == [str(path) for path in sorted(Path(path) for path in found)]
+
+
+def test_skip_hidden(tree):
+    found = set(relative(tree, iter_images(tree, skip_hidden=True)))
+    assert found == {'b.JPG', 'a.jpeg', 'C.Jpg', 'a_b.jpg', 'a/z.jpg', 'a/deep/y.JPEG'}
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='symlinks unavailable')
+def test_symlink_loops_are_not_followed(tree):
+    try:
+        os.symlink(tree, tree / 'a' / 'loop', target_is_directory=True)
+        os.symlink(tree / 'a', tree / 'a' / 'deep' / 'up', target_is_directory=True)
+        os.symlink(tree / 'missing.jpg', tree / 'broken.jpg')
+        os.symlink(tree / 'b.JPG', tree / 'link.jpg')
+    except OSError:
+        pytest.skip('cannot create symlinks')
+
+    found = relative(tree, scan_images(str(tree)))
+    assert len(found) == len(set(found))
+    assert not any('loop' in path or 'up/' in path for path in found)
+    # 指向文件的链接照常列出，失效链接跳过
+    assert 'link.jpg' in found and 'broken.jpg' not in found
+
+
+def test_missing_directory_yields_nothing(tmp_path):
+    assert scan_images(str(tmp_path / 'missing')) == []
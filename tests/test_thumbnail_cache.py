@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from source.core import ThumbnailCache
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / 'photos' / f"photo_{i}.jpg"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b'\xff\xd8' + bytes([i]) * 10)
+        paths.append(path)
+    return paths
+
+
+def entry_files(cache: ThumbnailCache) -> list:
+    return sorted(cache.directory.rglob('*.jpg'))
+
+
+def age_entry(cache: ThumbnailCache, path, variant: str, seconds: float) -> None:
+    entry = cache._entry_path(path, variant)
+    stamp = time.time() - seconds
+    os.utime(entry, (stamp, stamp))
+
+
+def test_hit_and_get_or_create(tmp_path, sources):
+    cache = ThumbnailCache(str(tmp_path / 'thumbs'))
+    assert cache.get(sources[0], 'thumb') is None
+
+    cache.put(sources[0], 'thumb', b'small')
+    cache.put(sources[0], 'preview', b'large')
+    assert cache.get(sources[0], 'thumb') == b'small'
+    assert cache.get(str(sources[0]), 'preview') == b'large'
+
+    calls = []
+    factory = lambda: calls.append(1) or b'built'
+    assert cache.get_or_create(sources[1], 'thumb', factory) == b'built'
+    assert cache.get_or_create(sources[1], 'thumb', factory) == b'built'
+    assert len(calls) == 1
+
+    # 新实例读取同一目录的条目
+    assert ThumbnailCache(str(tmp_path / 'thumbs')).get(sources[1], 'thumb') == b'built'
+
+
+def test_source_change_invalidates(tmp_path, sources):
+    cache = ThumbnailCache(str(tmp_path / 'thumbs'))
+    cache.put(sources[0], 'thumb', b'old')
+    cache.put(sources[1], 'thumb', b'old')
+
+    sources[0].write_bytes(sources[0].read_bytes() + b'\x00')
+    stat = os.stat(sources[1])
+    os.utime(sources[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(sources[0], 'thumb') is None
+    assert cache.get(sources[1], 'thumb') is None
+    assert cache.get_or_create(sources[0], 'thumb', lambda: b'new') == b'new'
+
+    sources[2].unlink()
+    cache.put(sources[2], 'thumb', b'gone')
+    assert cache.get(sources[2], 'thumb') is None
+    assert len(entry_files(cache)) == 3
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path, sources):
+    cache = ThumbnailCache(str(tmp_path / 'thumbs'), max_bytes=1000)
+    for i, path in enumerate(sources[:3]):
+        cache.put(path, 'thumb', bytes(300))
+        age_entry(cache, path, 'thumb', 3 * cache.TOUCH_INTERVAL - i * 600)
+    # 读取会刷新过期的访问时间，使最早写入的条目变为最近使用
+    assert cache.get(sources[0], 'thumb') is not None
+
+    cache.put(sources[3], 'thumb', bytes(300))
+    assert cache.get(sources[1], 'thumb') is None
+    assert all(cache.get(path, 'thumb') is not None for path in (sources[0], sources[2], sources[3]))
+    assert sum(entry.stat().st_size for entry in entry_files(cache)) <= 1000 * cache.EVICT_TARGET
+
+
+def test_budget_counts_existing_entries_and_skips_temp_files(tmp_path, sources):
+    directory = tmp_path / 'thumbs'
+    ThumbnailCache(str(directory), max_bytes=1000).put(sources[0], 'thumb', bytes(600))
+    (directory / 'zz').mkdir()
+    (directory / 'zz' / 'writer.tmp').write_bytes(bytes(5000))
+
+    # 新实例启动时扫描已有条目，未完成的临时文件不计入也不删除
+    cache = ThumbnailCache(str(directory), max_bytes=1000)
+    age_entry(cache, sources[0], 'thumb', 60)
+    cache.put(sources[1], 'thumb', bytes(600))
+    assert cache.get(sources[0], 'thumb') is None
+    assert cache.get(sources[1], 'thumb') is not None
+    assert (directory / 'zz' / 'writer.tmp').exists()